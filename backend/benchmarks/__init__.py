@@ -0,0 +1,3 @@
+"""
+Offline benchmark harness: fake Gemini/Firestore and an ASGI load driver.
+"""
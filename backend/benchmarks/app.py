@@ -0,0 +1,101 @@
+"""
+Build the real FastAPI app wired to the in-process fakes.
+"""
+import os
+import random
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import FastAPI
+
+from .fakes import FakeGeminiService, InMemoryBlogRepository, LatencyProfile
+
+BENCH_USER = {"uid": "bench-user", "firebase": {"sign_in_provider": "password"}}
+
+
+# Settings the fakes rely on: the lifespan's scheduler would read Firestore (routes
+# get one over the fake repository instead, which callers drive with
+# `reload`/`run_due`), and every request comes from the same user, so rate
+# limits would trip. Tests that cover limits turn them back on.
+BENCH_SETTINGS = {"SCHEDULER_ENABLED": False, "RATE_LIMIT_ENABLED": False}
+
+
+def apply_bench_settings(set_attr: Callable[[Any, str, Any], None] = setattr) -> None:
+    """Apply BENCH_SETTINGS to the global settings; tests pass `monkeypatch.setattr` so they are undone."""
+    from src.core.config import settings
+
+    for name, value in BENCH_SETTINGS.items():
+        set_attr(settings, name, value)
+
+
+def build_app(gemini: Optional[FakeGeminiService] = None,
+              repo: Optional[InMemoryBlogRepository] = None,
+              user: Optional[Dict] = None) -> Tuple[FastAPI, FakeGeminiService, InMemoryBlogRepository]:
+    """Return a new application with Gemini, Firestore and auth replaced by fakes.
+
+    Callers also need `apply_bench_settings()`.
+    """
+    from src.api.dependencies import (
+        get_blog_repository,
+        get_current_user_or_anonymous,
+        get_gemini_service,
+        get_post_scheduler,
+        get_revisions,
+    )
+    from src.core.config import settings
+    from src.main import create_app
+    from src.services.post_scheduler import InMemoryLeaseStore, PostScheduler
+    from src.services.revisions import InMemoryRevisionStore, RevisionHistory
+
+    gemini = gemini or FakeGeminiService()
+    repo = repo or InMemoryBlogRepository()
+    scheduler = PostScheduler(repo, InMemoryLeaseStore())
+    revisions = RevisionHistory(InMemoryRevisionStore(), snapshot_every=settings.REVISION_SNAPSHOT_EVERY)
+    current_user = user or BENCH_USER
+
+    # Async, like the providers they replace: a plain function would run on the threadpool
+    async def blog_repository():
+        return repo
+
+    async def gemini_service():
+        return gemini
+
+    async def post_scheduler():
+        return scheduler
+
+    async def revision_history():
+        return revisions
+
+    async def signed_in_user():
+        return current_user
+
+    app = create_app()
+    app.dependency_overrides[get_blog_repository] = blog_repository
+    app.dependency_overrides[get_gemini_service] = gemini_service
+    app.dependency_overrides[get_post_scheduler] = post_scheduler
+    app.dependency_overrides[get_revisions] = revision_history
+    app.dependency_overrides[get_current_user_or_anonymous] = signed_in_user
+    return app, gemini, repo
+
+
+def create_app() -> FastAPI:
+    """App factory for benchmarking real server processes.
+
+    Each worker builds its own fakes and seeds the posts the driver's --url
+    mode expects, so BENCH_SEED_POSTS must match the driver's --seed-posts.
+    BENCH_TIME_SCALE scales the simulated Gemini latency (the driver's
+    --time-scale only applies in-process).
+    """
+    from .driver import seed_post, seed_post_id
+
+    seed = int(os.getenv("BENCH_SEED", "1234"))
+    gemini = FakeGeminiService(profile=LatencyProfile(), time_scale=float(os.getenv("BENCH_TIME_SCALE", "0.02")),
+                               seed=seed)
+    repo = InMemoryBlogRepository()
+    rng = random.Random(seed)
+    for index in range(int(os.getenv("BENCH_SEED_POSTS", "200"))):
+        post = seed_post(index, rng)
+        post.id = seed_post_id(index)
+        repo.posts[post.id] = post
+    apply_bench_settings()
+    app, _, _ = build_app(gemini=gemini, repo=repo)
+    return app
@@ -0,0 +1,353 @@
+"""
+Concurrent load driver that exercises the real FastAPI app over ASGI.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.driver --requests 2000 --concurrency 32 --save benchmarks/baselines/local.json
+    python -m benchmarks.driver --compare benchmarks/baselines/local.json
+
+With --url the requests go over real sockets to a server running the
+benchmark app instead (see `benchmarks.app.create_app`), to compare server
+modes:
+
+    python run.py --mode prod --app benchmarks.app:create_app --factory
+    python -m benchmarks.driver --url http://127.0.0.1:8000 --requests 5000 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from src.models.blog_post import BlogPost
+
+from .app import BENCH_USER, apply_bench_settings, build_app
+from .fakes import FakeGeminiService, InMemoryBlogRepository, LatencyProfile, fake_article
+
+DEFAULT_MIX = {
+    "list_posts": 40,
+    "get_post": 30,
+    "my_posts": 10,
+    "create_post": 10,
+    "update_post": 5,
+    "generate_post": 5,
+}
+
+
+@dataclass
+class Scenario:
+    """One kind of request in the mix; `build` returns (method, url, json body)."""
+
+    route: str
+    build: Callable[["RunContext"], Tuple[str, str, Optional[dict]]]
+
+
+@dataclass
+class RunContext:
+    rng: random.Random
+    post_ids: List[str]
+    own_post_ids: List[str]
+
+
+def _post_body(ctx: RunContext) -> dict:
+    topic = f"Benchmark topic {ctx.rng.randint(0, 10_000)}"
+    return {
+        "title": topic,
+        "content": fake_article(topic, 800, rng=ctx.rng),
+        "slug": topic.lower().replace(" ", "-"),
+        "author_id": BENCH_USER["uid"],
+        "status": ctx.rng.choice(["draft", "published"]),
+        "tags": ["benchmark"],
+    }
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "list_posts": Scenario("GET /api/blogs/", lambda ctx: ("GET", "/api/blogs/?limit=10", None)),
+    "get_post": Scenario(
+        "GET /api/blogs/{post_id}",
+        lambda ctx: ("GET", f"/api/blogs/{ctx.rng.choice(ctx.post_ids)}", None),
+    ),
+    "my_posts": Scenario("GET /api/blogs/me", lambda ctx: ("GET", "/api/blogs/me?limit=20", None)),
+    "create_post": Scenario("POST /api/blogs/", lambda ctx: ("POST", "/api/blogs/", _post_body(ctx))),
+    "update_post": Scenario(
+        "PUT /api/blogs/{post_id}",
+        lambda ctx: ("PUT", f"/api/blogs/{ctx.rng.choice(ctx.own_post_ids)}", _post_body(ctx)),
+    ),
+    "generate_post": Scenario(
+        "POST /api/blogs/generate",
+        lambda ctx: ("POST", "/api/blogs/generate", {
+            "topic": f"Benchmark topic {ctx.rng.randint(0, 100)}",
+            "keywords": ["python", "performance"],
+            "length": ctx.rng.choice(["short", "medium", "long"]),
+        }),
+    ),
+}
+
+
+@dataclass
+class RouteStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Dict[int, int] = field(default_factory=dict)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def seed_post_id(index: int) -> str:
+    return f"seed-{index}"
+
+
+def seed_post(index: int, rng: random.Random) -> BlogPost:
+    return BlogPost(
+        title=f"Seed post {index}",
+        content=fake_article(f"Seed post {index}", 1000, rng=rng),
+        slug=f"seed-post-{index}",
+        author_id=BENCH_USER["uid"] if index % 4 == 0 else f"author-{index % 50}",
+        status="published" if index % 3 else "draft",
+    )
+
+
+async def seed_posts(repo: InMemoryBlogRepository, count: int, rng: random.Random) -> List[str]:
+    ids = []
+    for index in range(count):
+        ids.append((await repo.create(seed_post(index, rng), post_id=seed_post_id(index))).id)
+    return ids
+
+
+async def run_benchmark(app, repo: Optional[InMemoryBlogRepository], total_requests: int = 1000,
+                        concurrency: int = 16, mix: Optional[Dict[str, int]] = None,
+                        seed_count: int = 200, seed: int = 1234, url: Optional[str] = None) -> dict:
+    """Drive `total_requests` requests from `concurrency` workers and summarize them.
+
+    With `url`, requests go to that server, which must have seeded the same
+    `seed_count` posts; `app` and `repo` are not used.
+    """
+    mix = mix or DEFAULT_MIX
+    rng = random.Random(seed)
+    if url:
+        post_ids = [seed_post_id(index) for index in range(seed_count)]
+        own_post_ids = post_ids[::4]  # seed_post gives every fourth post to the benchmark user
+    else:
+        post_ids = await seed_posts(repo, seed_count, rng)
+        own_post_ids = [post_id for post_id in post_ids if repo.posts[post_id].author_id == BENCH_USER["uid"]]
+    ctx = RunContext(rng=rng, post_ids=post_ids, own_post_ids=own_post_ids)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    plan = rng.choices(names, weights=weights, k=total_requests)
+    stats: Dict[str, RouteStats] = {}
+    cursor = iter(plan)
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        for name in cursor:
+            scenario = SCENARIOS[name]
+            method, url, body = scenario.build(ctx)
+            route_stats = stats.setdefault(scenario.route, RouteStats())
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+                status_code = response.status_code
+            except Exception:
+                status_code = 599
+            route_stats.latencies.append(time.perf_counter() - started)
+            route_stats.statuses[status_code] = route_stats.statuses.get(status_code, 0) + 1
+            if status_code >= 400:
+                route_stats.errors += 1
+
+    async def drive(client: httpx.AsyncClient) -> float:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+    if url:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+            wall = await drive(client)
+    else:
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+                wall = await drive(client)
+
+    config = {
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "mix": mix,
+        "seed_posts": seed_count,
+        "seed": seed,
+    }
+    if url:
+        config["url"] = url
+    return summarize(stats, wall, config)
+
+
+def summarize(stats: Dict[str, RouteStats], wall: float, config: dict) -> dict:
+    routes = {}
+    for route, route_stats in sorted(stats.items()):
+        values = sorted(route_stats.latencies)
+        routes[route] = {
+            "count": len(values),
+            "errors": route_stats.errors,
+            "statuses": {str(code): n for code, n in sorted(route_stats.statuses.items())},
+            "throughput_rps": round(len(values) / wall, 2) if wall else 0.0,
+            "mean_ms": round(1000 * sum(values) / len(values), 3) if values else 0.0,
+            "p50_ms": round(1000 * percentile(values, 50), 3),
+            "p95_ms": round(1000 * percentile(values, 95), 3),
+            "p99_ms": round(1000 * percentile(values, 99), 3),
+        }
+    total = sum(route["count"] for route in routes.values())
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": machine(),
+        "config": config,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(total / wall, 2) if wall else 0.0,
+        "routes": routes,
+    }
+
+
+def machine() -> dict:
+    """What the numbers were measured on; a baseline only holds for the same machine."""
+    cpu = platform.processor()
+    try:
+        with open("/proc/cpuinfo") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+    except OSError:
+        pass
+    return {"platform": platform.platform(), "cpu": cpu, "cpu_count": os.cpu_count()}
+
+
+def compare(report: dict, baseline: dict, tolerance: float = 0.15) -> List[str]:
+    """Return human readable regressions of `report` against `baseline`."""
+    regressions = []
+    for route, base in baseline.get("routes", {}).items():
+        current = report["routes"].get(route)
+        if current is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if base[metric] and current[metric] > base[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{route} {metric}: {base[metric]:.2f} -> {current[metric]:.2f} "
+                    f"(+{100 * (current[metric] / base[metric] - 1):.0f}%)"
+                )
+        if base["throughput_rps"] and current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{route} throughput_rps: {base['throughput_rps']:.1f} -> {current['throughput_rps']:.1f}"
+            )
+    return regressions
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"{'route':<32}{'count':>7}{'err':>6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    ]
+    for route, row in report["routes"].items():
+        lines.append(
+            f"{route:<32}{row['count']:>7}{row['errors']:>6}{row['throughput_rps']:>10.1f}"
+            f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+        )
+    lines.append(f"total: {report['throughput_rps']:.1f} req/s over {report['wall_seconds']:.2f}s")
+    return "\n".join(lines)
+
+
+def _parse_mix(items: List[str]) -> Dict[str, int]:
+    mix = {}
+    for item in items:
+        name, _, weight = item.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name}'. Choose from: {', '.join(SCENARIOS)}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed-posts", type=int, default=200, help="posts created before the run (min 1)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--mix", nargs="*", default=[], help="scenario=weight pairs, e.g. get_post=80 generate_post=20")
+    parser.add_argument("--ttft", type=float, default=0.4, help="median Gemini time to first token (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=150.0)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--time-scale", type=float, default=0.02,
+                        help="multiplier applied to simulated Gemini latency")
+    parser.add_argument("--single-pass-long-posts", action="store_true",
+                        help="simulate long posts as one completion instead of outline + parallel sections")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="simulated Firestore round trip (s)")
+    parser.add_argument("--url", help="benchmark a running server (benchmarks.app:create_app) instead of in-process")
+    parser.add_argument("--save", type=Path, help="write the report as a baseline JSON file")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    gemini = FakeGeminiService(
+        profile=LatencyProfile(ttft_median=args.ttft, tokens_per_second=args.tokens_per_second,
+                               error_rate=args.gemini_error_rate),
+        time_scale=args.time_scale,
+        seed=args.seed,
+        sectioned_long_posts=not args.single_pass_long_posts,
+    )
+    if args.url:
+        app, repo = None, None
+    else:
+        repo = InMemoryBlogRepository(latency=args.db_latency)
+        apply_bench_settings()
+        app, _, _ = build_app(gemini=gemini, repo=repo)
+
+    report = asyncio.run(run_benchmark(
+        app, repo,
+        total_requests=args.requests,
+        concurrency=args.concurrency,
+        mix=_parse_mix(args.mix) if args.mix else None,
+        seed_count=args.seed_posts,
+        seed=args.seed,
+        url=args.url,
+    ))
+    report["config"]["simulation"] = {
+        "ttft": args.ttft,
+        "tokens_per_second": args.tokens_per_second,
+        "gemini_error_rate": args.gemini_error_rate,
+        "time_scale": args.time_scale,
+        "single_pass_long_posts": args.single_pass_long_posts,
+        "db_latency": args.db_latency,
+    }
+    print(format_report(report))
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(report, indent=2))
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        for key in ("config", "machine"):
+            if baseline.get(key) != report[key]:
+                print(f"WARNING {key} differs from {args.compare}; the comparison is not like for like")
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""
+In-process stand-ins for Gemini and Firestore used by the benchmark driver and tests.
+"""
+import asyncio
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from src.core.config import settings
+from src.models.blog_post import BlogPost, PostStats
+from src.utils.summarizer import extractive_description
+
+WORDS_PER_LENGTH = {"short": 500, "medium": 1000, "long": 2000}
+_FILLER = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua ut enim ad minim veniam quis"
+).split()
+
+
+@dataclass
+class LatencyProfile:
+    """Latency model for a fake LLM call.
+
+    Time to first token is drawn from a lognormal distribution around
+    `ttft_median`; generation then proceeds at a normally distributed
+    `tokens_per_second`.
+    """
+
+    ttft_median: float = 0.4
+    ttft_sigma: float = 0.5
+    tokens_per_second: float = 150.0
+    tokens_per_second_stddev: float = 30.0
+    error_rate: float = 0.0
+
+    def sample(self, output_tokens: int, rng: random.Random) -> float:
+        ttft = rng.lognormvariate(0.0, self.ttft_sigma) * self.ttft_median
+        rate = max(1.0, rng.gauss(self.tokens_per_second, self.tokens_per_second_stddev))
+        return ttft + output_tokens / rate
+
+
+@dataclass
+class FakeGeminiService:
+    """Drop-in replacement for GeminiService that never leaves the process.
+
+    When `blocking` is true the simulated latency is spent with `time.sleep` in
+    the default executor, mirroring how the real service runs the synchronous
+    SDK call in a thread pool (and therefore competes for executor threads).
+    """
+
+    profile: LatencyProfile = field(default_factory=LatencyProfile)
+    time_scale: float = 1.0
+    blocking: bool = True
+    seed: Optional[int] = None
+    sectioned_long_posts: bool = True
+    calls: Dict[str, int] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+
+    async def _simulate(self, name: str, output_tokens: int) -> None:
+        self.calls[name] = self.calls.get(name, 0) + 1
+        delay = self.profile.sample(output_tokens, self._rng) * self.time_scale
+        if self._rng.random() < self.profile.error_rate:
+            raise Exception(f"Failed to {name}: simulated Gemini error")
+        if self.blocking:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, time.sleep, delay)
+        else:
+            await asyncio.sleep(delay)
+
+    async def generate_blog_post(self,
+                                 topic: str,
+                                 keywords: List[str] = None,
+                                 tone: str = "professional",
+                                 length: str = "medium",
+                                 target_audience: str = "general") -> str:
+        words = WORDS_PER_LENGTH.get(length, WORDS_PER_LENGTH["medium"])
+        if length == "long" and self.sectioned_long_posts:
+            # Mirrors GeminiService.generate_sectioned_blog_post: outline, then bounded parallel sections
+            sections = settings.GEMINI_LONG_POST_SECTIONS
+            semaphore = asyncio.Semaphore(settings.GEMINI_SECTION_CONCURRENCY)
+            await self._simulate("generate_outline", 150)
+
+            async def section() -> None:
+                async with semaphore:
+                    await self._simulate("generate_section", int(words * 1.3 / sections))
+
+            await asyncio.gather(*(section() for _ in range(sections)))
+        else:
+            await self._simulate("generate_blog_post", int(words * 1.3))
+        return fake_article(topic, words, keywords, self._rng)
+
+    async def regenerate_section(self, title: str, heading_path: List[str], current_body: str,
+                                 previous_summary: str = "", next_summary: str = "",
+                                 instructions: Optional[str] = None, tone: str = "professional",
+                                 target_audience: str = "general") -> str:
+        words = max(80, len(current_body.split()))
+        await self._simulate("regenerate_section", int(words * 1.3))
+        return " ".join(self._rng.choice(_FILLER) for _ in range(words)) + "."
+
+    async def generate_meta_description(self, content: str, title: Optional[str] = None) -> str:
+        description = extractive_description(content, settings.META_DESCRIPTION_MAX_LENGTH)
+        if settings.META_DESCRIPTION_REFINE:
+            await self._simulate("generate_meta_description", 40)
+        return description
+
+    async def generate_slug(self, title: str) -> str:
+        await self._simulate("generate_slug", 10)
+        return "-".join(title.lower().split())
+
+
+def fake_article(topic: str, words: int, keywords: Optional[List[str]] = None,
+                 rng: Optional[random.Random] = None) -> str:
+    """Build a markdown article of roughly `words` words."""
+    rng = rng or random.Random(0)
+    vocabulary = _FILLER + list(keywords or [])
+    sections = max(2, words // 250)
+    lines = [f"# {topic}", ""]
+    per_section = words // sections
+    for index in range(sections):
+        lines.append(f"## Section {index + 1}")
+        lines.append("")
+        lines.append(" ".join(rng.choice(vocabulary) for _ in range(per_section)) + ".")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class InMemoryBlogRepository:
+    """BlogRepository with the same async interface, backed by a dict.
+
+    `latency` adds a fixed simulated round trip (in seconds) to every call.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.posts: Dict[str, BlogPost] = {}
+
+    async def _round_trip(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def create(self, post: BlogPost, post_id: Optional[str] = None) -> BlogPost:
+        await self._round_trip()
+        if post_id in self.posts:
+            return self.posts[post_id].model_copy()
+        post.id = post_id or uuid.uuid4().hex[:20]
+        self.posts[post.id] = post.model_copy()
+        return post
+
+    async def get(self, post_id: str) -> Optional[BlogPost]:
+        await self._round_trip()
+        post = self.posts.get(post_id)
+        return post.model_copy() if post else None
+
+    async def list(self, limit: int = 10, status: Optional[str] = None,
+                   author_id: Optional[str] = None) -> List[BlogPost]:
+        await self._round_trip()
+        results = []
+        for post in self.posts.values():
+            if author_id and post.author_id != author_id:
+                continue
+            if status and post.status != status:
+                continue
+            results.append(post.model_copy())
+            if len(results) >= limit:
+                break
+        return results
+
+    async def update(self, post_id: str, post: BlogPost) -> Optional[BlogPost]:
+        await self._round_trip()
+        if post_id not in self.posts:
+            return None
+        stored = post.model_copy(update={"id": post_id})
+        self.posts[post_id] = stored
+        return post
+
+    async def update_fields(self, post_id: str, fields: Dict[str, Any]) -> bool:
+        await self._round_trip()
+        if post_id not in self.posts:
+            return False
+        self.posts[post_id] = self.posts[post_id].model_copy(update=fields)
+        return True
+
+    async def patch(self, post_id: str, fields: Dict[str, Any]) -> Optional[datetime]:
+        await self._round_trip()
+        if post_id not in self.posts:
+            return None
+        updated_at = datetime.utcnow()
+        self.posts[post_id] = self.posts[post_id].model_copy(update={**fields, "updated_at": updated_at})
+        return updated_at
+
+    async def iter_all(self, batch_size: int = 500) -> AsyncIterator[BlogPost]:
+        for post in list(self.posts.values()):
+            yield post.model_copy()
+
+    async def iter_by_author(self, author_id: str, batch_size: int = 200) -> AsyncIterator[BlogPost]:
+        for post in list(self.posts.values()):
+            if post.author_id == author_id:
+                yield post.model_copy()
+
+    async def stats_by_author(self, author_id: str, statuses: Sequence[str]) -> PostStats:
+        await self._round_trip()
+        posts = [post for post in self.posts.values() if post.author_id == author_id]
+        return PostStats(
+            counts={s: sum(post.status == s for post in posts) for s in statuses},
+            total=len(posts),
+            total_views=sum(post.views for post in posts),
+            last_updated=max((post.updated_at for post in posts), default=None),
+        )
+
+    async def list_scheduled(self, until: datetime, limit: int = 1000) -> List[Tuple[str, datetime]]:
+        await self._round_trip()
+        due = [(post.id, post.scheduled_for) for post in self.posts.values()
+               if post.status == "scheduled" and post.scheduled_for
+               and _as_utc(post.scheduled_for) <= _as_utc(until)]
+        due.sort(key=lambda item: _as_utc(item[1]))
+        return due[:limit]
+
+    async def publish_scheduled(self, post_ids: Sequence[str], now: datetime) -> List[BlogPost]:
+        await self._round_trip()
+        published = []
+        for post_id in post_ids:
+            post = self.posts.get(post_id)
+            if post and post.status == "scheduled" and post.scheduled_for and _as_utc(post.scheduled_for) <= now:
+                post = post.model_copy(update={"status": "published", "published_at": post.scheduled_for,
+                                               "updated_at": now})
+                self.posts[post_id] = post
+                published.append(post.model_copy())
+        return published
+
+    async def delete(self, post_id: str) -> bool:
+        await self._round_trip()
+        return self.posts.pop(post_id, None) is not None
+
+    async def list_by_author(self, author_id: str, limit: int = 10, status: Optional[str] = None) -> List[BlogPost]:
+        return await self.list(limit=limit, status=status, author_id=author_id)
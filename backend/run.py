@@ -1,11 +1,36 @@
+import argparse
 import os
 import sys
 
 # Add the current directory to the Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-import uvicorn
-from src.main import app
+from src.core.server import DEFAULT_APP, ServerOptions, run_development, run_production
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the API server.")
+    parser.add_argument("--mode", choices=["dev", "prod"], default=os.getenv("RUN_MODE", "dev"),
+                        help="dev: one auto-reloading process; prod: tuned multi-worker server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--app", default=DEFAULT_APP, help="import string of the ASGI app")
+    parser.add_argument("--factory", action="store_true", help="--app is a factory that returns the app")
+    defaults = ServerOptions()
+    parser.add_argument("--workers", type=int, default=defaults.workers)
+    parser.add_argument("--keep-alive", type=int, default=defaults.keep_alive)
+    parser.add_argument("--backlog", type=int, default=defaults.backlog)
+    parser.add_argument("--graceful-timeout", type=int, default=defaults.graceful_timeout)
+    parser.add_argument("--max-requests", type=int, default=defaults.max_requests)
+    parser.add_argument("--no-preload", dest="preload", action="store_false", default=defaults.preload)
+    args = parser.parse_args()
+
+    options = ServerOptions(**{name: value for name, value in vars(args).items() if name != "mode"})
+    if args.mode == "prod":
+        run_production(options)
+    else:
+        run_development(options)
+
 
 if __name__ == "__main__":
-    uvicorn.run("src.main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
+    main()
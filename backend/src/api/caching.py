@@ -0,0 +1,185 @@
+"""
+HTTP caching policy for the public blog read endpoints.
+
+Published content is marked cacheable by shared caches (long ``s-maxage`` with
+``stale-while-revalidate``); anything containing a draft, and any empty list,
+is ``private, no-store``. ETag and Last-Modified are derived from each post's
+``updated_at``.
+
+Validators served recently are remembered per resource for a short TTL so a
+conditional request (If-None-Match / If-Modified-Since) can be answered with a
+304 before Firestore is queried. Writes made through this process invalidate
+the affected entries immediately; writes made by other workers are picked up
+once the TTL expires.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional
+
+from fastapi import Request, Response, status
+
+from ..core.config import settings
+from ..models.blog_post import BlogPost
+from ..utils.rendering import RENDERER_VERSION
+
+PRIVATE_NO_STORE = "private, no-store"
+MARKDOWN = "markdown"
+# Includes the renderer version so HTML validators change when the renderer does
+HTML = f"html-v{RENDERER_VERSION}"
+
+
+def public_cache_control() -> str:
+    return (
+        f"public, max-age={settings.HTTP_CACHE_MAX_AGE}, "
+        f"s-maxage={settings.HTTP_CACHE_S_MAXAGE}, "
+        f"stale-while-revalidate={settings.HTTP_CACHE_STALE_WHILE_REVALIDATE}"
+    )
+
+
+@dataclass(frozen=True)
+class Validators:
+    etag: str
+    last_modified: datetime
+    cache_control: str
+
+    def headers(self) -> dict:
+        return {
+            "ETag": self.etag,
+            "Last-Modified": format_datetime(self.last_modified, usegmt=True),
+            "Cache-Control": self.cache_control,
+        }
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def compute_validators(key: str, posts: Iterable[BlogPost]) -> Validators:
+    """Derive ETag/Last-Modified for a resource from its posts' `updated_at`."""
+    digest = hashlib.blake2b(key.encode(), digest_size=12)
+    last_modified = datetime.fromtimestamp(0, tz=timezone.utc)
+    # An empty result must not be cached at the edge: it would hide the first
+    # post published for this filter for the whole s-maxage
+    public = None
+    for post in posts:
+        updated_at = _as_utc(post.updated_at)
+        digest.update(f"|{post.id}:{updated_at.isoformat()}:{post.status}".encode())
+        last_modified = max(last_modified, updated_at)
+        public = public is not False and post.status == "published"
+    return Validators(
+        etag=f'W/"{digest.hexdigest()}"',
+        # HTTP dates have one-second resolution
+        last_modified=last_modified.replace(microsecond=0),
+        cache_control=public_cache_control() if public else PRIVATE_NO_STORE,
+    )
+
+
+def is_not_modified(request: Request, validators: Validators) -> bool:
+    """Evaluate If-None-Match (preferred) or If-Modified-Since against validators."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison: ignore the W/ prefix on both sides
+        wanted = validators.etag.removeprefix("W/")
+        return any(tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = _as_utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError):
+            return False
+        return validators.last_modified <= since
+    return False
+
+
+def _not_modified_response(validators: Validators) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators.headers())
+
+
+class HttpCache:
+    """Bounded, TTL-limited store of recently served validators."""
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self.ttl = settings.HTTP_CACHE_VALIDATOR_TTL if ttl is None else ttl
+        self.max_entries = max_entries or settings.HTTP_CACHE_MAX_ENTRIES
+        # Lists live apart from single posts so any write can drop them all at once
+        self._posts: "OrderedDict[str, tuple[float, Validators]]" = OrderedDict()
+        self._lists: "OrderedDict[str, tuple[float, Validators]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _store(self, key: str) -> "OrderedDict[str, tuple[float, Validators]]":
+        return self._lists if key.startswith("list:") else self._posts
+
+    @staticmethod
+    def post_key(post_id: str, representation: str = MARKDOWN) -> str:
+        return f"post:{post_id}" if representation == MARKDOWN else f"post:{post_id}:{representation}"
+
+    @staticmethod
+    def list_key(**filters) -> str:
+        return "list:" + "&".join(f"{name}={filters[name]}" for name in sorted(filters))
+
+    def _get(self, key: str) -> Optional[Validators]:
+        with self._lock:
+            store = self._store(key)
+            entry = store.get(key)
+            if entry is None:
+                return None
+            expires_at, validators = entry
+            if expires_at < time.monotonic():
+                del store[key]
+                return None
+            store.move_to_end(key)
+            return validators
+
+    def _put(self, key: str, validators: Validators) -> None:
+        with self._lock:
+            store = self._store(key)
+            store[key] = (time.monotonic() + self.ttl, validators)
+            store.move_to_end(key)
+            while len(store) > self.max_entries:
+                store.popitem(last=False)
+
+    def precheck(self, request: Request, key: str) -> Optional[Response]:
+        """Return a 304 if a still-fresh known validator satisfies the request.
+
+        Only requests carrying a conditional header can short-circuit, and only
+        publicly cacheable resources are remembered.
+        """
+        if not (request.headers.get("if-none-match") or request.headers.get("if-modified-since")):
+            return None
+        validators = self._get(key)
+        if validators is not None and is_not_modified(request, validators):
+            return _not_modified_response(validators)
+        return None
+
+    def finalize(self, request: Request, response: Response, key: str,
+                 posts: Iterable[BlogPost]) -> Optional[Response]:
+        """Attach caching headers for `posts`; return a 304 if the client copy is current."""
+        validators = compute_validators(key, posts)
+        if validators.cache_control == PRIVATE_NO_STORE:
+            with self._lock:
+                self._store(key).pop(key, None)
+            response.headers["Cache-Control"] = PRIVATE_NO_STORE
+            return None
+        self._put(key, validators)
+        if is_not_modified(request, validators):
+            return _not_modified_response(validators)
+        response.headers.update(validators.headers())
+        return None
+
+    def invalidate(self, post_id: Optional[str] = None) -> None:
+        """Forget validators affected by a write to `post_id` (and every list)."""
+        with self._lock:
+            if post_id is not None:
+                for representation in (MARKDOWN, HTML):
+                    self._posts.pop(self.post_key(post_id, representation), None)
+            self._lists.clear()
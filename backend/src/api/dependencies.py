@@ -1,19 +1,106 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from firebase_admin import auth
+import firebase_admin
 import logging # Import logging
+from ..core.container import Container
+from .caching import HttpCache
+from ..services.analytics import AnalyticsAggregator
+from ..repositories.blog_repository import BlogRepository
+from ..services.gemini_service import GeminiService
+from ..services.duplicate_index import DuplicateIndex
+from ..services.idempotency_service import IdempotencyService
+from ..services.post_indexes import PostIndexes
+from ..services.post_scheduler import PostScheduler
+from ..services.prompts import PromptTelemetry
+from ..services.rate_limiter import RateLimiter
+from ..services.related_posts import RelatedPostsIndex
+from ..services.render_cache import RenderCache
+from ..services.revisions import RevisionHistory
+from ..services.stats_cache import StatsCache
+from ..services.tag_index import TagIndex
 
 logger = logging.getLogger(__name__) # Setup logger
 security = HTTPBearer()
 
-async def get_current_user_or_anonymous(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+async def get_container(request: Request) -> Container:
+    """Return the application container created by the lifespan handler."""
+    return request.app.state.container
+
+async def get_firebase_app(container: Container = Depends(get_container)) -> firebase_admin.App:
+    """Provide the initialized Firebase Admin app."""
+    return container.firebase_app
+
+async def get_blog_repository(container: Container = Depends(get_container)) -> BlogRepository:
+    """Provide the shared BlogRepository."""
+    return container.blog_repository
+
+async def get_gemini_service(container: Container = Depends(get_container)) -> GeminiService:
+    """Provide the shared GeminiService (created on first use)."""
+    return container.gemini_service
+
+async def get_prompt_telemetry(container: Container = Depends(get_container)) -> PromptTelemetry:
+    """Provide the per-template Gemini usage aggregates."""
+    return container.prompt_telemetry
+
+async def get_http_cache(container: Container = Depends(get_container)) -> HttpCache:
+    """Provide the validator cache used by the public read endpoints."""
+    return container.http_cache
+
+async def get_stats_cache(container: Container = Depends(get_container)) -> StatsCache:
+    """Provide the short-TTL cache of per-user dashboard stats."""
+    return container.stats_cache
+
+async def get_render_cache(container: Container = Depends(get_container)) -> RenderCache:
+    """Provide the content-hash cache of rendered post HTML."""
+    return container.render_cache
+
+async def get_revisions(container: Container = Depends(get_container)) -> RevisionHistory:
+    """Provide the per-post revision history."""
+    return container.revisions
+
+async def get_idempotency_service(container: Container = Depends(get_container)) -> IdempotencyService:
+    """Provide the Idempotency-Key handler for POST endpoints."""
+    return container.idempotency_service
+
+async def get_rate_limiter(container: Container = Depends(get_container)) -> RateLimiter:
+    """Provide the token-bucket limiter for endpoints that call Gemini."""
+    return container.rate_limiter
+
+async def get_tag_index(container: Container = Depends(get_container)) -> TagIndex:
+    """Provide the corpus tag index kept up to date by the write endpoints."""
+    return container.tag_index
+
+async def get_duplicate_index(container: Container = Depends(get_container)) -> DuplicateIndex:
+    """Provide the MinHash near-duplicate index over stored posts."""
+    return container.duplicate_index
+
+async def get_related_posts(container: Container = Depends(get_container)) -> RelatedPostsIndex:
+    """Provide the precomputed related-posts table."""
+    return container.related_posts
+
+async def get_post_indexes(container: Container = Depends(get_container)) -> PostIndexes:
+    """Provide the indexes that write endpoints keep up to date."""
+    return container.post_indexes
+
+async def get_analytics(container: Container = Depends(get_container)) -> AnalyticsAggregator:
+    """Provide the in-memory analytics rollups and their store."""
+    return container.analytics
+
+async def get_post_scheduler(container: Container = Depends(get_container)) -> PostScheduler:
+    """Provide the publisher that write endpoints tell about scheduled posts."""
+    return container.post_scheduler
+
+async def get_current_user_or_anonymous(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    firebase_app: firebase_admin.App = Depends(get_firebase_app),
+) -> dict:
     """Verifies the Firebase ID token from the Authorization header.
     
     Allows both fully authenticated and anonymous users.
     Returns the decoded token dictionary if valid.
     Raises HTTPException 401 otherwise.
     """
-    logger.info("Dependency 'get_current_user_or_anonymous' called.") # Log entry
     if credentials is None:
         logger.warning("No credentials found in request.") # Log missing credentials
         raise HTTPException(
@@ -24,16 +111,15 @@ async def get_current_user_or_anonymous(credentials: HTTPAuthorizationCredential
         
     try:
         token = credentials.credentials
-        logger.info(f"Attempting to verify token: {token[:10]}...{token[-5:]}") # Log token (partially)
-        decoded_token = auth.verify_id_token(token)
+        decoded_token = auth.verify_id_token(token, app=firebase_app)
         user_id = decoded_token.get('uid')
-        logger.info(f"Token verified successfully for UID: {user_id}") # Log success
+        logger.debug("Token verified for UID: %s", user_id)
         return decoded_token 
     except Exception as e:
-        logger.error(f"Token verification failed: {e}", exc_info=True) # Log the full error
+        logger.warning("Token verification failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"Invalid authentication credentials",
+            detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
@@ -56,4 +142,14 @@ async def get_current_authenticated_user(decoded_token: dict = Depends(get_curre
             detail="Full authentication required, anonymous access not allowed.",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return decoded_token 
\ No newline at end of file
+    return decoded_token 
+
+async def get_admin_user(decoded_token: dict = Depends(get_current_authenticated_user)) -> dict:
+    """Ensures the user carries the `admin` custom claim.
+
+    Set it with the Admin SDK: auth.set_custom_user_claims(uid, {"admin": True}).
+    Raises HTTPException 403 for everyone else.
+    """
+    if decoded_token.get('admin') is not True:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return decoded_token
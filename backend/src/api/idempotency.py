@@ -0,0 +1,59 @@
+"""
+Idempotency-Key support for POST endpoints.
+
+Clients that retry a POST on timeout send the same ``Idempotency-Key`` header
+each time. The first request runs; retries attach to it while it is in flight
+or get its stored response replayed (marked with ``Idempotent-Replayed: true``).
+"""
+import hashlib
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Header, HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from ..services.idempotency_service import IdempotencyService, fingerprint_request
+
+MAX_KEY_LENGTH = 255
+
+
+def scoped_key(scope: str, user_id: str, idempotency_key: str) -> str:
+    """Keys are only unique per user and endpoint."""
+    return f"{scope}:{user_id}:{idempotency_key}"
+
+
+def derived_document_id(key: str) -> str:
+    """Stable Firestore document id for work identified by an idempotency key.
+
+    Used for creates so that even if the idempotency record is lost, a retry
+    overwrites the same document instead of creating a duplicate.
+    """
+    return hashlib.sha256(key.encode()).hexdigest()[:20]
+
+
+async def run_idempotent(request: Request, service: IdempotencyService, key: str,
+                         handler: Callable[[], Awaitable[Any]]) -> JSONResponse:
+    """Run `handler` at most once for `key` and return its JSON response."""
+    fingerprint = fingerprint_request(request.method.encode(), request.url.path.encode(), await request.body())
+
+    async def execute():
+        return status.HTTP_200_OK, jsonable_encoder(await handler())
+
+    status_code, body, replayed = await service.run(key, fingerprint, execute)
+    headers = {"Idempotent-Replayed": "true"} if replayed else None
+    return JSONResponse(content=body, status_code=status_code, headers=headers)
+
+
+async def idempotency_key_header(
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+) -> Optional[str]:
+    """Read and validate the optional Idempotency-Key request header."""
+    if idempotency_key is None:
+        return None
+    idempotency_key = idempotency_key.strip()
+    if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters",
+        )
+    return idempotency_key
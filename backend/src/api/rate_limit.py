@@ -0,0 +1,44 @@
+"""
+Rate limiting for endpoints that spend Gemini quota.
+
+`limit_generation` is added to a route's dependencies. It runs after the
+token is verified and before the handler, so a caller over its limit gets a
+429 with ``Retry-After`` without the request reaching Gemini.
+"""
+import logging
+import math
+
+from fastapi import Depends, HTTPException, Request, status
+
+from ..core.config import settings
+from ..services.rate_limiter import RateLimiter, RateLimitExceeded
+from .dependencies import get_current_user_or_anonymous, get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+GENERATION_SCOPE = "generate"
+
+
+def client_ip(request: Request) -> str:
+    # Behind a proxy, this is the X-Forwarded-For client once FORWARDED_ALLOW_IPS trusts the proxy
+    return request.client.host if request.client else ""
+
+
+async def limit_generation(
+    request: Request,
+    current_user: dict = Depends(get_current_user_or_anonymous),
+    limiter: RateLimiter = Depends(get_rate_limiter),
+) -> None:
+    """Take one generation token for the caller or reject the request with 429."""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    try:
+        await limiter.check(GENERATION_SCOPE, current_user, client_ip(request))
+    except RateLimitExceeded as e:
+        logger.info("Rate limited user %s (%s tier)", current_user.get('uid'), e.tier)
+        retry_after = max(1, math.ceil(e.retry_after))
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Too many generation requests; retry in {retry_after}s",
+            headers={"Retry-After": str(retry_after)},
+        )
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends
+from typing import Dict
+from ...core.container import Container
+from ...services.prompts import PROMPTS, PromptTelemetry
+from ..dependencies import get_admin_user, get_container, get_prompt_telemetry
+
+# Operational views for admins (Firebase custom claim "admin"); every figure is per worker process
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(get_admin_user)])
+
+@router.get("/prompts")
+async def get_prompt_stats(telemetry: PromptTelemetry = Depends(get_prompt_telemetry)) -> Dict[str, dict]:
+    """Token usage, estimated cost, latency and error rate per prompt template version, costliest first.
+
+    Registered templates that haven't been used yet are listed with zero counts.
+    """
+    stats = telemetry.stats()
+    for template in PROMPTS:
+        stats.setdefault(template.key, telemetry.empty_stats())
+    return stats
+
+@router.get("/models")
+async def get_model_stats(container: Container = Depends(get_container)) -> Dict[str, dict]:
+    """Calls, failures, latency, tokens, estimated cost and breaker state per Gemini model."""
+    return container.model_stats()
@@ -0,0 +1,124 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from datetime import date, datetime, timedelta
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
+import hashlib
+import logging
+from ...core.config import settings
+from ...repositories.blog_repository import BlogRepository
+from ...services.analytics import AnalyticsAggregator, combine
+from ..dependencies import get_analytics, get_blog_repository, get_current_authenticated_user
+
+router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+logger = logging.getLogger(__name__)
+
+class AnalyticsEvent(BaseModel):
+    type: Literal["view", "engagement"]
+    post_id: str = Field(min_length=1, max_length=128)
+    # Anonymous id kept by the client; derived from the client address and user agent when absent
+    visitor_id: Optional[str] = Field(None, max_length=128)
+    # Engagement events, sent when the reader leaves the page
+    time_on_page: Optional[float] = Field(None, ge=0, le=86400)
+    bounced: Optional[bool] = None
+
+class AnalyticsEventBatch(BaseModel):
+    events: List[AnalyticsEvent]
+
+class AnalyticsEventResponse(BaseModel):
+    accepted: int
+
+class AnalyticsDay(BaseModel):
+    date: date
+    views: int
+    unique_visitors: int
+    average_time_on_page: float  # seconds
+    bounce_rate: float
+
+class PostAnalytics(BaseModel):
+    post_id: str
+    totals: AnalyticsDay  # `date` is the first day with data; unique visitors are deduplicated across days
+    days: List[AnalyticsDay]
+
+class AnalyticsReport(BaseModel):
+    start_date: date
+    end_date: date
+    posts: List[PostAnalytics]
+
+def _visitor_id(request: Request) -> str:
+    client = request.client.host if request.client else ""
+    agent = request.headers.get("user-agent", "")
+    return hashlib.sha256(f"{client}|{agent}".encode()).hexdigest()[:32]
+
+@router.post("/events", response_model=AnalyticsEventResponse, status_code=status.HTTP_202_ACCEPTED)
+async def record_events(
+    batch: AnalyticsEventBatch,
+    request: Request,
+    analytics: AnalyticsAggregator = Depends(get_analytics),
+):
+    """Record page-view and engagement events. Public; events are batched per page.
+
+    Events only update in-memory rollups, which are written to storage every
+    ANALYTICS_FLUSH_SECONDS, so they appear in reports after the next flush.
+    """
+    if len(batch.events) > settings.ANALYTICS_MAX_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.ANALYTICS_MAX_BATCH} events per request",
+        )
+    fallback_visitor = None
+    accepted = 0
+    for event in batch.events:
+        visitor_id = event.visitor_id
+        if not visitor_id:
+            fallback_visitor = fallback_visitor or _visitor_id(request)
+            visitor_id = fallback_visitor
+        accepted += analytics.record(event.post_id, event.type, visitor_id,
+                                     time_on_page=event.time_on_page, bounced=event.bounced)
+    return AnalyticsEventResponse(accepted=accepted)
+
+@router.get("/posts", response_model=AnalyticsReport)
+async def get_post_analytics(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    post_id: Optional[str] = None,
+    current_user: dict = Depends(get_current_authenticated_user),
+    blog_repo: BlogRepository = Depends(get_blog_repository),
+    analytics: AnalyticsAggregator = Depends(get_analytics),
+):
+    """Daily analytics for the caller's posts (or one of them), read from the stored rollups."""
+    user_id = current_user.get('uid')
+    if not user_id:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not identify user from token")
+    end_date = end_date or datetime.utcnow().date()
+    start_date = start_date or end_date - timedelta(days=29)
+    if start_date > end_date or (end_date - start_date).days > 366:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Date range must be 1 to 367 days")
+
+    if post_id:
+        post = await blog_repo.get(post_id)
+        if not post:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+        if post.author_id != user_id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view this post")
+        post_ids = [post_id]
+    else:
+        posts = await blog_repo.list(author_id=user_id, limit=settings.ANALYTICS_REPORT_MAX_POSTS)
+        post_ids = [post.id for post in posts]
+
+    try:
+        rollups = await analytics.store.query(post_ids, start_date, end_date) if post_ids else []
+    except Exception as e:
+        logger.error("Failed to read analytics for user %s: %s", user_id, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+    report = []
+    for pid in post_ids:
+        days = [r for r in rollups if r.post_id == pid]
+        if not days:
+            continue
+        report.append(PostAnalytics(
+            post_id=pid,
+            totals=combine(days, analytics.precision).to_dict(),
+            days=[r.to_dict() for r in days],
+        ))
+    return AnalyticsReport(start_date=start_date, end_date=end_date, posts=report)
@@ -5,6 +5,8 @@ from datetime import datetime, timedelta
 from typing import Optional
 import os
 from dotenv import load_dotenv
+import firebase_admin
+from ..dependencies import get_firebase_app
 
 load_dotenv()
 
@@ -13,12 +15,13 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 security = HTTPBearer()
 
 @router.post("/register")
-async def register(email: str, password: str):
+async def register(email: str, password: str, firebase_app: firebase_admin.App = Depends(get_firebase_app)):
     try:
         user = auth.create_user(
             email=email,
             password=password,
-            email_verified=False
+            email_verified=False,
+            app=firebase_app
         )
         return {"message": "User created successfully", "uid": user.uid}
     except Exception as e:
@@ -28,12 +31,12 @@ async def register(email: str, password: str):
         )
 
 @router.post("/token")
-async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), firebase_app: firebase_admin.App = Depends(get_firebase_app)):
     try:
         # Verify the password and get the user
-        user = auth.get_user_by_email(form_data.username)
+        user = auth.get_user_by_email(form_data.username, app=firebase_app)
         # Create a custom token
-        custom_token = auth.create_custom_token(user.uid)
+        custom_token = auth.create_custom_token(user.uid, app=firebase_app)
         return {
             "access_token": custom_token.decode(),
             "token_type": "bearer"
@@ -46,11 +49,11 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
         )
 
 @router.get("/me")
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), firebase_app: firebase_admin.App = Depends(get_firebase_app)):
     try:
-        decoded_token = auth.verify_id_token(credentials.credentials)
+        decoded_token = auth.verify_id_token(credentials.credentials, app=firebase_app)
         uid = decoded_token['uid']
-        user = auth.get_user(uid)
+        user = auth.get_user(uid, app=firebase_app)
         return {
             "uid": user.uid,
             "email": user.email,
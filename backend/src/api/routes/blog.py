@@ -1,11 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, Request, status
-from typing import List, Optional
+import asyncio
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from datetime import datetime
+from typing import List, Literal, Optional
 from pydantic import BaseModel
-from ...models.blog_post import BlogPost
+from ...models.blog_post import BlogPost, BlogPostPatch, PostStats
+from ...models.revision import RevisionDetail, RevisionInfo
 from ...services.gemini_service import GeminiService
+from ...services.duplicate_index import DuplicateIndex, SimilarPost
+from ...services.idempotency_service import IdempotencyService
+from ...services.post_indexes import PostIndexes
+from ...services.post_scheduler import PostScheduler
+from ...services.related_posts import RelatedPost, RelatedPostsIndex
+from ...services.render_cache import RenderCache
+from ...services.resilience import CircuitOpenError
+from ...services.revisions import RESTORED_FIELDS, RevisionError, RevisionHistory
+from ...services.stats_cache import StatsCache
+from ...services.tag_index import TagIndex, merge_tags
 from ...repositories.blog_repository import BlogRepository
-from ..dependencies import get_current_user_or_anonymous, get_current_authenticated_user
+from ..caching import HTML, MARKDOWN, PRIVATE_NO_STORE, HttpCache, public_cache_control
+from ..dependencies import (
+    get_blog_repository,
+    get_current_authenticated_user,
+    get_current_user_or_anonymous,
+    get_duplicate_index,
+    get_gemini_service,
+    get_http_cache,
+    get_idempotency_service,
+    get_post_indexes,
+    get_post_scheduler,
+    get_related_posts,
+    get_render_cache,
+    get_revisions,
+    get_stats_cache,
+    get_tag_index,
+)
+from ..idempotency import derived_document_id, idempotency_key_header, run_idempotent, scoped_key
+from ..rate_limit import limit_generation
 import logging
+import math
+from ...core.config import settings
+from ...core.logging_config import truncate
+from ...utils.export import NDJSON_MEDIA_TYPE, ZIP_MEDIA_TYPE, ndjson_stream, zip_stream
+from ...utils.markdown import (
+    find_sections,
+    parse_sections,
+    replace_section_body,
+    section_body,
+    summarize_text,
+)
 
 # Define a response model for the generation endpoint
 class BlogGenerationResponseData(BaseModel):
@@ -17,16 +61,78 @@ class BlogGenerationResponseData(BaseModel):
     tags: List[str] 
 
 router = APIRouter(prefix="/api/blogs", tags=["blog"])
-blog_repo = BlogRepository()
-gemini_service = GeminiService()
 logger = logging.getLogger(__name__)
 
+# Set on create/update responses when the saved content nearly duplicates other posts
+NEAR_DUPLICATES_HEADER = "X-Near-Duplicates"
+
+def _near_duplicates_value(duplicates: List[SimilarPost]) -> str:
+    return ", ".join(f"{d.post_id};similarity={d.similarity}" for d in duplicates)
+
+def _gemini_unavailable(error: CircuitOpenError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error),
+        headers={"Retry-After": str(math.ceil(error.retry_after))},
+    )
+
+def _prefers_minimal(request: Request) -> bool:
+    """Whether the client sent `Prefer: return=minimal` (RFC 7240)."""
+    preferences = request.headers.get("prefer", "").split(",")
+    return any(p.split(";")[0].strip().lower() == "return=minimal" for p in preferences)
+
+# ?format= on the read endpoints: stored markdown, or sanitized HTML rendered from it
+PostFormat = Literal["markdown", "html"]
+
+async def _rendered(posts: List[BlogPost], format: PostFormat, render_cache: RenderCache) -> List[BlogPost]:
+    """`posts` with `content` replaced by its HTML when format is "html"."""
+    if format != "html" or not posts:
+        return posts
+    bodies = await render_cache.html_many([post.content for post in posts])
+    return [post.model_copy(update={"content": body}) for post, body in zip(posts, bodies)]
+
+async def _record_revision(revisions: RevisionHistory, post: BlogPost, previous_content: Optional[str],
+                           user_id: str, source: str, restored_from: Optional[int] = None) -> None:
+    """Append `post` to its revision history; the save itself has already succeeded, so failures are only logged."""
+    try:
+        await revisions.record(post, previous_content, user_id, source, restored_from=restored_from)
+    except Exception as e:
+        logger.warning("Failed to record %s revision of post %s: %s", source, post.id, e)
+
+def _check_schedule(post: BlogPost) -> None:
+    if post.status == "scheduled" and post.scheduled_for is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Scheduled posts need a scheduled_for time")
+
 class BlogGenerationRequest(BaseModel):
     topic: str
     keywords: List[str]
     tone: str = "professional"
     length: str = "medium"
     target_audience: str = "general"
+    # When set, a 409 listing existing posts on the same topic is returned instead of generating
+    check_duplicates: bool = False
+
+class TagSuggestionRequest(BaseModel):
+    title: str
+    content: str
+    k: Optional[int] = None  # defaults to TAG_SUGGESTIONS
+
+class TagSuggestionResponse(BaseModel):
+    tags: List[str]
+
+class SectionRegenerationRequest(BaseModel):
+    # Heading path of the section, outermost first; a trailing subset such as
+    # ["Installation"] is enough when it is unambiguous
+    path: List[str]
+    instructions: Optional[str] = None
+    tone: str = "professional"
+    target_audience: str = "general"
+
+class SectionRegenerationResponse(BaseModel):
+    post_id: str
+    path: List[str]
+    content: str  # The regenerated section body, without its heading
+    updated_at: datetime
 
 @router.options("/generate")
 async def options_generate():
@@ -36,14 +142,64 @@ async def options_generate():
         headers={
             "Access-Control-Allow-Origin": "*",
             "Access-Control-Allow-Methods": "POST, OPTIONS",
-            "Access-Control-Allow-Headers": "Content-Type, Authorization",
+            "Access-Control-Allow-Headers": "Content-Type, Authorization, Idempotency-Key",
             "Access-Control-Max-Age": "3600",
         }
     )
 
 @router.post("/", response_model=BlogPost)
-async def create_post(post: BlogPost, current_user: dict = Depends(get_current_authenticated_user)):
-    """Create a new blog post. Requires authenticated user."""
+async def create_post(
+    post: BlogPost,
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_authenticated_user),
+    blog_repo: BlogRepository = Depends(get_blog_repository),
+    http_cache: HttpCache = Depends(get_http_cache),
+    tag_index: TagIndex = Depends(get_tag_index),
+    duplicate_index: DuplicateIndex = Depends(get_duplicate_index),
+    post_indexes: PostIndexes = Depends(get_post_indexes),
+    scheduler: PostScheduler = Depends(get_post_scheduler),
+    stats_cache: StatsCache = Depends(get_stats_cache),
+    idempotency_key: Optional[str] = Depends(idempotency_key_header),
+    idempotency: IdempotencyService = Depends(get_idempotency_service),
+    render_cache: RenderCache = Depends(get_render_cache),
+    revisions: RevisionHistory = Depends(get_revisions),
+):
+    """Create a new blog post. Requires authenticated user.
+
+    Posts saved without tags get suggestions from the tag index, and the
+    X-Near-Duplicates header lists existing posts with nearly the same content.
+    Posts with status "scheduled" are published at `scheduled_for`.
+    With an Idempotency-Key header, retries replay the original response and
+    never create a second document. The post's HTML is rendered after the
+    response is sent.
+    """
+    _check_schedule(post)
+    # Checked before the write so the new post doesn't match itself
+    duplicates = await asyncio.to_thread(duplicate_index.find_duplicates, post.content,
+                                         author_id=current_user.get('uid'))
+    if idempotency_key:
+        key = scoped_key("create", current_user.get('uid', ''), idempotency_key)
+        result = await run_idempotent(
+            request, idempotency, key,
+            lambda: _create_post(post, current_user, blog_repo, http_cache, tag_index, post_indexes,
+                                 scheduler, stats_cache, revisions, render_cache, background_tasks,
+                                 derived_document_id(key)),
+        )
+    else:
+        result = await _create_post(post, current_user, blog_repo, http_cache, tag_index, post_indexes,
+                                    scheduler, stats_cache, revisions, render_cache, background_tasks)
+    if duplicates:
+        # run_idempotent returns its own response; otherwise FastAPI applies `response`'s headers
+        target = result if isinstance(result, Response) else response
+        target.headers[NEAR_DUPLICATES_HEADER] = _near_duplicates_value(duplicates)
+    return result
+
+async def _create_post(post: BlogPost, current_user: dict, blog_repo: BlogRepository, http_cache: HttpCache,
+                       tag_index: TagIndex, post_indexes: PostIndexes, scheduler: PostScheduler,
+                       stats_cache: StatsCache, revisions: RevisionHistory, render_cache: RenderCache,
+                       background_tasks: BackgroundTasks, post_id: Optional[str] = None) -> BlogPost:
     try:
         user_id = current_user.get('uid')
         if not user_id:
@@ -51,13 +207,26 @@ async def create_post(post: BlogPost, current_user: dict = Depends(get_current_a
              
         # Assign the author ID from the authenticated user
         post.author_id = user_id
-        
-        logger.info(f"User {user_id} creating blog post: {post.dict()}")
-        created_post = await blog_repo.create(post)
-        logger.info(f"Blog post created successfully: {created_post.id} by user {user_id}")
+        if not post.tags:
+            post.tags = await asyncio.to_thread(tag_index.suggest, post.title, post.content, k=settings.TAG_SUGGESTIONS)
+
+        logger.info("User %s creating blog post: %s (%d chars)", user_id, truncate(post.title, 120), len(post.content))
+        created_post = await blog_repo.create(post, post_id=post_id)
+        if created_post is not post:
+            # A retry of a create that already happened: the stored post (maybe
+            # edited since) is returned as is, without indexing or a revision
+            logger.info("Blog post %s already created; returning the stored post", created_post.id)
+            return created_post
+        http_cache.invalidate(created_post.id)
+        stats_cache.invalidate(user_id)
+        background_tasks.add_task(post_indexes.add_async, created_post)
+        background_tasks.add_task(render_cache.precompute, created_post.content)
+        scheduler.sync(created_post)
+        await _record_revision(revisions, created_post, None, user_id, "create")
+        logger.info("Blog post created successfully: %s by user %s", created_post.id, user_id)
         return created_post
     except Exception as e:
-        logger.error(f"Failed to create blog post for user {user_id}: {str(e)}")
+        logger.error("Failed to create blog post for user %s: %s", user_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -65,62 +234,205 @@ async def create_post(post: BlogPost, current_user: dict = Depends(get_current_a
 
 @router.get("/test-me")
 async def test_me_route():
-    logger.info("Accessed /test-me route successfully.")
+    logger.debug("Accessed /test-me route successfully.")
     return {"message": "Test route for /me endpoint works"}
 
 @router.get("/me", response_model=List[BlogPost])
-async def get_my_posts(limit: int = 10, status: Optional[str] = None, current_user: dict = Depends(get_current_authenticated_user)):
-    """Get the current authenticated user's blog posts."""
+async def get_my_posts(
+    limit: int = 10,
+    status: Optional[str] = None,
+    format: PostFormat = "markdown",
+    current_user: dict = Depends(get_current_authenticated_user),
+    blog_repo: BlogRepository = Depends(get_blog_repository),
+    render_cache: RenderCache = Depends(get_render_cache),
+):
+    """Get the current authenticated user's blog posts (content as HTML with format=html)."""
     user_id = current_user.get('uid')
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not identify user from token")
         
     try:
-        logger.info(f"Fetching posts for user: {user_id}")
+        logger.debug("Fetching posts for user: %s", user_id)
         posts = await blog_repo.list(author_id=user_id, limit=limit, status=status)
-        logger.info(f"Found {len(posts)} posts for user {user_id}")
-        return posts
+        logger.debug("Found %d posts for user %s", len(posts), user_id)
+        return await _rendered(posts, format, render_cache)
     except Exception as e:
-        logger.error(f"Failed to fetch user's blog posts for user {user_id}: {str(e)}")
+        logger.error("Failed to fetch user's blog posts for user %s: %s", user_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
+@router.get("/me/stats", response_model=PostStats)
+async def get_my_stats(
+    response: Response,
+    current_user: dict = Depends(get_current_authenticated_user),
+    blog_repo: BlogRepository = Depends(get_blog_repository),
+    stats_cache: StatsCache = Depends(get_stats_cache),
+):
+    """Post counts per status, total views and last update time for the current user.
+
+    Computed with Firestore aggregation queries and cached per user for
+    STATS_CACHE_TTL seconds; this user's writes drop the cached entry.
+    """
+    user_id = current_user.get('uid')
+    if not user_id:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not identify user from token")
+
+    response.headers["Cache-Control"] = PRIVATE_NO_STORE
+    stats = stats_cache.get(user_id)
+    if stats is not None:
+        return stats
+    try:
+        stats = await blog_repo.stats_by_author(user_id, settings.POST_STATUSES)
+    except Exception as e:
+        logger.error("Failed to compute post stats for user %s: %s", user_id, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    stats_cache.put(user_id, stats)
+    return stats
+
+@router.get("/me/export")
+async def export_my_posts(
+    format: Literal["ndjson", "zip"] = "ndjson",
+    current_user: dict = Depends(get_current_authenticated_user),
+    blog_repo: BlogRepository = Depends(get_blog_repository),
+):
+    """Download every post of the current user as NDJSON or a zip of markdown files.
+
+    Posts are streamed from Firestore page by page straight into the response,
+    so memory use does not grow with the size of the archive.
+    """
+    user_id = current_user.get('uid')
+    if not user_id:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not identify user from token")
+
+    logger.info("User %s exporting posts as %s", user_id, format)
+    posts = blog_repo.iter_by_author(user_id, batch_size=settings.EXPORT_BATCH_SIZE)
+    if format == "zip":
+        body, media_type = zip_stream(posts), ZIP_MEDIA_TYPE
+    else:
+        body, media_type = ndjson_stream(posts), NDJSON_MEDIA_TYPE
+    filename = f"posts-{datetime.utcnow():%Y%m%d}.{format}"
+    return StreamingResponse(body, media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Cache-Control": "no-store",
+    })
+
 @router.get("/{post_id}", response_model=BlogPost)
-async def get_post(post_id: str):
-    """Get a blog post by ID."""
+async def get_post(
+    post_id: str,
+    request: Request,
+    response: Response,
+    format: PostFormat = "markdown",
+    blog_repo: BlogRepository = Depends(get_blog_repository),
+    http_cache: HttpCache = Depends(get_http_cache),
+    render_cache: RenderCache = Depends(get_render_cache),
+):
+    """Get a blog post by ID, with its content as sanitized HTML if format=html.
+
+    Published posts are cacheable at the edge; conditional requests for a
+    recently served version are answered with 304 without reading Firestore.
+    HTML comes from the render cache, so each version of a post is rendered
+    once.
+    """
+    cache_key = HttpCache.post_key(post_id, HTML if format == "html" else MARKDOWN)
+    not_modified = http_cache.precheck(request, cache_key)
+    if not_modified:
+        return not_modified
+
     post = await blog_repo.get(post_id)
     if not post:
         raise HTTPException(
             status_code=404,
             detail="Post not found"
         )
-    return post
+    not_modified = http_cache.finalize(request, response, cache_key, [post])
+    if not_modified:
+        return not_modified
+    return (await _rendered([post], format, render_cache))[0]
+
+@router.get("/{post_id}/related", response_model=List[RelatedPost])
+async def get_related_posts_route(
+    post_id: str,
+    response: Response,
+    limit: int = 5,
+    blog_repo: BlogRepository = Depends(get_blog_repository),
+    related_posts: RelatedPostsIndex = Depends(get_related_posts),
+    post_indexes: PostIndexes = Depends(get_post_indexes),
+):
+    """Published posts most similar to `post_id`, read from the precomputed neighbour table."""
+    limit = max(1, min(limit, settings.RELATED_POSTS_K))
+    related = related_posts.related(post_id, limit)
+    if related is None:
+        post = await blog_repo.get(post_id)
+        if not post:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+        # Written before this worker's index was built: index it now
+        await post_indexes.add_async(post)
+        related = related_posts.related(post_id, limit) or []
+    response.headers["Cache-Control"] = public_cache_control()
+    return related
 
 @router.get("/", response_model=List[BlogPost])
 async def list_posts(
+    request: Request,
+    response: Response,
     limit: int = 10, 
     status: Optional[str] = None,
-    author_id: Optional[str] = None
+    author_id: Optional[str] = None,
+    format: PostFormat = "markdown",
+    blog_repo: BlogRepository = Depends(get_blog_repository),
+    http_cache: HttpCache = Depends(get_http_cache),
+    render_cache: RenderCache = Depends(get_render_cache),
 ):
-    """List blog posts with optional filtering."""
+    """List blog posts with optional filtering (content as HTML with format=html).
+
+    Cacheable at the edge when every returned post is published.
+    """
+    cache_key = HttpCache.list_key(limit=limit, status=status, author_id=author_id,
+                                   format=HTML if format == "html" else MARKDOWN)
+    not_modified = http_cache.precheck(request, cache_key)
+    if not_modified:
+        return not_modified
     try:
-        logger.info(f"Fetching posts with filters - author_id: {author_id}, status: {status}")
-        return await blog_repo.list(limit=limit, status=status, author_id=author_id)
+        logger.debug("Fetching posts with filters - author_id: %s, status: %s", author_id, status)
+        posts = await blog_repo.list(limit=limit, status=status, author_id=author_id)
     except Exception as e:
-        logger.error(f"Failed to list posts: {str(e)}")
+        logger.error("Failed to list posts: %s", e)
         raise HTTPException(
             status_code=500,
             detail=str(e)
         )
+    not_modified = http_cache.finalize(request, response, cache_key, posts)
+    if not_modified:
+        return not_modified
+    return await _rendered(posts, format, render_cache)
 
 @router.put("/{post_id}", response_model=BlogPost)
-async def update_post(post_id: str, post_update: BlogPost, current_user: dict = Depends(get_current_authenticated_user)):
-    """Update a blog post. Requires authenticated user and ownership."""
+async def update_post(
+    post_id: str,
+    post_update: BlogPost,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_authenticated_user),
+    blog_repo: BlogRepository = Depends(get_blog_repository),
+    http_cache: HttpCache = Depends(get_http_cache),
+    duplicate_index: DuplicateIndex = Depends(get_duplicate_index),
+    post_indexes: PostIndexes = Depends(get_post_indexes),
+    scheduler: PostScheduler = Depends(get_post_scheduler),
+    stats_cache: StatsCache = Depends(get_stats_cache),
+    render_cache: RenderCache = Depends(get_render_cache),
+    revisions: RevisionHistory = Depends(get_revisions),
+):
+    """Update a blog post. Requires authenticated user and ownership.
+
+    Like create, sets X-Near-Duplicates when the new content nearly duplicates
+    other posts, and (re)schedules posts saved with status "scheduled".
+    """
     user_id = current_user.get('uid')
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not identify user from token")
+    _check_schedule(post_update)
 
     # Check ownership
     existing_post = await blog_repo.get(post_id)
@@ -131,27 +443,305 @@ async def update_post(post_id: str, post_update: BlogPost, current_user: dict =
 
     # Ensure the author_id isn't changed via the update payload
     post_update.author_id = user_id 
-    # Update the updated_at timestamp (assuming BlogPost model handles this or repository does)
-    # post_update.updated_at = datetime.utcnow() 
+    # updated_at drives the HTTP cache validators, so it is always set server-side
+    post_update.created_at = existing_post.created_at
+    post_update.updated_at = datetime.utcnow()
 
     try:
-        logger.info(f"User {user_id} updating post {post_id}")
+        logger.debug("User %s updating post %s", user_id, post_id)
         updated_post = await blog_repo.update(post_id, post_update)
+        http_cache.invalidate(post_id)
+        stats_cache.invalidate(user_id)
         if not updated_post:
              # This case might be redundant due to the check above, but safe to keep
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found during update")
-        logger.info(f"Post {post_id} updated successfully by user {user_id}")
+        background_tasks.add_task(post_indexes.add_async, updated_post.model_copy(update={"id": post_id}))
+        scheduler.sync(updated_post.model_copy(update={"id": post_id}))
+        background_tasks.add_task(render_cache.precompute, post_update.content)
+        await _record_revision(revisions, post_update.model_copy(update={"id": post_id}),
+                               existing_post.content, user_id, "update")
+        duplicates = await asyncio.to_thread(duplicate_index.find_duplicates, post_update.content,
+                                             author_id=user_id, exclude_id=post_id)
+        if duplicates:
+            response.headers[NEAR_DUPLICATES_HEADER] = _near_duplicates_value(duplicates)
+        logger.info("Post %s updated successfully by user %s", post_id, user_id)
         return updated_post
     except Exception as e:
-        logger.error(f"Failed to update post {post_id} for user {user_id}: {str(e)}")
+        logger.error("Failed to update post %s for user %s: %s", post_id, user_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
+@router.patch("/{post_id}", response_model=BlogPost)
+async def patch_post(
+    post_id: str,
+    changes: BlogPostPatch,
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_authenticated_user),
+    blog_repo: BlogRepository = Depends(get_blog_repository),
+    http_cache: HttpCache = Depends(get_http_cache),
+    duplicate_index: DuplicateIndex = Depends(get_duplicate_index),
+    post_indexes: PostIndexes = Depends(get_post_indexes),
+    scheduler: PostScheduler = Depends(get_post_scheduler),
+    stats_cache: StatsCache = Depends(get_stats_cache),
+    render_cache: RenderCache = Depends(get_render_cache),
+    revisions: RevisionHistory = Depends(get_revisions),
+):
+    """Update only the fields present in the body. Requires authenticated user and ownership.
+
+    Only fields whose value differs from the stored post are written, with a
+    server-side updated_at, so a status toggle neither resends nor rewrites
+    the content. With `Prefer: return=minimal` the response holds just the id,
+    updated_at and the changed fields instead of the whole post.
+    """
+    user_id = current_user.get('uid')
+    if not user_id:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not identify user from token")
+
+    existing_post = await blog_repo.get(post_id)
+    if not existing_post:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+    if existing_post.author_id != user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to update this post")
+
+    fields = {name: value for name, value in changes.model_dump(exclude_unset=True).items()
+              if getattr(existing_post, name) != value}
+    patched_post = existing_post.model_copy(update={**fields, "id": post_id})
+    _check_schedule(patched_post)
+
+    headers = {}
+    if fields:
+        try:
+            logger.debug("User %s patching %s of post %s", user_id, sorted(fields), post_id)
+            updated_at = await blog_repo.patch(post_id, fields)
+        except Exception as e:
+            logger.error("Failed to patch post %s for user %s: %s", post_id, user_id, e)
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+        if updated_at is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found during update")
+        patched_post.updated_at = updated_at
+        http_cache.invalidate(post_id)
+        stats_cache.invalidate(user_id)
+        background_tasks.add_task(post_indexes.add_async, patched_post)
+        scheduler.sync(patched_post)
+        await _record_revision(revisions, patched_post, existing_post.content, user_id, "patch")
+        if "content" in fields:
+            background_tasks.add_task(render_cache.precompute, patched_post.content)
+            duplicates = await asyncio.to_thread(duplicate_index.find_duplicates, patched_post.content,
+                                                 author_id=user_id, exclude_id=post_id)
+            if duplicates:
+                headers[NEAR_DUPLICATES_HEADER] = _near_duplicates_value(duplicates)
+        logger.info("Post %s patched by user %s (%s)", post_id, user_id, ", ".join(sorted(fields)))
+
+    if _prefers_minimal(request):
+        body = {"id": post_id, "updated_at": patched_post.updated_at, **fields}
+        return JSONResponse(jsonable_encoder(body), headers={**headers, "Preference-Applied": "return=minimal"})
+    response.headers.update(headers)
+    return patched_post
+
+@router.post("/{post_id}/regenerate-section", response_model=SectionRegenerationResponse,
+             dependencies=[Depends(limit_generation)])
+async def regenerate_section(
+    post_id: str,
+    request: SectionRegenerationRequest,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_authenticated_user),
+    blog_repo: BlogRepository = Depends(get_blog_repository),
+    gemini_service: GeminiService = Depends(get_gemini_service),
+    http_cache: HttpCache = Depends(get_http_cache),
+    post_indexes: PostIndexes = Depends(get_post_indexes),
+    render_cache: RenderCache = Depends(get_render_cache),
+    revisions: RevisionHistory = Depends(get_revisions),
+    stats_cache: StatsCache = Depends(get_stats_cache),
+):
+    """Regenerate one heading-addressed section of a post and save it in place.
+
+    Gemini only sees the target section and summaries of its neighbours; the
+    rest of the article is left untouched.
+    """
+    user_id = current_user.get('uid')
+    if not user_id:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not identify user from token")
+    if not request.path or not all(part.strip() for part in request.path):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Section path must not be empty")
+
+    existing_post = await blog_repo.get(post_id)
+    if not existing_post:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+    if existing_post.author_id != user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to update this post")
+
+    content = existing_post.content
+    sections = parse_sections(content)
+    matches = find_sections(sections, request.path)
+    if not matches:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Section not found")
+    if len(matches) > 1:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Section path is ambiguous: " + ", ".join(" > ".join(s.path) for s in matches),
+        )
+    target = matches[0]
+    siblings = [s for s in sections if s.level == target.level and s.path[:-1] == target.path[:-1]]
+    position = siblings.index(target)
+    previous_summary = summarize_text(section_body(content, siblings[position - 1])) if position > 0 else ""
+    next_summary = summarize_text(section_body(content, siblings[position + 1])) if position + 1 < len(siblings) else ""
+
+    try:
+        logger.info("User %s regenerating section %s of post %s", user_id, truncate(" > ".join(target.path), 120), post_id)
+        new_body = await gemini_service.regenerate_section(
+            title=existing_post.title,
+            heading_path=list(target.path),
+            current_body=section_body(content, target),
+            previous_summary=previous_summary,
+            next_summary=next_summary,
+            instructions=request.instructions,
+            tone=request.tone,
+            target_audience=request.target_audience,
+        )
+        existing_post.id = post_id
+        existing_post.content = replace_section_body(content, target, new_body)
+        existing_post.updated_at = datetime.utcnow()
+        updated_post = await blog_repo.update(post_id, existing_post)
+        http_cache.invalidate(post_id)
+        stats_cache.invalidate(user_id)
+        if not updated_post:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found during update")
+        background_tasks.add_task(post_indexes.add_async, existing_post)
+        background_tasks.add_task(render_cache.precompute, existing_post.content)
+        await _record_revision(revisions, existing_post, content, user_id, "regenerate")
+    except HTTPException:
+        raise
+    except CircuitOpenError as e:
+        raise _gemini_unavailable(e)
+    except Exception as e:
+        logger.error("Failed to regenerate section of post %s for user %s: %s", post_id, user_id, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to regenerate section: {str(e)}"
+        )
+
+    patched = find_sections(parse_sections(existing_post.content), target.path)
+    return SectionRegenerationResponse(
+        post_id=post_id,
+        path=list(target.path),
+        content=section_body(existing_post.content, patched[0]) if patched else new_body.strip(),
+        updated_at=existing_post.updated_at,
+    )
+
+async def _owned_post(post_id: str, current_user: dict, blog_repo: BlogRepository) -> BlogPost:
+    user_id = current_user.get('uid')
+    if not user_id:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not identify user from token")
+    post = await blog_repo.get(post_id)
+    if not post:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+    if post.author_id != user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this post's revisions")
+    return post
+
+async def _revision(revisions: RevisionHistory, post_id: str, number: int) -> RevisionDetail:
+    try:
+        revision = await revisions.get(post_id, number)
+    except RevisionError as e:
+        logger.error("Failed to rebuild revision %d of post %s: %s", number, post_id, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    if revision is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Revision not found")
+    return revision
+
+@router.get("/{post_id}/revisions", response_model=List[RevisionInfo])
+async def list_revisions(
+    post_id: str,
+    response: Response,
+    limit: int = 20,
+    before: Optional[int] = None,
+    current_user: dict = Depends(get_current_authenticated_user),
+    blog_repo: BlogRepository = Depends(get_blog_repository),
+    revisions: RevisionHistory = Depends(get_revisions),
+):
+    """Saved versions of a post, newest first, without their content. Owner only.
+
+    Page with `before`, the lowest number of the previous page.
+    """
+    await _owned_post(post_id, current_user, blog_repo)
+    response.headers["Cache-Control"] = PRIVATE_NO_STORE
+    return await revisions.list(post_id, limit=max(1, min(limit, 100)), before=before)
+
+@router.get("/{post_id}/revisions/{number}", response_model=RevisionDetail)
+async def get_revision(
+    post_id: str,
+    number: int,
+    response: Response,
+    current_user: dict = Depends(get_current_authenticated_user),
+    blog_repo: BlogRepository = Depends(get_blog_repository),
+    revisions: RevisionHistory = Depends(get_revisions),
+):
+    """One saved version of a post with its full content, rebuilt from the nearest snapshot. Owner only."""
+    await _owned_post(post_id, current_user, blog_repo)
+    response.headers["Cache-Control"] = PRIVATE_NO_STORE
+    return await _revision(revisions, post_id, number)
+
+@router.post("/{post_id}/revisions/{number}/restore", response_model=BlogPost)
+async def restore_revision(
+    post_id: str,
+    number: int,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_authenticated_user),
+    blog_repo: BlogRepository = Depends(get_blog_repository),
+    http_cache: HttpCache = Depends(get_http_cache),
+    post_indexes: PostIndexes = Depends(get_post_indexes),
+    scheduler: PostScheduler = Depends(get_post_scheduler),
+    stats_cache: StatsCache = Depends(get_stats_cache),
+    render_cache: RenderCache = Depends(get_render_cache),
+    revisions: RevisionHistory = Depends(get_revisions),
+):
+    """Put a post's content and editorial fields back to a saved version. Owner only.
+
+    Status and scheduling are left as they are, so restoring an old draft of
+    a published post doesn't unpublish it. The restore is itself recorded as
+    a new revision, so it can be undone the same way.
+    """
+    existing_post = await _owned_post(post_id, current_user, blog_repo)
+    user_id = current_user['uid']
+    revision = await _revision(revisions, post_id, number)
+    restored = {name: revision.fields[name] for name in RESTORED_FIELDS if name in revision.fields}
+    restored_post = existing_post.model_copy(update={
+        **restored, "id": post_id, "content": revision.content, "updated_at": datetime.utcnow(),
+    })
+
+    try:
+        logger.debug("User %s restoring post %s to revision %d", user_id, post_id, number)
+        updated_post = await blog_repo.update(post_id, restored_post)
+    except Exception as e:
+        logger.error("Failed to restore post %s for user %s: %s", post_id, user_id, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    if not updated_post:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found during update")
+    http_cache.invalidate(post_id)
+    stats_cache.invalidate(user_id)
+    background_tasks.add_task(post_indexes.add_async, restored_post)
+    scheduler.sync(restored_post)
+    background_tasks.add_task(render_cache.precompute, restored_post.content)
+    await _record_revision(revisions, restored_post, existing_post.content, user_id, "restore", restored_from=number)
+    logger.info("Post %s restored to revision %d by user %s", post_id, number, user_id)
+    return restored_post
+
 @router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT) # Use 204 No Content
-async def delete_post(post_id: str, current_user: dict = Depends(get_current_authenticated_user)):
-    """Delete a blog post. Requires authenticated user and ownership."""
+async def delete_post(
+    post_id: str,
+    current_user: dict = Depends(get_current_authenticated_user),
+    blog_repo: BlogRepository = Depends(get_blog_repository),
+    http_cache: HttpCache = Depends(get_http_cache),
+    post_indexes: PostIndexes = Depends(get_post_indexes),
+    scheduler: PostScheduler = Depends(get_post_scheduler),
+    stats_cache: StatsCache = Depends(get_stats_cache),
+    revisions: RevisionHistory = Depends(get_revisions),
+):
+    """Delete a blog post and its revision history. Requires authenticated user and ownership."""
     user_id = current_user.get('uid')
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not identify user from token")
@@ -164,29 +754,73 @@ async def delete_post(post_id: str, current_user: dict = Depends(get_current_aut
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this post")
 
     try:
-        logger.info(f"User {user_id} deleting post {post_id}")
+        logger.debug("User %s deleting post %s", user_id, post_id)
         success = await blog_repo.delete(post_id)
+        http_cache.invalidate(post_id)
+        stats_cache.invalidate(user_id)
+        await post_indexes.remove_async(post_id)
+        scheduler.unschedule(post_id)
         if not success:
              # This case might be redundant due to the check above, but safe to keep
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found during deletion")
-        logger.info(f"Post {post_id} deleted successfully by user {user_id}")
+        try:
+            await revisions.delete_all(post_id)
+        except Exception as e:
+            logger.warning("Failed to delete revisions of post %s: %s", post_id, e)
+        logger.info("Post %s deleted successfully by user %s", post_id, user_id)
         return Response(status_code=status.HTTP_204_NO_CONTENT) # Return 204 response
     except Exception as e:
-        logger.error(f"Failed to delete post {post_id} for user {user_id}: {str(e)}")
+        logger.error("Failed to delete post %s for user %s: %s", post_id, user_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
-@router.post("/generate", response_model=BlogGenerationResponseData)
-async def generate_post(request: BlogGenerationRequest, current_user: dict = Depends(get_current_user_or_anonymous)):
-    """Generate blog post content using Gemini API. Does NOT save the post."""
+@router.post("/generate", response_model=BlogGenerationResponseData, dependencies=[Depends(limit_generation)])
+async def generate_post(
+    request: BlogGenerationRequest,
+    http_request: Request,
+    current_user: dict = Depends(get_current_user_or_anonymous),
+    gemini_service: GeminiService = Depends(get_gemini_service),
+    tag_index: TagIndex = Depends(get_tag_index),
+    duplicate_index: DuplicateIndex = Depends(get_duplicate_index),
+    idempotency_key: Optional[str] = Depends(idempotency_key_header),
+    idempotency: IdempotencyService = Depends(get_idempotency_service),
+):
+    """Generate blog post content using Gemini API. Does NOT save the post.
+
+    With `check_duplicates`, existing posts on the same topic are offered (409)
+    before any Gemini quota is spent. With an Idempotency-Key header, retries
+    attach to the in-flight generation or replay its result instead of calling
+    Gemini again.
+    """
+    if request.check_duplicates:
+        similar = await asyncio.to_thread(duplicate_index.find_similar_topics, request.topic, request.keywords,
+                                          author_id=current_user.get('uid'))
+        if similar:
+            return JSONResponse(
+                status_code=status.HTTP_409_CONFLICT,
+                content={
+                    "message": "Similar posts already exist; resend with check_duplicates=false to generate anyway",
+                    "similar_posts": jsonable_encoder(similar),
+                },
+            )
+    if idempotency_key:
+        key = scoped_key("generate", current_user.get('uid', ''), idempotency_key)
+        return await run_idempotent(
+            http_request, idempotency, key,
+            lambda: _generate_post(request, current_user, gemini_service, tag_index),
+        )
+    return await _generate_post(request, current_user, gemini_service, tag_index)
+
+async def _generate_post(request: BlogGenerationRequest, current_user: dict,
+                         gemini_service: GeminiService, tag_index: TagIndex) -> BlogGenerationResponseData:
     try:
         user_id = current_user.get('uid')
         if not user_id:
              raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not identify user from token")
 
-        logger.info(f"User {user_id} generating blog post content for topic: {request.topic}")
+        logger.info("User %s generating blog post content for topic: %s", user_id, truncate(request.topic, 120))
         
         # Generate content using the service
         content = await gemini_service.generate_blog_post(
@@ -196,24 +830,39 @@ async def generate_post(request: BlogGenerationRequest, current_user: dict = Dep
             length=request.length,
             target_audience=request.target_audience
         )
-        meta_description = await gemini_service.generate_meta_description(content)
+        meta_description = await gemini_service.generate_meta_description(content, title=request.topic)
         slug = await gemini_service.generate_slug(request.topic)
         
-        logger.info(f"Content generated successfully for user {user_id}")
+        logger.info("Content generated successfully for user %s (%d chars)", user_id, len(content))
 
+        suggested_tags = await asyncio.to_thread(tag_index.suggest, request.topic, content,
+                                                 k=settings.TAG_SUGGESTIONS, exclude=request.keywords)
         # Return the generated data without creating a BlogPost object or saving
         return BlogGenerationResponseData(
             title=request.topic, # Use the original topic as title for now
             content=content,
             slug=slug,
             meta_description=meta_description,
-            tags=request.keywords # Return keywords used for generation
+            # Requested keywords first, then the corpus-weighted suggestions
+            tags=merge_tags(request.keywords, suggested_tags),
         )
         
+    except CircuitOpenError as e:
+        logger.warning("Gemini circuit open; rejecting generation for user %s", current_user.get('uid'))
+        raise _gemini_unavailable(e)
     except Exception as e:
         user_id_for_log = current_user.get('uid', 'unknown') 
-        logger.error(f"Failed to generate blog post content for user {user_id_for_log}: {str(e)}", exc_info=True)
+        logger.error("Failed to generate blog post content for user %s: %s", user_id_for_log, e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to generate blog post content: {str(e)}"
-        ) 
\ No newline at end of file
+        ) 
+@router.post("/suggest-tags", response_model=TagSuggestionResponse)
+async def suggest_tags(
+    request: TagSuggestionRequest,
+    current_user: dict = Depends(get_current_user_or_anonymous),
+    tag_index: TagIndex = Depends(get_tag_index),
+):
+    """Suggest tags for unsaved content, weighted against the whole post archive."""
+    k = min(max(request.k or settings.TAG_SUGGESTIONS, 1), 20)
+    return TagSuggestionResponse(tags=await asyncio.to_thread(tag_index.suggest, request.title, request.content, k=k))
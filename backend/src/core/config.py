@@ -19,6 +19,140 @@ class Settings(BaseSettings):
     
     # CORS Settings
     BACKEND_CORS_ORIGINS: list = ["http://localhost:3000", "http://localhost:3001", "http://localhost:5173"]
+
+    # Production Server Settings (run.py --mode prod)
+    SERVER_WORKERS: int = 0  # 0: one per CPU
+    SERVER_KEEP_ALIVE: int = 75  # seconds; keep above the load balancer's idle timeout
+    SERVER_BACKLOG: int = 2048
+    SERVER_GRACEFUL_TIMEOUT: int = 120  # seconds in-flight requests get to finish on SIGTERM
+    SERVER_MAX_REQUESTS: int = 0  # recycle a worker after this many requests; 0 never
+    SERVER_PRELOAD: bool = True  # import the app in the master before forking workers
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1"  # proxies trusted for X-Forwarded-For (client IP for rate limits)
+
+    # Gemini Generation Settings
+    GEMINI_LONG_POST_MODE: str = "outline"  # outline (parallel sections), single
+    GEMINI_LONG_POST_SECTIONS: int = 6
+    GEMINI_LONG_POST_WORDS: int = 2000
+    GEMINI_SECTION_CONCURRENCY: int = 4
+
+    # Gemini Model Routing Settings
+    # Task -> model, fallback model and generation config. A value may also be just a model name.
+    GEMINI_MODEL_ROUTES: dict = {
+        "article": {"model": "gemini-2.0-flash", "fallback": "gemini-2.0-flash-lite",
+                    "max_output_tokens": 8192, "temperature": 0.7},
+        "outline": {"model": "gemini-2.0-flash", "fallback": "gemini-2.0-flash-lite",
+                    "max_output_tokens": 1024, "temperature": 0.4},
+        "section": {"model": "gemini-2.0-flash", "fallback": "gemini-2.0-flash-lite",
+                    "max_output_tokens": 2048, "temperature": 0.7},
+        "meta": {"model": "gemini-2.0-flash-lite", "fallback": "gemini-2.0-flash",
+                 "max_output_tokens": 96, "temperature": 0.3},
+        "slug": {"model": "gemini-2.0-flash-lite", "fallback": "gemini-2.0-flash",
+                 "max_output_tokens": 32, "temperature": 0.0},
+    }
+    # USD per million [input, output] tokens, for the cost estimate in model stats
+    GEMINI_MODEL_PRICES: dict = {
+        "gemini-2.0-flash": [0.10, 0.40],
+        "gemini-2.0-flash-lite": [0.075, 0.30],
+    }
+
+    # Gemini Resilience Settings
+    GEMINI_CALL_TIMEOUT: float = 90.0  # seconds before a call is abandoned
+    GEMINI_MAX_THREADS: int = 32  # dedicated executor for Gemini calls
+    GEMINI_BREAKER_WINDOW: int = 20  # recent calls each model's breaker looks at
+    GEMINI_BREAKER_MIN_CALLS: int = 10
+    GEMINI_BREAKER_FAILURE_RATE: float = 0.5
+    GEMINI_BREAKER_SLOW_CALL_SECONDS: float = 45.0
+    GEMINI_BREAKER_SLOW_CALL_RATE: float = 0.8
+    GEMINI_BREAKER_OPEN_SECONDS: float = 30.0  # fail fast this long before probing again
+    GEMINI_HEDGE: bool = False  # race a second attempt once a call passes its rolling p95
+    GEMINI_HEDGE_MIN_DELAY: float = 1.0
+    GEMINI_HEDGE_MAX_IN_FLIGHT: int = 4
+    GEMINI_HEDGE_WINDOW: int = 200  # latency samples per operation
+
+    # Generation Rate Limit Settings (token buckets; see services/rate_limiter.py)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory (per worker), sqlite (shared by the workers on a host)
+    RATE_LIMIT_SQLITE_PATH: str = "rate_limits.sqlite3"
+    RATE_LIMIT_SHARDS: int = 16
+    RATE_LIMIT_MAX_KEYS: int = 100000  # buckets kept in memory before the least recently used are dropped
+    # Tier -> bucket size and refill rate. Signed-in users get the tier named after their
+    # sign-in provider if there is one (e.g. "google.com"), else "authenticated".
+    RATE_LIMIT_TIERS: dict = {
+        "anonymous": {"burst": 3, "per_hour": 10},
+        "anonymous_ip": {"burst": 10, "per_hour": 30},  # all anonymous sessions from one IP
+        "authenticated": {"burst": 10, "per_hour": 60},
+    }
+
+    # Meta Description Settings
+    META_DESCRIPTION_MAX_LENGTH: int = 160
+    META_DESCRIPTION_REFINE: bool = False  # polish the extractive description with Gemini
+    META_DESCRIPTION_EXCERPT_TOKENS: int = 300  # input budget for the refinement prompt
+
+    # Tag Index Settings
+    TAG_SUGGESTIONS: int = 5
+    TAG_INDEX_PATH: str = ""  # .npz file written by the retag_posts job and loaded on first use; empty starts empty
+    TAG_INDEX_MAX_TERMS_PER_POST: int = 150
+
+    # Near-Duplicate Detection Settings (MinHash/LSH)
+    DUPLICATE_CONTENT_THRESHOLD: float = 0.7  # estimated Jaccard similarity of word 3-shingles
+    DUPLICATE_TOPIC_THRESHOLD: float = 0.5  # estimated Jaccard similarity of title + tag words
+    DUPLICATE_INDEX_PATH: str = ""  # .npz file written by the rebuild_indexes job and loaded on first use
+
+    # Related Posts Settings
+    RELATED_POSTS_K: int = 10  # neighbours precomputed per post
+    RELATED_POSTS_DIMENSIONS: int = 512  # hashed feature dimensions (memory: 2KB per post)
+    RELATED_POSTS_INDEX_PATH: str = ""  # .npz file written by the rebuild_indexes job and loaded on first use
+
+    # Scheduled Publishing Settings
+    SCHEDULER_ENABLED: bool = True  # run the publisher in this process (safe in several workers)
+    SCHEDULER_LOOKAHEAD_SECONDS: float = 300.0  # window of upcoming posts kept in memory
+    SCHEDULER_MAX_LOADED: int = 5000  # posts loaded per window refill
+    SCHEDULER_BATCH_SIZE: int = 200  # posts published per batched write
+    SCHEDULER_LEASE_SECONDS: float = 60.0
+    SCHEDULER_RETRY_SECONDS: float = 10.0
+
+    # Analytics Settings
+    ANALYTICS_BACKEND: str = "memory"  # memory, firestore
+    ANALYTICS_FLUSH_SECONDS: float = 10.0  # how often in-memory rollups are written
+    ANALYTICS_HLL_PRECISION: int = 12  # 4KB sketch per post per day, ~1.6% unique-visitor error
+    ANALYTICS_MAX_BATCH: int = 100  # events per request
+    ANALYTICS_MAX_PENDING: int = 10000  # rollups held between flushes; events for further posts are dropped
+    ANALYTICS_REPORT_MAX_POSTS: int = 100
+
+    # Dashboard Stats Settings
+    POST_STATUSES: list = ["draft", "scheduled", "published", "archived"]
+    STATS_CACHE_TTL: float = 30.0  # seconds per-user stats are served from memory
+
+    # Export Settings
+    EXPORT_BATCH_SIZE: int = 200  # posts per Firestore page while streaming an export
+
+    # Rendered HTML Settings (?format=html on the post read endpoints)
+    RENDER_CACHE_BACKEND: str = "memory"  # memory (per worker), firestore (shared, filled by the render_posts job)
+    RENDER_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # per-worker LRU of rendered posts
+
+    # Revision History Settings
+    REVISION_SNAPSHOT_EVERY: int = 20  # full snapshot at least every N revisions; bounds a rebuild to N reads
+
+    # HTTP Caching Settings (public blog read endpoints)
+    HTTP_CACHE_MAX_AGE: int = 60  # browsers
+    HTTP_CACHE_S_MAXAGE: int = 86400  # shared caches / CDN edges
+    HTTP_CACHE_STALE_WHILE_REVALIDATE: int = 3600
+    HTTP_CACHE_VALIDATOR_TTL: int = 30  # seconds a known validator answers 304s without a Firestore read
+    HTTP_CACHE_MAX_ENTRIES: int = 10000
+
+    # Idempotency Settings (Idempotency-Key header on POST endpoints)
+    IDEMPOTENCY_BACKEND: str = "memory"  # memory, sqlite, firestore
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_MAX_ENTRIES: int = 10000
+    IDEMPOTENCY_SQLITE_PATH: str = "idempotency.sqlite3"
+    IDEMPOTENCY_WAIT_TIMEOUT: float = 120.0  # how long a duplicate waits for the original, and its lease on the key
+
+    # Logging Settings
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = "google=WARNING,urllib3=WARNING,grpc=WARNING"  # per-module overrides
+    LOG_FORMAT: str = "json"  # json, text
+    LOG_MAX_FIELD_LENGTH: int = 512
+    LOG_DEBUG_SAMPLE_EVERY: int = 10  # keep 1 in N DEBUG records per logger
     
     class Config:
         case_sensitive = True
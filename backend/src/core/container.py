@@ -0,0 +1,329 @@
+import asyncio
+import contextlib
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, Optional
+
+from .config import settings
+from .firebase import create_firestore_client, initialize_firebase
+
+if TYPE_CHECKING:
+    import firebase_admin
+    from google.cloud import firestore as cloud_firestore
+    from ..api.caching import HttpCache
+    from ..repositories.blog_repository import BlogRepository
+    from ..services.analytics import AnalyticsAggregator
+    from ..services.gemini_service import GeminiService
+    from ..services.duplicate_index import DuplicateIndex
+    from ..services.idempotency_service import IdempotencyService
+    from ..services.post_indexes import PostIndexes
+    from ..services.post_scheduler import PostScheduler
+    from ..services.prompts import PromptTelemetry
+    from ..services.rate_limiter import RateLimiter
+    from ..services.related_posts import RelatedPostsIndex
+    from ..services.render_cache import RenderCache
+    from ..services.revisions import RevisionHistory
+    from ..services.stats_cache import StatsCache
+    from ..services.tag_index import TagIndex
+
+logger = logging.getLogger(__name__)
+
+
+class Container:
+    """Application-scoped holder for shared clients.
+
+    Created by the FastAPI lifespan and stored on ``app.state.container``.
+    Every client is built on first use, so starting (or importing) the app does
+    no network or credential work, and routes that never touch Gemini never pay
+    for it. Route handlers reach the clients through the ``Depends`` providers
+    in ``api/dependencies.py``.
+    """
+
+    def __init__(self):
+        # Clients are created at most once even if two first requests race for
+        # them; re-entrant because building one client reads others
+        self._lock = threading.RLock()
+        self._firebase_app: Optional["firebase_admin.App"] = None
+        self._firestore: Optional["cloud_firestore.Client"] = None
+        self._blog_repository: Optional["BlogRepository"] = None
+        self._gemini_service: Optional["GeminiService"] = None
+        self._prompt_telemetry: Optional["PromptTelemetry"] = None
+        self._http_cache: Optional["HttpCache"] = None
+        self._idempotency_service: Optional["IdempotencyService"] = None
+        self._rate_limiter: Optional["RateLimiter"] = None
+        self._tag_index: Optional["TagIndex"] = None
+        self._duplicate_index: Optional["DuplicateIndex"] = None
+        self._related_posts: Optional["RelatedPostsIndex"] = None
+        self._post_scheduler: Optional["PostScheduler"] = None
+        self._analytics: Optional["AnalyticsAggregator"] = None
+        self._stats_cache: Optional["StatsCache"] = None
+        self._render_cache: Optional["RenderCache"] = None
+        self._revisions: Optional["RevisionHistory"] = None
+        self._post_indexes: Optional["PostIndexes"] = None
+        self._post_scheduler_start: Optional[asyncio.Task] = None
+
+    @property
+    def firebase_app(self) -> "firebase_admin.App":
+        with self._lock:
+            if self._firebase_app is None:
+                self._firebase_app = initialize_firebase()
+        return self._firebase_app
+
+    @property
+    def firestore(self) -> "cloud_firestore.Client":
+        with self._lock:
+            if self._firestore is None:
+                self._firestore = create_firestore_client(self.firebase_app)
+                logger.info("Firestore client initialized")
+        return self._firestore
+
+    @property
+    def blog_repository(self) -> "BlogRepository":
+        with self._lock:
+            if self._blog_repository is None:
+                from ..repositories.blog_repository import BlogRepository
+                self._blog_repository = BlogRepository(db=self.firestore)
+        return self._blog_repository
+
+    @property
+    def gemini_service(self) -> "GeminiService":
+        with self._lock:
+            if self._gemini_service is None:
+                from ..services.gemini_service import GeminiService
+                self._gemini_service = GeminiService(telemetry=self.prompt_telemetry)
+        return self._gemini_service
+
+    @property
+    def prompt_telemetry(self) -> "PromptTelemetry":
+        """Per-template token and latency aggregates, readable before Gemini is ever called."""
+        with self._lock:
+            if self._prompt_telemetry is None:
+                from ..services.prompts import PromptTelemetry
+                self._prompt_telemetry = PromptTelemetry(latency_window=settings.GEMINI_HEDGE_WINDOW)
+        return self._prompt_telemetry
+
+    def model_stats(self) -> Dict[str, dict]:
+        """Per-model Gemini stats; empty if the service hasn't been created (it is not created for this)."""
+        return self._gemini_service.model_stats() if self._gemini_service is not None else {}
+
+    @property
+    def http_cache(self) -> "HttpCache":
+        with self._lock:
+            if self._http_cache is None:
+                from ..api.caching import HttpCache
+                self._http_cache = HttpCache()
+        return self._http_cache
+
+    @property
+    def stats_cache(self) -> "StatsCache":
+        with self._lock:
+            if self._stats_cache is None:
+                from ..services.stats_cache import StatsCache
+                self._stats_cache = StatsCache(ttl=settings.STATS_CACHE_TTL)
+        return self._stats_cache
+
+    @property
+    def render_cache(self) -> "RenderCache":
+        with self._lock:
+            if self._render_cache is None:
+                from ..services import render_cache
+                store = None
+                if settings.RENDER_CACHE_BACKEND == "firestore":
+                    store = render_cache.FirestoreRenderStore(self.firestore)
+                self._render_cache = render_cache.RenderCache(store, max_bytes=settings.RENDER_CACHE_MAX_BYTES)
+        return self._render_cache
+
+    @property
+    def revisions(self) -> "RevisionHistory":
+        with self._lock:
+            if self._revisions is None:
+                from ..services.revisions import FirestoreRevisionStore, RevisionHistory
+                self._revisions = RevisionHistory(FirestoreRevisionStore(self.firestore),
+                                                  snapshot_every=settings.REVISION_SNAPSHOT_EVERY)
+        return self._revisions
+
+    @property
+    def idempotency_service(self) -> "IdempotencyService":
+        with self._lock:
+            if self._idempotency_service is None:
+                from ..services import idempotency_service as idempotency
+                backend = settings.IDEMPOTENCY_BACKEND
+                if backend == "firestore":
+                    store = idempotency.FirestoreIdempotencyStore(self.firestore)
+                elif backend == "sqlite":
+                    store = idempotency.SQLiteIdempotencyStore(
+                        settings.IDEMPOTENCY_SQLITE_PATH, max_entries=settings.IDEMPOTENCY_MAX_ENTRIES
+                    )
+                else:
+                    store = idempotency.InMemoryIdempotencyStore(max_entries=settings.IDEMPOTENCY_MAX_ENTRIES)
+                self._idempotency_service = idempotency.IdempotencyService(
+                    store,
+                    ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+                    wait_timeout=settings.IDEMPOTENCY_WAIT_TIMEOUT,
+                )
+        return self._idempotency_service
+
+    @property
+    def rate_limiter(self) -> "RateLimiter":
+        with self._lock:
+            if self._rate_limiter is None:
+                from ..services import rate_limiter
+                if settings.RATE_LIMIT_BACKEND == "sqlite":
+                    store = rate_limiter.SQLiteRateLimitStore(settings.RATE_LIMIT_SQLITE_PATH)
+                else:
+                    store = rate_limiter.InMemoryRateLimitStore(shards=settings.RATE_LIMIT_SHARDS,
+                                                                max_keys=settings.RATE_LIMIT_MAX_KEYS)
+                self._rate_limiter = rate_limiter.RateLimiter(store, settings.RATE_LIMIT_TIERS)
+        return self._rate_limiter
+
+    @property
+    def tag_index(self) -> "TagIndex":
+        with self._lock:
+            if self._tag_index is None:
+                from ..services.tag_index import TagIndex
+                path = settings.TAG_INDEX_PATH
+                if path and os.path.exists(path):
+                    self._tag_index = TagIndex.load(path)
+                else:
+                    # Empty until posts are written or the retag job rebuilds it
+                    self._tag_index = TagIndex(max_terms_per_post=settings.TAG_INDEX_MAX_TERMS_PER_POST)
+        return self._tag_index
+
+    @property
+    def duplicate_index(self) -> "DuplicateIndex":
+        with self._lock:
+            if self._duplicate_index is None:
+                from ..services.duplicate_index import DuplicateIndex
+                params = dict(content_threshold=settings.DUPLICATE_CONTENT_THRESHOLD,
+                              topic_threshold=settings.DUPLICATE_TOPIC_THRESHOLD)
+                path = settings.DUPLICATE_INDEX_PATH
+                if path and os.path.exists(path):
+                    self._duplicate_index = DuplicateIndex.load(path, **params)
+                else:
+                    self._duplicate_index = DuplicateIndex(**params)
+        return self._duplicate_index
+
+    @property
+    def related_posts(self) -> "RelatedPostsIndex":
+        with self._lock:
+            if self._related_posts is None:
+                from ..services.related_posts import RelatedPostsIndex
+                params = dict(dimensions=settings.RELATED_POSTS_DIMENSIONS, k=settings.RELATED_POSTS_K)
+                path = settings.RELATED_POSTS_INDEX_PATH
+                if path and os.path.exists(path):
+                    self._related_posts = RelatedPostsIndex.load(path, **params)
+                else:
+                    self._related_posts = RelatedPostsIndex(**params)
+        return self._related_posts
+
+    @property
+    def post_indexes(self) -> "PostIndexes":
+        """Every index that must see post writes."""
+        with self._lock:
+            if self._post_indexes is None:
+                from ..services.post_indexes import PostIndexes
+                self._post_indexes = PostIndexes([self.tag_index, self.duplicate_index, self.related_posts])
+        return self._post_indexes
+
+    @property
+    def post_scheduler(self) -> "PostScheduler":
+        """Publisher for scheduled posts; its background task is started by the lifespan."""
+        with self._lock:
+            if self._post_scheduler is None:
+                from ..services.post_scheduler import FirestoreLeaseStore, PostScheduler
+                self._post_scheduler = PostScheduler(
+                    self.blog_repository,
+                    FirestoreLeaseStore(self.firestore),
+                    on_published=self._scheduled_posts_published,
+                    lookahead=settings.SCHEDULER_LOOKAHEAD_SECONDS,
+                    max_loaded=settings.SCHEDULER_MAX_LOADED,
+                    batch_size=settings.SCHEDULER_BATCH_SIZE,
+                    lease_ttl=settings.SCHEDULER_LEASE_SECONDS,
+                    retry_delay=settings.SCHEDULER_RETRY_SECONDS,
+                )
+        return self._post_scheduler
+
+    @property
+    def analytics(self) -> "AnalyticsAggregator":
+        """Event rollups; the lifespan starts their periodic flush."""
+        with self._lock:
+            if self._analytics is None:
+                from ..services import analytics
+                precision = settings.ANALYTICS_HLL_PRECISION
+                if settings.ANALYTICS_BACKEND == "firestore":
+                    store = analytics.FirestoreAnalyticsStore(self.firestore, precision=precision)
+                else:
+                    store = analytics.InMemoryAnalyticsStore(precision=precision)
+                self._analytics = analytics.AnalyticsAggregator(
+                    store, flush_interval=settings.ANALYTICS_FLUSH_SECONDS, precision=precision,
+                    max_pending=settings.ANALYTICS_MAX_PENDING,
+                )
+        return self._analytics
+
+    def start_post_scheduler(self) -> None:
+        """Start the publisher from a background task once its clients can be built.
+
+        Building it creates Firestore, so startup itself does no credential
+        work; a worker without credentials logs and retries instead of failing.
+        """
+        if self._post_scheduler_start is None:
+            self._post_scheduler_start = asyncio.create_task(self._start_post_scheduler(),
+                                                             name="post-scheduler-start")
+
+    async def _start_post_scheduler(self) -> None:
+        while True:
+            try:
+                scheduler = await asyncio.to_thread(lambda: self.post_scheduler)
+                break
+            except Exception as e:
+                logger.warning("Post scheduler unavailable, retrying in %.0fs: %s",
+                               settings.SCHEDULER_RETRY_SECONDS, e)
+                await asyncio.sleep(settings.SCHEDULER_RETRY_SECONDS)
+        scheduler.start()
+
+    def _scheduled_posts_published(self, posts) -> None:
+        post_indexes = self.post_indexes
+        for post in posts:
+            self.http_cache.invalidate(post.id)
+            self.stats_cache.invalidate(post.author_id)
+            post_indexes.submit(post)
+
+    async def aclose(self) -> None:
+        """Release every client that was actually created."""
+        if self._post_scheduler_start is not None:
+            self._post_scheduler_start.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._post_scheduler_start
+            self._post_scheduler_start = None
+        if self._post_scheduler is not None:
+            await self._post_scheduler.stop()
+        if self._analytics is not None:
+            # Writes the last rollups, so it runs before Firestore is closed
+            await self._analytics.stop()
+        if self._firestore is not None:
+            try:
+                self._firestore.close()
+            except Exception as e:
+                logger.warning("Failed to close Firestore client: %s", e)
+        if self._idempotency_service is not None and hasattr(self._idempotency_service.store, "close"):
+            self._idempotency_service.store.close()
+        if self._rate_limiter is not None and hasattr(self._rate_limiter.store, "close"):
+            self._rate_limiter.store.close()
+        if self._post_indexes is not None:
+            self._post_indexes.close()
+        # The index files are only read here: every worker holds its own copy,
+        # so the rebuild jobs (retag_posts, rebuild_indexes) are their one writer
+        self._firestore = None
+        self._idempotency_service = None
+        self._rate_limiter = None
+        self._render_cache = None
+        self._revisions = None
+        self._tag_index = None
+        self._duplicate_index = None
+        self._related_posts = None
+        self._post_indexes = None
+        self._post_scheduler = None
+        self._analytics = None
+        self._blog_repository = None
+        self._gemini_service = None
@@ -1,67 +1,88 @@
 import firebase_admin
-from firebase_admin import credentials, firestore
-from google.cloud import firestore as cloud_firestore
+from firebase_admin import credentials
 import os
-from pathlib import Path
+import threading
+from typing import TYPE_CHECKING, Optional
 from dotenv import load_dotenv
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+if TYPE_CHECKING:
+    from google.cloud import firestore as cloud_firestore
+
 logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
-def initialize_firebase():
-    """Initialize Firebase Admin SDK and return Firestore client."""
-    try:
-        # Check if Firebase app is already initialized
-        if not firebase_admin._apps:
-            # Get credentials from environment variables
-            project_id = os.getenv("FIREBASE_PROJECT_ID")
-            private_key = os.getenv("FIREBASE_PRIVATE_KEY")
-            client_email = os.getenv("FIREBASE_CLIENT_EMAIL")
+_db: Optional["cloud_firestore.Client"] = None
+_init_lock = threading.Lock()
+
+def initialize_firebase() -> firebase_admin.App:
+    """Initialize the Firebase Admin SDK once and return the default app.
+
+    Safe to call repeatedly; nothing happens until the first call, so importing
+    this module has no side effects.
+    """
+    # Two first callers racing past the _apps check would both call initialize_app
+    with _init_lock:
+        try:
+            # Check if Firebase app is already initialized
+            if not firebase_admin._apps:
+                # Get credentials from environment variables
+                project_id = os.getenv("FIREBASE_PROJECT_ID")
+                private_key = os.getenv("FIREBASE_PRIVATE_KEY")
+                client_email = os.getenv("FIREBASE_CLIENT_EMAIL")
 
-            if not all([project_id, private_key, client_email]):
-                missing_vars = []
-                if not project_id:
-                    missing_vars.append("FIREBASE_PROJECT_ID")
-                if not private_key:
-                    missing_vars.append("FIREBASE_PRIVATE_KEY")
-                if not client_email:
-                    missing_vars.append("FIREBASE_CLIENT_EMAIL")
-                raise Exception(f"Missing required Firebase credentials: {', '.join(missing_vars)}")
+                if not all([project_id, private_key, client_email]):
+                    missing_vars = []
+                    if not project_id:
+                        missing_vars.append("FIREBASE_PROJECT_ID")
+                    if not private_key:
+                        missing_vars.append("FIREBASE_PRIVATE_KEY")
+                    if not client_email:
+                        missing_vars.append("FIREBASE_CLIENT_EMAIL")
+                    raise Exception(f"Missing required Firebase credentials: {', '.join(missing_vars)}")
 
-            # Create credentials from environment variables
-            cred_dict = {
-                "type": "service_account",
-                "project_id": project_id,
-                "private_key": private_key.replace("\\n", "\n"),
-                "client_email": client_email,
-                "token_uri": "https://oauth2.googleapis.com/token",
-            }
+                # Create credentials from environment variables
+                cred_dict = {
+                    "type": "service_account",
+                    "project_id": project_id,
+                    "private_key": private_key.replace("\\n", "\n"),
+                    "client_email": client_email,
+                    "token_uri": "https://oauth2.googleapis.com/token",
+                }
             
-            logger.info("Initializing Firebase Admin SDK...")
-            # Initialize Firebase Admin SDK
-            cred = credentials.Certificate(cred_dict)
-            firebase_admin.initialize_app(cred)
-            logger.info("Firebase Admin SDK initialized successfully")
+                logger.info("Initializing Firebase Admin SDK...")
+                # Initialize Firebase Admin SDK
+                cred = credentials.Certificate(cred_dict)
+                firebase_admin.initialize_app(cred)
+                logger.info("Firebase Admin SDK initialized successfully")
             
-        # Return Firestore client
-        return firestore.client()
-    except Exception as e:
-        logger.error(f"Firebase initialization error: {str(e)}")
-        raise Exception(f"Failed to initialize Firebase: {str(e)}")
+            return firebase_admin.get_app()
+        except Exception as e:
+            logger.error("Firebase initialization error: %s", e)
+            raise Exception(f"Failed to initialize Firebase: {str(e)}")
+
+def create_firestore_client(app: Optional[firebase_admin.App] = None) -> "cloud_firestore.Client":
+    """Create a new Firestore client for a Firebase app.
+
+    The caller owns the client and is responsible for closing it.
+    """
+    from google.cloud import firestore as cloud_firestore
+    app = app or initialize_firebase()
+    return cloud_firestore.Client(
+        credentials=app.credential.get_credential(),
+        project=app.project_id,
+    )
 
-# Initialize Firestore client
-try:
-    db = initialize_firebase()
-    logger.info("Firestore client initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize Firestore client: {str(e)}")
-    raise
+def get_firestore_client() -> "cloud_firestore.Client":
+    """Get a process-wide Firestore client, creating it on first use.
 
-def get_firestore_client():
-    """Get the initialized Firestore client."""
-    return db 
\ No newline at end of file
+    The application itself uses the client owned by the lifespan container
+    (see core/container.py); this is for scripts and one-off jobs.
+    """
+    global _db
+    if _db is None:
+        _db = create_firestore_client()
+        logger.info("Firestore client initialized successfully")
+    return _db
@@ -0,0 +1,151 @@
+"""
+Process management for serving the API (used by run.py).
+
+Development runs a single uvicorn process with auto-reload. Production runs
+gunicorn as the process manager over uvicorn workers:
+
+- one worker per CPU by default, each with its own event loop;
+- uvloop and httptools when installed (requirements/prod.txt);
+- keep-alive longer than a load balancer's idle timeout (so the balancer,
+  not us, closes idle connections) and a deeper listen backlog;
+- the app and its heavy dependencies imported once in the master before
+  forking, so workers start fast and share those pages copy-on-write;
+- on SIGTERM, workers stop accepting connections and let in-flight requests,
+  including long generations, finish for up to the graceful timeout before
+  the app's shutdown runs (scheduler stop, analytics flush).
+
+Without gunicorn (e.g. on Windows) production falls back to uvicorn's own
+supervisor, which spawns its workers instead of forking them and so cannot
+preload.
+"""
+import importlib
+import importlib.util
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Tuple
+
+import uvicorn
+from uvicorn.importer import import_from_string
+
+from .config import settings
+from .logging_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_APP = "src.main:app"
+# Imported by the master before forking. Only imports: anything holding a
+# gRPC channel or a thread (Firestore, Gemini, Firebase Admin, the logging
+# listener) does not survive a fork, so the container still creates those
+# clients lazily in each worker and `_post_fork` restarts logging.
+PRELOAD_MODULES = ("numpy", "firebase_admin", "google.cloud.firestore", "google.generativeai")
+# Gunicorn kills a worker at its graceful timeout; uvicorn stops waiting for
+# requests this much earlier so the app's own shutdown still gets to run
+SHUTDOWN_MARGIN = 5
+
+
+def _default_workers() -> int:
+    return settings.SERVER_WORKERS or os.cpu_count() or 1
+
+
+@dataclass
+class ServerOptions:
+    app: str = DEFAULT_APP
+    factory: bool = False  # `app` names a callable that returns the app
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = field(default_factory=_default_workers)
+    keep_alive: int = field(default_factory=lambda: settings.SERVER_KEEP_ALIVE)
+    backlog: int = field(default_factory=lambda: settings.SERVER_BACKLOG)
+    graceful_timeout: int = field(default_factory=lambda: settings.SERVER_GRACEFUL_TIMEOUT)
+    max_requests: int = field(default_factory=lambda: settings.SERVER_MAX_REQUESTS)
+    preload: bool = field(default_factory=lambda: settings.SERVER_PRELOAD)
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def event_loop_and_parser() -> Tuple[str, str]:
+    """uvloop and httptools if installed, else the pure-Python defaults."""
+    return ("uvloop" if _installed("uvloop") else "asyncio",
+            "httptools" if _installed("httptools") else "h11")
+
+
+def preload(app: str = DEFAULT_APP, factory: bool = False) -> Any:
+    """Import the heavy dependencies and the application; return the app."""
+    for module in PRELOAD_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+    loaded = import_from_string(app)
+    return loaded() if factory else loaded
+
+
+def run_development(options: ServerOptions) -> None:
+    uvicorn.run(options.app, factory=options.factory, host=options.host, port=options.port, reload=True)
+
+
+def _post_fork(server, worker) -> None:
+    # The master's log listener thread was not copied into the worker
+    configure_logging(force=True)
+
+
+def _gunicorn_config(options: ServerOptions) -> Dict[str, Any]:
+    return {
+        "bind": f"{options.host}:{options.port}",
+        "workers": options.workers,
+        "worker_class": "src.core.workers.ProductionWorker",
+        "keepalive": options.keep_alive,
+        "backlog": options.backlog,
+        "graceful_timeout": options.graceful_timeout,
+        "timeout": 60,  # heartbeat; uvicorn workers notify from their event loop, not per request
+        "preload_app": options.preload,
+        "max_requests": options.max_requests,
+        "max_requests_jitter": options.max_requests // 10,
+        "forwarded_allow_ips": settings.FORWARDED_ALLOW_IPS,
+        "post_fork": _post_fork,
+    }
+
+
+def _run_gunicorn(options: ServerOptions) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    config = _gunicorn_config(options)
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for name, value in config.items():
+                self.cfg.set(name, value)
+
+        def load(self):
+            # With preload_app this runs once in the master, before the fork
+            return preload(options.app, options.factory)
+
+    Application().run()
+
+
+def run_production(options: ServerOptions) -> None:
+    configure_logging()
+    loop, http = event_loop_and_parser()
+    logger.info("Starting %d workers (loop=%s, http=%s, keep-alive=%ds, backlog=%d, graceful timeout=%ds)",
+                options.workers, loop, http, options.keep_alive, options.backlog, options.graceful_timeout)
+    if _installed("gunicorn"):
+        _run_gunicorn(options)
+        return
+    logger.warning("gunicorn is not installed; using uvicorn's supervisor (no preloading)")
+    uvicorn.run(
+        options.app,
+        factory=options.factory,
+        host=options.host,
+        port=options.port,
+        workers=options.workers,
+        loop=loop,
+        http=http,
+        timeout_keep_alive=options.keep_alive,
+        backlog=options.backlog,
+        timeout_graceful_shutdown=options.graceful_timeout,
+        limit_max_requests=options.max_requests or None,
+        forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+    )
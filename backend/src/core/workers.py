@@ -0,0 +1,24 @@
+"""
+Gunicorn worker class for production mode (see core/server.py).
+
+Kept in its own module because importing it requires gunicorn.
+"""
+from uvicorn.workers import UvicornWorker
+
+from .server import SHUTDOWN_MARGIN, event_loop_and_parser
+
+_LOOP, _HTTP = event_loop_and_parser()
+
+
+class ProductionWorker(UvicornWorker):
+    """UvicornWorker with uvloop/httptools and a bounded graceful shutdown.
+
+    Stock UvicornWorker waits for in-flight requests indefinitely, so gunicorn
+    would SIGKILL it at `graceful_timeout` before the app's shutdown ran.
+    """
+
+    CONFIG_KWARGS = {"loop": _LOOP, "http": _HTTP}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = max(1, self.cfg.graceful_timeout - SHUTDOWN_MARGIN)
@@ -0,0 +1,3 @@
+"""
+Batch jobs run from the command line against the configured Firestore project.
+"""
@@ -0,0 +1,82 @@
+"""
+Rebuild the near-duplicate and related-posts indexes from the whole archive.
+
+Workers build these indexes incrementally from the writes they see; run this
+job to seed them (or refresh them after bulk imports), then point
+DUPLICATE_INDEX_PATH and RELATED_POSTS_INDEX_PATH at the saved files. The
+related-posts rebuild compares every pair of posts, so it is meant to run
+offline.
+
+    python -m src.jobs.rebuild_indexes --duplicates duplicates.npz --related related.npz
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from typing import List, Optional
+
+from ..core.config import settings
+from ..services.duplicate_index import DuplicateIndex
+from ..services.related_posts import RelatedPostsIndex
+
+logger = logging.getLogger(__name__)
+
+
+async def rebuild_indexes(repo, duplicate_index: DuplicateIndex, related_posts: RelatedPostsIndex,
+                          batch_size: int = 500) -> int:
+    """Load every post from `repo` into both (empty) indexes; returns the number of posts.
+
+    Posts are streamed page by page and only their signatures and vectors are
+    kept, so memory grows with the number of posts, not with their content.
+    """
+    count = 0
+    async for post in repo.iter_all(batch_size=batch_size):
+        duplicate_index.add(post)
+        related_posts.stage(post)
+        count += 1
+    logger.info("Indexed %d posts for near-duplicate detection", count)
+    related_posts.finish_staging()
+    logger.info("Computed related posts for %d posts", count)
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duplicates", default=settings.DUPLICATE_INDEX_PATH or None,
+                        help="output .npz for the duplicate index (default: DUPLICATE_INDEX_PATH)")
+    parser.add_argument("--related", default=settings.RELATED_POSTS_INDEX_PATH or None,
+                        help="output .npz for the related posts index (default: RELATED_POSTS_INDEX_PATH)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args(argv)
+    if not args.duplicates and not args.related:
+        parser.error("nothing to write: pass --duplicates and/or --related")
+
+    from ..core.container import Container
+    from ..core.logging_config import configure_logging
+
+    configure_logging()
+
+    async def run() -> int:
+        container = Container()
+        try:
+            duplicate_index = DuplicateIndex(content_threshold=settings.DUPLICATE_CONTENT_THRESHOLD,
+                                             topic_threshold=settings.DUPLICATE_TOPIC_THRESHOLD)
+            related_posts = RelatedPostsIndex(dimensions=settings.RELATED_POSTS_DIMENSIONS,
+                                              k=settings.RELATED_POSTS_K)
+            count = await rebuild_indexes(container.blog_repository, duplicate_index, related_posts,
+                                          batch_size=args.batch_size)
+            if args.duplicates:
+                duplicate_index.save(args.duplicates)
+            if args.related:
+                related_posts.save(args.related)
+            return count
+        finally:
+            await container.aclose()
+
+    count = asyncio.run(run())
+    print(f"Rebuilt indexes for {count} posts")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
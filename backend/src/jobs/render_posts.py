@@ -0,0 +1,101 @@
+"""
+Render every post to HTML into the shared render cache.
+
+Run this after bumping RENDERER_VERSION (utils/rendering.py), since every
+cached entry then belongs to the old version. It can also fill the cache for
+posts written before the cache existed. Posts whose current rendering is
+already stored are skipped unless --force is given; --prune then deletes the
+entries left by earlier renderer versions.
+
+    python -m src.jobs.render_posts [--force] [--prune] [--dry-run]
+
+Needs RENDER_CACHE_BACKEND=firestore: the in-memory cache lives in each
+server process and can't be filled from here.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from ..core.config import settings
+from ..services.render_cache import RenderStore
+from ..utils.rendering import RENDERER_VERSION, content_key, render_html
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RenderResult:
+    posts: int = 0
+    rendered: int = 0
+    current: int = 0  # already stored for this renderer version
+
+
+async def render_posts(repo, store: RenderStore, force: bool = False, dry_run: bool = False,
+                       batch_size: int = 200) -> RenderResult:
+    """Render the posts in `repo` whose HTML `store` doesn't have yet, one page at a time."""
+    result = RenderResult()
+    page: Dict[str, str] = {}
+
+    async def flush() -> None:
+        stored = {} if force else await store.get_many(list(page))
+        result.current += len(stored)
+        todo = {key: content for key, content in page.items() if key not in stored}
+        if todo:
+            # One thread hop per page keeps the job's event loop free for Firestore I/O
+            rendered = await asyncio.to_thread(lambda: {key: render_html(content) for key, content in todo.items()})
+            if not dry_run:
+                await store.put_many(rendered)
+            result.rendered += len(rendered)
+        page.clear()
+
+    async for post in repo.iter_all(batch_size=batch_size):
+        result.posts += 1
+        page[content_key(post.content)] = post.content
+        if len(page) >= batch_size:
+            await flush()
+    if page:
+        await flush()
+    logger.info("%s %d of %d posts with renderer v%d (%d already current)",
+                "Would render" if dry_run else "Rendered", result.rendered, result.posts,
+                RENDERER_VERSION, result.current)
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="re-render posts whose HTML is already stored")
+    parser.add_argument("--prune", action="store_true", help="delete HTML from earlier renderer versions")
+    parser.add_argument("--dry-run", action="store_true", help="render but write nothing to Firestore")
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args(argv)
+    if settings.RENDER_CACHE_BACKEND != "firestore":
+        parser.error("RENDER_CACHE_BACKEND must be firestore")
+
+    from ..core.container import Container
+    from ..core.logging_config import configure_logging
+
+    configure_logging()
+
+    async def run() -> RenderResult:
+        container = Container()
+        try:
+            store = container.render_cache.store
+            result = await render_posts(container.blog_repository, store, force=args.force,
+                                        dry_run=args.dry_run, batch_size=args.batch_size)
+            if args.prune and not args.dry_run:
+                logger.info("Pruned %d entries from earlier renderer versions", await store.prune())
+            return result
+        finally:
+            await container.aclose()
+
+    result = asyncio.run(run())
+    print(f"{'Would render' if args.dry_run else 'Rendered'} {result.rendered} of {result.posts} posts "
+          f"({result.current} already current)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Rebuild the tag index from the whole archive and fill in missing tags.
+
+The first pass streams every post into a fresh index so document frequencies
+reflect the full corpus; the second pass writes suggestions to posts that have
+no tags (or to every post with --overwrite), updating only the `tags` field.
+
+    python -m src.jobs.retag_posts --save tag_index.npz [--overwrite] [--dry-run]
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from dataclasses import dataclass
+from typing import List, Optional
+
+from ..core.config import settings
+from ..services.tag_index import TagIndex
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetagResult:
+    indexed: int = 0
+    retagged: int = 0
+
+
+async def retag_posts(repo, index: TagIndex, k: int = 5, overwrite: bool = False,
+                      dry_run: bool = False, batch_size: int = 500) -> RetagResult:
+    """Rebuild `index` from `repo` and write tag suggestions back to untagged posts."""
+    result = RetagResult()
+    index.rebuild([])
+    async for post in repo.iter_all(batch_size=batch_size):
+        index.add(post)
+        result.indexed += 1
+    logger.info("Indexed %d posts", result.indexed)
+
+    async for post in repo.iter_all(batch_size=batch_size):
+        if post.tags and not overwrite:
+            continue
+        tags = index.suggest(post.title, post.content, k=k)
+        if not tags or tags == post.tags:
+            continue
+        if not dry_run:
+            await repo.update_fields(post.id, {"tags": tags})
+        result.retagged += 1
+        logger.debug("Tagged post %s with %s", post.id, tags)
+    logger.info("%s %d posts", "Would retag" if dry_run else "Retagged", result.retagged)
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=settings.TAG_SUGGESTIONS, help="tags per post")
+    parser.add_argument("--overwrite", action="store_true", help="replace existing tags too")
+    parser.add_argument("--dry-run", action="store_true", help="build the index but write nothing to Firestore")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--save", default=settings.TAG_INDEX_PATH or None,
+                        help="write the rebuilt index to this .npz file (default: TAG_INDEX_PATH)")
+    args = parser.parse_args(argv)
+
+    from ..core.container import Container
+    from ..core.logging_config import configure_logging
+
+    configure_logging()
+
+    async def run() -> RetagResult:
+        container = Container()
+        try:
+            index = TagIndex(max_terms_per_post=settings.TAG_INDEX_MAX_TERMS_PER_POST)
+            result = await retag_posts(container.blog_repository, index, k=args.k, overwrite=args.overwrite,
+                                       dry_run=args.dry_run, batch_size=args.batch_size)
+            if args.save:
+                index.save(args.save)
+            return result
+        finally:
+            await container.aclose()
+
+    result = asyncio.run(run())
+    print(f"Indexed {result.indexed} posts, {'would retag' if args.dry_run else 'retagged'} {result.retagged}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
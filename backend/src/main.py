@@ -1,8 +1,11 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from .core.firebase import initialize_firebase
-from .api.routes import blog, auth
+from .core.config import settings
+from .core.container import Container
+from .core.logging_config import configure_logging
+from .api.routes import admin, analytics, blog, auth
 import logging
 import os
 import json
@@ -12,51 +15,69 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Automated Blog Generator API")
-
-# Initialize Firebase
-try:
-    initialize_firebase()
-    logger.info("Firebase initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize Firebase: {str(e)}")
-    raise
-
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Allow all origins
-    allow_credentials=True,
-    allow_methods=["*"],  # Allow all methods
-    allow_headers=["*"],  # Allow all headers
-    expose_headers=["*"],  # Expose all headers
-    max_age=3600,  # Cache preflight requests for 1 hour
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own the shared clients for the lifetime of the app.
+
+    Firebase, Firestore and Gemini are created lazily by the container on first
+    use and released here on shutdown. The background tasks (scheduled-post
+    publishing and analytics flushes) are started here.
+    """
+    app.state.container = Container()
+    if settings.SCHEDULER_ENABLED:
+        app.state.container.start_post_scheduler()
+    app.state.container.analytics.start()
+    try:
+        yield
+    finally:
+        await app.state.container.aclose()
+        logger.info("Application shutdown complete")
 
 # Error handlers
-@app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     return JSONResponse(
         status_code=exc.status_code,
         content={"message": exc.detail},
+        headers=getattr(exc, "headers", None),
     )
 
-@app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
-    logger.error(f"Unhandled exception: {str(exc)}")
+    logger.error("Unhandled exception: %s", exc, exc_info=exc)
     return JSONResponse(
         status_code=500,
         content={"message": "Internal server error", "detail": str(exc)},
     )
 
-# Include routers
-app.include_router(blog.router)
-app.include_router(auth.router)
-
 # Health check endpoint
-@app.get("/health")
 async def health_check():
-    return {"status": "healthy"} 
\ No newline at end of file
+    return {"status": "healthy"}
+
+def create_app() -> FastAPI:
+    """Build the application; each call returns a new app with its own container and overrides."""
+    app = FastAPI(title="Automated Blog Generator API", lifespan=lifespan)
+
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # Allow all origins
+        allow_credentials=True,
+        allow_methods=["*"],  # Allow all methods
+        allow_headers=["*"],  # Allow all headers
+        expose_headers=["*"],  # Expose all headers
+        max_age=3600,  # Cache preflight requests for 1 hour
+    )
+    app.add_exception_handler(HTTPException, http_exception_handler)
+    app.add_exception_handler(Exception, global_exception_handler)
+
+    # Include routers
+    app.include_router(blog.router)
+    app.include_router(auth.router)
+    app.include_router(analytics.router)
+    app.include_router(admin.router)
+    app.add_api_route("/health", health_check, methods=["GET"])
+    return app
+
+app = create_app()
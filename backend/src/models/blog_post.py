@@ -1,5 +1,6 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
+from pydantic import BaseModel, field_validator
 from .base import FirestoreDocument
 
 class BlogPost(FirestoreDocument):
@@ -8,16 +9,47 @@ class BlogPost(FirestoreDocument):
     content: str
     slug: str
     author_id: str
-    status: str = "draft"  # draft, published, archived
+    status: str = "draft"  # draft, scheduled, published, archived
     tags: List[str] = []
     category: Optional[str] = None
     featured_image: Optional[str] = None
     meta_description: Optional[str] = None
     published_at: Optional[datetime] = None
+    scheduled_for: Optional[datetime] = None  # when a scheduled post is published (UTC)
     views: int = 0
-    created_at: datetime = datetime.utcnow()
-    updated_at: datetime = datetime.utcnow()
 
     class Config:
         """Pydantic config."""
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class BlogPostPatch(BaseModel):
+    """Partial update for a post: only the fields present in the request are written."""
+    title: Optional[str] = None
+    content: Optional[str] = None
+    slug: Optional[str] = None
+    status: Optional[str] = None
+    tags: Optional[List[str]] = None
+    category: Optional[str] = None
+    featured_image: Optional[str] = None
+    meta_description: Optional[str] = None
+    published_at: Optional[datetime] = None
+    scheduled_for: Optional[datetime] = None
+
+    class Config:
+        """Pydantic config."""
+        extra = "forbid"  # a misspelt field would otherwise be a silent no-op
+
+    @field_validator("title", "content", "slug", "status", "tags")
+    @classmethod
+    def _not_null(cls, value):
+        # Only runs for fields that were sent; these can be changed but not cleared
+        if value is None:
+            raise ValueError("may not be null")
+        return value
+
+class PostStats(BaseModel):
+    """Dashboard totals for one author's posts."""
+    counts: Dict[str, int]  # posts per status
+    total: int
+    total_views: int
+    last_updated: Optional[datetime] = None
@@ -0,0 +1,20 @@
+from typing import Any, Dict, Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+class RevisionInfo(BaseModel):
+    """One saved version of a post, without its content."""
+    number: int
+    kind: str  # snapshot, delta
+    source: str  # create, update, patch, regenerate, restore
+    author_id: str
+    created_at: datetime
+    title: str
+    content_length: int  # characters in the version's content
+    stored_bytes: int  # compressed snapshot or delta actually stored
+    restored_from: Optional[int] = None
+
+class RevisionDetail(RevisionInfo):
+    """A revision rebuilt in full."""
+    fields: Dict[str, Any]  # the post's editable fields at this version
+    content: str
@@ -1,21 +1,36 @@
-from typing import List, Optional
-from ..models.blog_post import BlogPost
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from ..models.blog_post import BlogPost, PostStats
 from ..core.firebase import get_firestore_client
 import logging
 
 logger = logging.getLogger(__name__)
 
 class BlogRepository:
-    def __init__(self):
-        self.db = get_firestore_client()
+    def __init__(self, db=None):
+        self.db = db if db is not None else get_firestore_client()
         self.collection = self.db.collection('blog_posts')
 
-    async def create(self, post: BlogPost) -> BlogPost:
-        logger.info(f"Creating blog post with title: {post.title}")
-        doc_ref = self.collection.document()
+    async def create(self, post: BlogPost, post_id: Optional[str] = None) -> BlogPost:
+        """Create a post; `post_id` pins the document id (used for idempotent retries).
+
+        Returns `post` itself once written. If a document with `post_id`
+        already exists (a retry whose idempotency record is gone), nothing is
+        written and the stored post is returned instead.
+        """
+        from google.api_core.exceptions import AlreadyExists
+
+        logger.debug("Creating blog post with title: %s", post.title)
+        doc_ref = self.collection.document(post_id) if post_id else self.collection.document()
         post.id = doc_ref.id
-        doc_ref.set(post.dict())  # Firestore set is synchronous
-        logger.info(f"Blog post created with ID: {post.id}")
+        try:
+            # create() fails if the document exists, so a retry never overwrites a post edited since
+            doc_ref.create(post.dict())  # Firestore create is synchronous
+        except AlreadyExists:
+            logger.info("Blog post %s already exists; returning the stored post", post.id)
+            return BlogPost(**{**doc_ref.get().to_dict(), "id": post.id})
+        logger.debug("Blog post created with ID: %s", post.id)
         return post
 
     async def get(self, post_id: str) -> Optional[BlogPost]:
@@ -26,20 +41,18 @@ class BlogRepository:
 
     async def list(self, limit: int = 10, status: Optional[str] = None, author_id: Optional[str] = None) -> List[BlogPost]:
         """List blog posts with optional filtering."""
-        logger.info(f"Listing posts with filters - author_id: {author_id}, status: {status}")
+        logger.debug("Listing posts with filters - author_id: %s, status: %s", author_id, status)
         query = self.collection.limit(limit)
         
         if author_id:
             query = query.where('author_id', '==', author_id)
-            logger.info(f"Added author_id filter: {author_id}")
             
         if status:
             query = query.where('status', '==', status)
-            logger.info(f"Added status filter: {status}")
             
         docs = query.get()
         posts = [BlogPost(**doc.to_dict()) for doc in docs]
-        logger.info(f"Found {len(posts)} posts")
+        logger.debug("Found %d posts", len(posts))
         return posts
 
     async def update(self, post_id: str, post: BlogPost) -> Optional[BlogPost]:
@@ -50,6 +63,158 @@ class BlogRepository:
         doc_ref.update(post.dict(exclude={'id'}))  # Firestore update is synchronous
         return post
 
+    async def update_fields(self, post_id: str, fields: Dict[str, Any]) -> bool:
+        """Write only `fields` to an existing post."""
+        doc_ref = self.collection.document(post_id)
+        if not doc_ref.get().exists:  # Firestore get is synchronous
+            return False
+        doc_ref.update(fields)
+        return True
+
+    async def patch(self, post_id: str, fields: Dict[str, Any]) -> Optional[datetime]:
+        """Write only `fields` and a server-side `updated_at`; return that time.
+
+        Keys are Firestore field paths, so the rest of the document (notably
+        `content`) is neither sent nor rewritten. Returns None if the post
+        doesn't exist.
+        """
+        from google.api_core.exceptions import NotFound
+        from google.cloud import firestore
+
+        try:
+            # update fails on a missing document, so no read is needed first
+            result = self.collection.document(post_id).update(
+                {**fields, 'updated_at': firestore.SERVER_TIMESTAMP})  # Firestore update is synchronous
+        except NotFound:
+            return None
+        # The server timestamp is the commit time; kept naive UTC like datetime.utcnow()
+        return result.update_time.astimezone(timezone.utc).replace(tzinfo=None)
+
+    async def iter_all(self, batch_size: int = 500) -> AsyncIterator[BlogPost]:
+        """Yield every post, reading the collection in document-id order one page at a time."""
+        async for post in self._paginate(self.collection, batch_size):
+            yield post
+
+    async def iter_by_author(self, author_id: str, batch_size: int = 200) -> AsyncIterator[BlogPost]:
+        """Yield every post by `author_id` without holding more than one document at a time."""
+        async for post in self._paginate(self.collection.where('author_id', '==', author_id), batch_size):
+            yield post
+
+    async def _paginate(self, query, batch_size: int) -> AsyncIterator[BlogPost]:
+        # Pages keep each server-side stream short and bound what is held at
+        # once to one page; each page is read on a worker thread
+        last_doc = None
+        while True:
+            page = query.order_by('__name__').limit(batch_size)
+            if last_doc is not None:
+                page = page.start_after(last_doc)
+            docs = await asyncio.to_thread(lambda: list(page.stream()))  # Firestore stream is synchronous
+            for doc in docs:
+                yield BlogPost(**doc.to_dict())
+            if len(docs) < batch_size:
+                return
+            last_doc = docs[-1]
+
+    async def stats_by_author(self, author_id: str, statuses: Sequence[str]) -> PostStats:
+        """Counts per status, total count and views, and the latest update time for one author.
+
+        Aggregation queries (billed per batch of index entries, not per
+        document) plus one single-field read of the newest post, run
+        concurrently.
+        """
+        by_author = self.collection.where('author_id', '==', author_id)
+
+        def aggregate(query) -> Dict[str, Any]:
+            [results] = query.get()  # Firestore get is synchronous
+            return {result.alias: result.value for result in results}
+
+        def newest() -> Optional[datetime]:
+            query = (by_author.order_by('updated_at', direction='DESCENDING')
+                     .select(['updated_at']).limit(1))
+            docs = list(query.stream())
+            return docs[0].get('updated_at') if docs else None
+
+        *per_status, totals, last_updated = await asyncio.gather(
+            *(asyncio.to_thread(aggregate, by_author.where('status', '==', s).count(alias='count'))
+              for s in statuses),
+            asyncio.to_thread(aggregate, by_author.count(alias='total').sum('views', alias='views')),
+            asyncio.to_thread(newest),
+        )
+        return PostStats(
+            counts={s: int(result['count']) for s, result in zip(statuses, per_status)},
+            total=int(totals['total']),
+            total_views=int(totals['views'] or 0),
+            last_updated=last_updated,
+        )
+
+    async def list_scheduled(self, until: datetime, limit: int = 1000) -> List[Tuple[str, datetime]]:
+        """(post id, scheduled_for) of the scheduled posts due at or before `until`, earliest first.
+
+        One range query over the (status, scheduled_for) composite index,
+        projected to `scheduled_for` so no post content is read.
+        """
+        query = (self.collection.where('status', '==', 'scheduled')
+                 .where('scheduled_for', '<=', until)
+                 .order_by('scheduled_for')
+                 .select(['scheduled_for'])
+                 .limit(limit))
+
+        def fetch() -> List[Tuple[str, datetime]]:
+            return [(doc.id, doc.get('scheduled_for')) for doc in query.stream()]
+
+        return await asyncio.to_thread(fetch)  # Firestore stream is synchronous
+
+    async def publish_scheduled(self, post_ids: Sequence[str], now: datetime) -> List[BlogPost]:
+        """Publish the posts among `post_ids` that are still scheduled and due by `now`.
+
+        The posts are read with one batched get and written with batched
+        updates. Each update is conditioned on the document's update time, so a
+        post rescheduled or edited since the read is left alone.
+        """
+        # Every read and write here is a blocking Firestore call; run them all off the loop
+        return await asyncio.to_thread(self._publish_scheduled, post_ids, now)
+
+    def _publish_scheduled(self, post_ids: Sequence[str], now: datetime) -> List[BlogPost]:
+        from google.api_core.exceptions import FailedPrecondition, NotFound
+
+        refs = [self.collection.document(post_id) for post_id in post_ids]
+        due = []
+        for snapshot in self.db.get_all(refs):
+            if not snapshot.exists:
+                continue
+            post = BlogPost(**snapshot.to_dict())
+            if post.status == 'scheduled' and post.scheduled_for and _as_utc(post.scheduled_for) <= now:
+                due.append((snapshot, post))
+
+        published = []
+        for start in range(0, len(due), 500):  # Firestore batch limit
+            chunk = due[start:start + 500]
+            updates = [(snapshot, post, {
+                'status': 'published',
+                'published_at': post.scheduled_for,
+                'updated_at': now,
+            }) for snapshot, post in chunk]
+            batch = self.db.batch()
+            for snapshot, _, fields in updates:
+                batch.update(snapshot.reference, fields,
+                             option=self.db.write_option(last_update_time=snapshot.update_time))
+            try:
+                batch.commit()
+                committed = updates
+            except (FailedPrecondition, NotFound):
+                # A batch is all-or-nothing: retry the posts one by one so a single
+                # concurrent edit doesn't hold back the rest
+                committed = []
+                for snapshot, post, fields in updates:
+                    try:
+                        snapshot.reference.update(
+                            fields, option=self.db.write_option(last_update_time=snapshot.update_time))
+                        committed.append((snapshot, post, fields))
+                    except (FailedPrecondition, NotFound):
+                        logger.info("Scheduled post %s changed before publishing; skipped", post.id)
+            published.extend(post.model_copy(update=fields) for _, post, fields in committed)
+        return published
+
     async def delete(self, post_id: str) -> bool:
         doc_ref = self.collection.document(post_id)
         doc = doc_ref.get()  # Firestore get is synchronous
@@ -60,11 +225,16 @@ class BlogRepository:
 
     async def list_by_author(self, author_id: str, limit: int = 10, status: Optional[str] = None) -> List[BlogPost]:
         """List blog posts by author with optional status filtering."""
-        logger.info(f"Fetching blogs for author: {author_id}, status: {status}")
+        logger.debug("Fetching blogs for author: %s, status: %s", author_id, status)
         query = self.collection.where('author_id', '==', author_id).limit(limit)
         if status:
             query = query.where('status', '==', status)
         docs = query.get()  # Firestore get is synchronous
         posts = [BlogPost(**doc.to_dict()) for doc in docs]
-        logger.info(f"Found {len(posts)} blog posts")
-        return posts 
\ No newline at end of file
+        logger.debug("Found %d blog posts", len(posts))
+        return posts
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Stored datetimes are UTC; naive ones (as written by the API) are made aware."""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
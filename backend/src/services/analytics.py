@@ -0,0 +1,348 @@
+"""
+Post analytics: event ingestion into in-memory rollups, flushed on an interval.
+
+Page-view and engagement events update a per-post, per-day `Rollup` in memory:
+view and bounce counters, a streaming mean of time on page, and a HyperLogLog
+sketch of visitor ids for unique visitors. `AnalyticsAggregator` swaps the
+pending rollups out every ANALYTICS_FLUSH_SECONDS and merges them into the
+store, so storage sees one write per post per day per flush, however many
+events arrived. Counters merge by addition and sketches by register-wise max,
+which lets every worker flush its own rollups into the same documents.
+Dashboards read only the stored rollups.
+"""
+import asyncio
+import contextlib
+import hashlib
+import logging
+import math
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VIEW = "view"
+ENGAGEMENT = "engagement"
+
+
+class HyperLogLog:
+    """Cardinality sketch with 2**precision one-byte registers (~1.04/sqrt(2**p) error)."""
+
+    def __init__(self, precision: int = 12, registers: Optional[bytes] = None):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        size = 1 << precision
+        if registers is not None and len(registers) != size:
+            raise ValueError("register count does not match precision")
+        self.registers = bytearray(registers) if registers is not None else bytearray(size)
+
+    def add(self, value: str) -> None:
+        h = int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+        bits = 64 - self.precision
+        index = h >> bits
+        rank = bits - (h & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("cannot merge sketches of different precision")
+        merged = np.maximum(np.frombuffer(self.registers, dtype=np.uint8),
+                            np.frombuffer(other.registers, dtype=np.uint8))
+        self.registers = bytearray(merged.tobytes())
+
+    def count(self) -> int:
+        registers = np.frombuffer(self.registers, dtype=np.uint8)
+        m = len(registers)
+        estimate = (0.7213 / (1 + 1.079 / m)) * m * m / float(np.sum(np.ldexp(1.0, -registers.astype(np.int32))))
+        zeros = int(np.count_nonzero(registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Small cardinalities: linear counting is more accurate
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+
+
+@dataclass
+class Rollup:
+    """Aggregates for one post on one (UTC) day."""
+    post_id: str
+    day: date
+    visitors: HyperLogLog
+    views: int = 0
+    engagements: int = 0  # events that report time on page
+    bounces: int = 0
+    mean_time_on_page: float = 0.0  # seconds, streaming mean over `engagements`
+
+    @property
+    def key(self) -> str:
+        return rollup_key(self.post_id, self.day)
+
+    @property
+    def bounce_rate(self) -> float:
+        return self.bounces / self.engagements if self.engagements else 0.0
+
+    def add_time_on_page(self, seconds: float) -> None:
+        self.engagements += 1
+        self.mean_time_on_page += (seconds - self.mean_time_on_page) / self.engagements
+
+    def merge(self, other: "Rollup") -> None:
+        total = self.engagements + other.engagements
+        if total:
+            self.mean_time_on_page += (other.mean_time_on_page - self.mean_time_on_page) * other.engagements / total
+        self.engagements = total
+        self.views += other.views
+        self.bounces += other.bounces
+        self.visitors.merge(other.visitors)
+
+    def to_dict(self) -> dict:
+        """Dashboard representation (sketch reduced to its estimate)."""
+        return {
+            "post_id": self.post_id,
+            "date": self.day.isoformat(),
+            "views": self.views,
+            "unique_visitors": self.visitors.count(),
+            "average_time_on_page": round(self.mean_time_on_page, 2),
+            "bounce_rate": round(self.bounce_rate, 4),
+        }
+
+
+def rollup_key(post_id: str, day: date) -> str:
+    return f"{post_id}_{day.strftime('%Y%m%d')}"
+
+
+def combine(rollups: Iterable[Rollup], precision: int) -> Optional[Rollup]:
+    """Totals over several rollups of one post; unique visitors are deduplicated across days."""
+    total: Optional[Rollup] = None
+    for rollup in rollups:
+        if total is None:
+            total = Rollup(rollup.post_id, rollup.day, HyperLogLog(precision))
+        total.merge(rollup)
+    return total
+
+
+class AnalyticsStore:
+    """Interface for rollup storage.
+
+    `merge` must add counters, combine means and max-merge sketches into any
+    stored rollup with the same key, so concurrent flushes from several
+    workers don't overwrite each other.
+    """
+
+    async def merge(self, rollups: Sequence[Rollup]) -> None:
+        raise NotImplementedError
+
+    async def query(self, post_ids: Sequence[str], start: date, end: date) -> List[Rollup]:
+        """Stored rollups for `post_ids` from `start` to `end` inclusive, by post then day."""
+        raise NotImplementedError
+
+
+class InMemoryAnalyticsStore(AnalyticsStore):
+    """Per-process store for development and tests."""
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self._rollups: Dict[str, Rollup] = {}
+        self._lock = threading.Lock()
+
+    async def merge(self, rollups: Sequence[Rollup]) -> None:
+        with self._lock:
+            for rollup in rollups:
+                stored = self._rollups.get(rollup.key)
+                if stored is None:
+                    stored = self._rollups[rollup.key] = Rollup(rollup.post_id, rollup.day,
+                                                                HyperLogLog(self.precision))
+                stored.merge(rollup)
+
+    async def query(self, post_ids: Sequence[str], start: date, end: date) -> List[Rollup]:
+        wanted = set(post_ids)
+        with self._lock:
+            found = [r for r in self._rollups.values() if r.post_id in wanted and start <= r.day <= end]
+        return sorted(found, key=lambda r: (r.post_id, r.day))
+
+
+class FirestoreAnalyticsStore(AnalyticsStore):
+    """Rollups in a `post_analytics` collection, one document per post per day.
+
+    Documents follow the `Analytics` schema (`postId`, `date`, `views`,
+    `uniqueVisitors`, `averageTimeOnPage`, `bounceRate`) and also keep the raw
+    aggregates (`engagements`, `bounces`, `visitorSketch`) needed to merge
+    later flushes. Each flush merges up to 100 rollups in one transaction.
+    """
+
+    CHUNK = 100
+
+    def __init__(self, db, collection: str = "post_analytics", precision: int = 12):
+        self.db = db
+        self.collection = db.collection(collection)
+        self.precision = precision
+
+    def _to_rollup(self, data: dict) -> Rollup:
+        sketch = data.get("visitorSketch")
+        rollup = Rollup(data["postId"], date.fromisoformat(data["day"]), HyperLogLog(self.precision, sketch))
+        rollup.views = data.get("views", 0)
+        rollup.engagements = data.get("engagements", 0)
+        rollup.bounces = data.get("bounces", 0)
+        rollup.mean_time_on_page = data.get("averageTimeOnPage", 0.0)
+        return rollup
+
+    def _to_document(self, rollup: Rollup) -> dict:
+        return {
+            "postId": rollup.post_id,
+            "day": rollup.day.isoformat(),
+            "date": datetime(rollup.day.year, rollup.day.month, rollup.day.day),
+            "views": rollup.views,
+            "uniqueVisitors": rollup.visitors.count(),
+            "averageTimeOnPage": rollup.mean_time_on_page,
+            "bounceRate": rollup.bounce_rate,
+            "engagements": rollup.engagements,
+            "bounces": rollup.bounces,
+            "visitorSketch": rollup.visitors.to_bytes(),
+            "updatedAt": datetime.utcnow(),
+        }
+
+    def _merge_chunk(self, rollups: Sequence[Rollup]) -> None:
+        from google.cloud import firestore
+
+        refs = [self.collection.document(rollup.key) for rollup in rollups]
+
+        @firestore.transactional
+        def merge(transaction) -> None:
+            stored = {snapshot.id: snapshot for snapshot in self.db.get_all(refs, transaction=transaction)}
+            for ref, rollup in zip(refs, rollups):
+                snapshot = stored.get(ref.id)
+                if snapshot is not None and snapshot.exists:
+                    merged = self._to_rollup(snapshot.to_dict())
+                    merged.merge(rollup)
+                else:
+                    merged = rollup
+                transaction.set(ref, self._to_document(merged))
+
+        merge(self.db.transaction())
+
+    async def merge(self, rollups: Sequence[Rollup]) -> None:
+        def merge_all() -> None:
+            for start in range(0, len(rollups), self.CHUNK):
+                self._merge_chunk(rollups[start:start + self.CHUNK])
+
+        await asyncio.to_thread(merge_all)
+
+    async def query(self, post_ids: Sequence[str], start: date, end: date) -> List[Rollup]:
+        def query_all() -> List[Rollup]:
+            found: List[Rollup] = []
+            ids = list(dict.fromkeys(post_ids))
+            for offset in range(0, len(ids), 30):  # Firestore "in" filters take up to 30 values
+                query = (self.collection.where("postId", "in", ids[offset:offset + 30])
+                         .where("day", ">=", start.isoformat())
+                         .where("day", "<=", end.isoformat()))
+                found.extend(self._to_rollup(doc.to_dict()) for doc in query.stream())
+            return sorted(found, key=lambda r: (r.post_id, r.day))
+
+        return await asyncio.to_thread(query_all)
+
+
+class AnalyticsAggregator:
+    """Folds events into pending rollups and flushes them to the store on an interval.
+
+    Events are public and their post ids are not checked, so at most
+    `max_pending` rollups (one sketch each) are held between flushes; events
+    that would start another one are dropped and counted until the next flush.
+    """
+
+    def __init__(self, store: AnalyticsStore, flush_interval: float = 10.0, precision: int = 12,
+                 max_pending: int = 10000):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.precision = precision
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._pending: Dict[Tuple[str, date], Rollup] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        """Rollups waiting for the next flush."""
+        return len(self._pending)
+
+    def record(self, post_id: str, event_type: str, visitor_id: str, time_on_page: Optional[float] = None,
+               bounced: Optional[bool] = None, day: Optional[date] = None) -> bool:
+        """Fold one event into the pending rollup for its post and day.
+
+        Returns False, recording nothing, when the event needs a new rollup
+        and `max_pending` are already waiting for the flush.
+        """
+        day = day or datetime.utcnow().date()
+        with self._lock:
+            rollup = self._pending.get((post_id, day))
+            if rollup is None:
+                if len(self._pending) >= self.max_pending:
+                    self.dropped += 1
+                    return False
+                rollup = self._pending[(post_id, day)] = Rollup(post_id, day, HyperLogLog(self.precision))
+            if event_type == VIEW:
+                rollup.views += 1
+                rollup.visitors.add(visitor_id)
+            elif event_type == ENGAGEMENT:
+                if time_on_page is not None:
+                    rollup.add_time_on_page(time_on_page)
+                if bounced:
+                    rollup.bounces += 1
+        return True
+
+    async def flush(self) -> int:
+        """Merge the pending rollups into the store; returns how many were written."""
+        async with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                dropped, self.dropped = self.dropped, 0
+            if dropped:
+                logger.warning("Dropped %d analytics events: %d rollups were already pending",
+                               dropped, self.max_pending)
+            if not batch:
+                return 0
+            try:
+                await self.store.merge(list(batch.values()))
+            except Exception:
+                # Put the aggregates back so the next flush retries them
+                with self._lock:
+                    for key, rollup in batch.items():
+                        current = self._pending.get(key)
+                        if current is not None:
+                            rollup.merge(current)
+                        self._pending[key] = rollup
+                raise
+            logger.debug("Flushed %d analytics rollups", len(batch))
+            return len(batch)
+
+    def start(self) -> None:
+        """Start the periodic flush on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="analytics-flush")
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and write whatever is pending."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning("Final analytics flush failed; %d rollups lost: %s", self.pending, e)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning("Analytics flush failed, %d rollups kept for retry: %s", self.pending, e)
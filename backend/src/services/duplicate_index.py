@@ -0,0 +1,310 @@
+"""
+Near-duplicate detection with MinHash signatures and LSH banding.
+
+Each post gets two signatures: one over word 3-shingles of its content (to warn
+when a saved post repeats an existing one) and one over the words of its title
+and tags (to spot a topic that was already written about before spending a
+Gemini call on it). Signatures live in a compact uint32 NumPy matrix; LSH band
+keys live in one sorted uint64 array searched with `np.searchsorted`, plus a
+small dict of recent inserts that is merged in batches. Removed posts are
+tombstoned and the arrays are compacted once enough of them pile up.
+"""
+import logging
+import os
+import re
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..models.blog_post import BlogPost
+from ..utils.summarizer import STOPWORDS, TOKEN_RE
+
+logger = logging.getLogger(__name__)
+
+FENCE_RE = re.compile(r"^(```|~~~).*?^\1", re.MULTILINE | re.DOTALL)
+MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+BAND_BITS = 58
+# Odd 64-bit multipliers used to fold a band's rows into one key
+_FOLD = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93,
+                  0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53, 0x94D049BB133111EB, 0xBF58476D1CE4E5B9],
+                 dtype=np.uint64)
+
+
+def token_hashes(text: str, drop_stopwords: bool = False) -> np.ndarray:
+    tokens = TOKEN_RE.findall(FENCE_RE.sub(" ", text).lower())
+    if drop_stopwords:
+        tokens = [t for t in tokens if t not in STOPWORDS]
+    return np.fromiter((zlib.crc32(t.encode()) for t in tokens), dtype=np.uint64, count=len(tokens))
+
+
+def shingle_hashes(text: str, size: int = 3, drop_stopwords: bool = False) -> np.ndarray:
+    """Distinct hashes of the word `size`-grams of `text`."""
+    hashes = token_hashes(text, drop_stopwords)
+    if len(hashes) == 0:
+        return hashes
+    if size > 1 and len(hashes) >= size:
+        windows = np.lib.stride_tricks.sliding_window_view(hashes, size)
+        with np.errstate(over="ignore"):
+            hashes = (windows * _FOLD[:size]).sum(axis=1)
+    return np.unique(hashes % MERSENNE_PRIME)
+
+
+class MinHasher:
+    """`num_perm` universal hash functions (a*x + b) mod (2^31 - 1)."""
+
+    def __init__(self, num_perm: int, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.integers(0, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)[:, None]
+
+    def signature(self, shingles: np.ndarray) -> Optional[np.ndarray]:
+        if len(shingles) == 0:
+            return None
+        return ((self._a * shingles[None, :] + self._b) % MERSENNE_PRIME).min(axis=1).astype(np.uint32)
+
+
+class LSHIndex:
+    """MinHash signatures keyed by id, with banded candidate lookup."""
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, merge_every: int = 1024):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.merge_every = merge_every
+        self._signatures = np.zeros((64, num_perm), dtype=np.uint32)
+        self._alive = np.zeros(64, dtype=bool)
+        self._ids: List[Optional[str]] = []
+        self._slots: Dict[str, int] = {}
+        self._band_keys = np.zeros(0, dtype=np.uint64)
+        self._band_slots = np.zeros(0, dtype=np.int32)
+        self._pending: Dict[int, List[int]] = {}
+        self._pending_count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._slots
+
+    def band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """One key per band (per row, for a 2-D array of signatures), tagged with the band number."""
+        bands = signatures.astype(np.uint64).reshape(*signatures.shape[:-1], self.bands, self.rows)
+        with np.errstate(over="ignore"):
+            folded = (bands * _FOLD[np.arange(self.rows) % len(_FOLD)]).sum(axis=-1)
+        mask = np.uint64((1 << BAND_BITS) - 1)
+        return (folded & mask) | (np.arange(self.bands, dtype=np.uint64) << np.uint64(BAND_BITS))
+
+    def add(self, key: str, signature: np.ndarray) -> None:
+        with self._lock:
+            self._remove(key)
+            slot = len(self._ids)
+            if slot >= len(self._signatures):
+                self._signatures = np.concatenate([self._signatures, np.zeros_like(self._signatures)])
+                self._alive = np.concatenate([self._alive, np.zeros_like(self._alive)])
+            self._signatures[slot] = signature
+            self._alive[slot] = True
+            self._ids.append(key)
+            self._slots[key] = slot
+            for band_key in self.band_keys(signature).tolist():
+                self._pending.setdefault(band_key, []).append(slot)
+            self._pending_count += 1
+            if self._pending_count >= self.merge_every:
+                self._merge()
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return
+        self._alive[slot] = False
+        self._ids[slot] = None
+        dead = len(self._ids) - len(self._slots)
+        if dead > 256 and dead > len(self._ids) // 4:
+            self._compact()
+
+    def _merge(self) -> None:
+        """Fold pending inserts into the sorted band arrays."""
+        if not self._pending:
+            return
+        keys = np.fromiter((k for k, slots in self._pending.items() for _ in slots), dtype=np.uint64)
+        slots = np.fromiter((s for slots in self._pending.values() for s in slots), dtype=np.int32)
+        keys = np.concatenate([self._band_keys, keys])
+        slots = np.concatenate([self._band_slots, slots])
+        order = np.argsort(keys, kind="stable")
+        self._band_keys, self._band_slots = keys[order], slots[order]
+        self._pending.clear()
+        self._pending_count = 0
+
+    def _compact(self) -> None:
+        """Drop tombstoned slots and rebuild the band arrays."""
+        live = np.flatnonzero(self._alive[:len(self._ids)])
+        signatures = self._signatures[live]
+        ids = [self._ids[slot] for slot in live.tolist()]
+        self._load(ids, signatures)
+
+    def _load(self, ids: List[str], signatures: np.ndarray) -> None:
+        n = len(ids)
+        capacity = max(64, 1 << int(np.ceil(np.log2(n + 1))))
+        self._signatures = np.zeros((capacity, self.num_perm), dtype=np.uint32)
+        self._signatures[:n] = signatures
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._alive[:n] = True
+        self._ids = list(ids)
+        self._slots = {key: slot for slot, key in enumerate(ids)}
+        if n:
+            keys = self.band_keys(signatures[:n]).ravel()
+            slots = np.repeat(np.arange(n, dtype=np.int32), self.bands)
+            order = np.argsort(keys, kind="stable")
+            self._band_keys, self._band_slots = keys[order], slots[order]
+        else:
+            self._band_keys = np.zeros(0, dtype=np.uint64)
+            self._band_slots = np.zeros(0, dtype=np.int32)
+        self._pending.clear()
+        self._pending_count = 0
+
+    def query(self, signature: np.ndarray, threshold: float) -> List[Tuple[str, float]]:
+        """Ids whose estimated Jaccard similarity to `signature` is at least `threshold`, best first."""
+        band_keys = self.band_keys(signature)
+        with self._lock:
+            lo = np.searchsorted(self._band_keys, band_keys, side="left")
+            hi = np.searchsorted(self._band_keys, band_keys, side="right")
+            found = [self._band_slots[l:h] for l, h in zip(lo.tolist(), hi.tolist()) if h > l]
+            for band_key in band_keys.tolist():
+                if band_key in self._pending:
+                    found.append(np.array(self._pending[band_key], dtype=np.int32))
+            if not found:
+                return []
+            candidates = np.unique(np.concatenate(found))
+            candidates = candidates[self._alive[candidates]]
+            similarity = (self._signatures[candidates] == signature).mean(axis=1)
+            keep = similarity >= threshold
+            candidates, similarity = candidates[keep], similarity[keep]
+            order = np.argsort(-similarity, kind="stable")
+            return [(self._ids[slot], float(similarity[i])) for i, slot in
+                    zip(order.tolist(), candidates[order].tolist())]
+
+    def export(self) -> Tuple[List[str], np.ndarray]:
+        with self._lock:
+            live = np.flatnonzero(self._alive[:len(self._ids)])
+            return [self._ids[slot] for slot in live.tolist()], self._signatures[live].copy()
+
+
+@dataclass
+class SimilarPost:
+    post_id: str
+    title: str
+    similarity: float
+
+
+class DuplicateIndex:
+    """Content and topic near-duplicate lookups over the post archive.
+
+    Matches are limited to posts the caller may see: their own, or published ones.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, topic_num_perm: int = 64, topic_bands: int = 32,
+                 content_threshold: float = 0.7, topic_threshold: float = 0.5):
+        self.content_threshold = content_threshold
+        self.topic_threshold = topic_threshold
+        self._content_hasher = MinHasher(num_perm, seed=1)
+        self._topic_hasher = MinHasher(topic_num_perm, seed=2)
+        self._content = LSHIndex(num_perm, bands)
+        self._topics = LSHIndex(topic_num_perm, topic_bands)
+        # post_id -> (title, author_id, status)
+        self._meta: Dict[str, Tuple[str, str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._meta)
+
+    def content_signature(self, content: str) -> Optional[np.ndarray]:
+        return self._content_hasher.signature(shingle_hashes(content, size=3))
+
+    def topic_signature(self, topic: str, keywords: Sequence[str] = ()) -> Optional[np.ndarray]:
+        text = " ".join([topic, *keywords])
+        return self._topic_hasher.signature(shingle_hashes(text, size=1, drop_stopwords=True))
+
+    def add(self, post: BlogPost) -> None:
+        """Index `post`, replacing any previous version of it."""
+        self.remove(post.id)
+        content_signature = self.content_signature(post.content)
+        topic_signature = self.topic_signature(post.title, post.tags)
+        if content_signature is not None:
+            self._content.add(post.id, content_signature)
+        if topic_signature is not None:
+            self._topics.add(post.id, topic_signature)
+        self._meta[post.id] = (post.title, post.author_id, post.status)
+
+    def remove(self, post_id: str) -> None:
+        if self._meta.pop(post_id, None) is not None:
+            self._content.remove(post_id)
+            self._topics.remove(post_id)
+
+    def _visible(self, matches: List[Tuple[str, float]], author_id: Optional[str],
+                 exclude_id: Optional[str], limit: int) -> List[SimilarPost]:
+        results = []
+        for post_id, similarity in matches:
+            meta = self._meta.get(post_id)
+            if meta is None or post_id == exclude_id:
+                continue
+            title, owner, status = meta
+            if owner != author_id and status != "published":
+                continue
+            results.append(SimilarPost(post_id=post_id, title=title, similarity=round(similarity, 3)))
+            if len(results) >= limit:
+                break
+        return results
+
+    def find_duplicates(self, content: str, author_id: Optional[str] = None, exclude_id: Optional[str] = None,
+                        limit: int = 5) -> List[SimilarPost]:
+        """Posts whose content is a near-duplicate of `content`."""
+        signature = self.content_signature(content)
+        if signature is None:
+            return []
+        return self._visible(self._content.query(signature, self.content_threshold), author_id, exclude_id, limit)
+
+    def find_similar_topics(self, topic: str, keywords: Sequence[str] = (), author_id: Optional[str] = None,
+                            limit: int = 5) -> List[SimilarPost]:
+        """Posts whose title and tags closely match a requested topic and keywords."""
+        signature = self.topic_signature(topic, keywords)
+        if signature is None:
+            return []
+        return self._visible(self._topics.query(signature, self.topic_threshold), author_id, None, limit)
+
+    def save(self, path: str) -> None:
+        """Write signatures and post metadata to `path` (a .npz file) atomically."""
+        content_ids, content_signatures = self._content.export()
+        topic_ids, topic_signatures = self._topics.export()
+        post_ids = list(self._meta)
+        meta = np.array([self._meta[post_id] for post_id in post_ids], dtype=str).reshape(-1, 3)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f, post_ids=np.array(post_ids, dtype=str), meta=meta,
+                content_ids=np.array(content_ids, dtype=str), content_signatures=content_signatures,
+                topic_ids=np.array(topic_ids, dtype=str), topic_signatures=topic_signatures,
+            )
+        os.replace(tmp_path, path)
+        logger.info("Saved duplicate index with %d posts to %s", len(post_ids), path)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "DuplicateIndex":
+        """Read a file written by `save`; `kwargs` must match the parameters it was built with."""
+        index = cls(**kwargs)
+        with np.load(path) as data:
+            content_signatures = data["content_signatures"].reshape(-1, index._content.num_perm)
+            topic_signatures = data["topic_signatures"].reshape(-1, index._topics.num_perm)
+            index._meta = {post_id: tuple(row) for post_id, row in zip(data["post_ids"].tolist(), data["meta"].tolist())}
+            index._content._load(data["content_ids"].tolist(), content_signatures)
+            index._topics._load(data["topic_ids"].tolist(), topic_signatures)
+        logger.info("Loaded duplicate index with %d posts from %s", len(index), path)
+        return index
@@ -1,14 +1,19 @@
 import os
-import google.generativeai as genai
-from typing import List, Optional
+import json
+from typing import Any, Dict, List, Optional
 from dotenv import load_dotenv
 import asyncio
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 from google.api_core import retry
+from ..core.config import settings
+from .model_router import ModelRoute, ModelRouter
+from .prompts import ARTICLE, META_DESCRIPTION, OUTLINE, SECTION, SECTION_REWRITE, SLUG, PromptTelemetry, RenderedPrompt
+from .resilience import CLOSED, CircuitBreaker, CircuitOpenError, Hedger, LatencyTracker
+from ..utils.markdown import stitch_article
+from ..utils.summarizer import budgeted_excerpt, clamp_text, extractive_description
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 load_dotenv()
@@ -26,11 +31,85 @@ custom_retry = retry.Retry(
     deadline=300.0,
 )
 
+def _model_breaker(model: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name=model,
+        window=settings.GEMINI_BREAKER_WINDOW,
+        min_calls=settings.GEMINI_BREAKER_MIN_CALLS,
+        failure_rate=settings.GEMINI_BREAKER_FAILURE_RATE,
+        slow_call_seconds=settings.GEMINI_BREAKER_SLOW_CALL_SECONDS,
+        slow_call_rate=settings.GEMINI_BREAKER_SLOW_CALL_RATE,
+        open_seconds=settings.GEMINI_BREAKER_OPEN_SECONDS,
+    )
+
+def _token_count(usage, name: str) -> int:
+    value = getattr(usage, name, 0)
+    return value if isinstance(value, int) else 0
+
+def _keywords(keywords: Optional[List[str]]) -> str:
+    return ', '.join(keywords) if keywords else 'None specified'
+
+class OutlineError(ValueError):
+    """Raised when the model's outline can't be parsed into sections."""
+
+def parse_outline(text: str, max_sections: int) -> Dict[str, Any]:
+    """Parse the JSON outline returned by the model.
+
+    Tolerates markdown code fences around the JSON. Returns
+    {"title": str, "sections": [{"heading": str, "key_points": [str]}]}.
+    """
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned.split("\n", 1)[1] if "\n" in cleaned else ""
+        cleaned = cleaned.rsplit("```", 1)[0]
+    try:
+        data = json.loads(cleaned)
+    except json.JSONDecodeError as e:
+        raise OutlineError(f"Outline is not valid JSON: {e}")
+
+    if not isinstance(data, dict):
+        raise OutlineError(f"Outline is a JSON {type(data).__name__}, not an object")
+    raw_sections = data.get("sections") or []
+    if not isinstance(raw_sections, list):
+        raise OutlineError("Outline sections are not a list")
+    sections = []
+    for section in raw_sections:
+        if not isinstance(section, dict):
+            raise OutlineError("Outline section is not an object")
+        points = section.get("key_points") or []
+        if not isinstance(points, list):
+            # A string would otherwise be split into characters
+            raise OutlineError("Outline key_points are not a list")
+        heading = str(section.get("heading", "")).strip()
+        if heading:
+            sections.append({"heading": heading, "key_points": [str(p) for p in points if p]})
+    if not sections:
+        raise OutlineError("Outline has no sections")
+    return {"title": str(data.get("title") or "").strip(), "sections": sections[:max_sections]}
+
 class GeminiService:
-    """Service for interacting with Google's Gemini API."""
+    """Service for interacting with Google's Gemini API.
+
+    Each call is routed by task to a model and generation config (see
+    services/model_router.py) and runs on a dedicated, bounded thread pool
+    with a timeout, behind a per-model circuit breaker that fails fast while
+    that model is erroring or slow; the route's fallback model is tried next.
+    With GEMINI_HEDGE enabled, a call still running after its operation's
+    rolling p95 latency is raced against a second attempt.
+
+    Prompts come from the template registry in services/prompts.py; token
+    usage, latency and errors are aggregated per template in `telemetry`.
+    """
     
-    def __init__(self):
+    def __init__(self, telemetry: Optional[PromptTelemetry] = None):
         """Initialize Gemini API with API key."""
+        self.telemetry = telemetry or PromptTelemetry(latency_window=settings.GEMINI_HEDGE_WINDOW)
+        self.hedger = Hedger(max_in_flight=settings.GEMINI_HEDGE_MAX_IN_FLIGHT)
+        self.latency: Dict[str, LatencyTracker] = {}
+        # Timed-out or losing attempts keep their thread until the SDK returns;
+        # a separate pool keeps them from starving the default executor
+        self._executor = ThreadPoolExecutor(max_workers=settings.GEMINI_MAX_THREADS,
+                                            thread_name_prefix="gemini")
         try:
             api_key = os.getenv("GEMINI_API_KEY")
             if not api_key:
@@ -40,14 +119,24 @@ class GeminiService:
             api_key = api_key.strip().strip('"').strip("'")
             
             logger.info("Initializing Gemini API...")
+            # Imported here: the SDK is slow to import and only needed once a
+            # service is actually created (see core/container.py).
+            import google.generativeai as genai
             genai.configure(api_key=api_key)
             
             # List available models
             models = genai.list_models()
-            logger.info(f"Available models: {[m.name for m in models]}")
+            logger.debug("Available models: %s", [m.name for m in models])
             
-            # Use gemini-2.0-flash model
-            self.model = genai.GenerativeModel('gemini-2.0-flash')
+            self.router = ModelRouter(
+                settings.GEMINI_MODEL_ROUTES,
+                factory=lambda name, config: genai.GenerativeModel(name, generation_config=config or None),
+                prices=settings.GEMINI_MODEL_PRICES,
+                breaker_factory=_model_breaker,
+                latency_window=settings.GEMINI_HEDGE_WINDOW,
+            )
+            article = self.router.route("article")
+            self.model = self.router.client(article, article.model)
             
             # Test the API connection with a simple prompt
             test_prompt = "Hello, this is a test."
@@ -63,7 +152,7 @@ class GeminiService:
             
             logger.info("Gemini API initialized successfully")
         except Exception as e:
-            logger.error(f"Failed to initialize Gemini API: {str(e)}")
+            logger.error("Failed to initialize Gemini API: %s", e)
             raise
     
     @retry.Retry(predicate=is_rate_limit_error, initial=1.0, maximum=60.0, multiplier=2.0, deadline=300.0)
@@ -73,111 +162,263 @@ class GeminiService:
                                tone: str = "professional",
                                length: str = "medium",
                                target_audience: str = "general") -> str:
-        """Generate a blog post using Gemini API."""
+        """Generate a blog post using Gemini API.
+
+        Long posts are generated outline-first with the sections written in
+        parallel (see generate_sectioned_blog_post) unless GEMINI_LONG_POST_MODE
+        is "single". If the outline can't be used, falls back to one completion.
+        """
+        if length == "long" and settings.GEMINI_LONG_POST_MODE == "outline":
+            try:
+                return await self.generate_sectioned_blog_post(
+                    topic=topic,
+                    keywords=keywords,
+                    tone=tone,
+                    target_audience=target_audience
+                )
+            except OutlineError as e:
+                logger.warning("Falling back to single-pass generation: %s", e)
         try:
-            logger.info(f"Generating blog post with topic: {topic}")
-            prompt = f"""
-            Write a {length} blog post about {topic} for a {target_audience} audience.
-            Tone: {tone}
-            Keywords to include: {', '.join(keywords) if keywords else 'None specified'}
-            
-            The blog post should be well-structured with:
-            1. An engaging introduction
-            2. Clear main points
-            3. Supporting evidence or examples
-            4. A strong conclusion
-            
-            Format the content in markdown.
-            """
-            
-            logger.info("Sending request to Gemini API...")
-            # Run the synchronous generate_content in a thread pool
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                self.model.generate_content,
-                prompt
-            )
-            
-            if not response.text:
-                raise ValueError("Empty response from Gemini API")
-                
-            logger.info("Received response from Gemini API")
-            return response.text
+            logger.info("Generating blog post with topic: %s", topic)
+            prompt = ARTICLE.render(length=length, topic=topic, target_audience=target_audience, tone=tone,
+                                    keywords=_keywords(keywords))
+            logger.debug("Sending request to Gemini API...")
+            text = await self._generate_text(prompt, operation=f"article:{length}")
+            logger.debug("Received response from Gemini API")
+            return text
+        except CircuitOpenError:
+            raise
         except Exception as e:
             if "quota" in str(e).lower():
                 logger.warning("API quota exceeded. Please check your billing status.")
                 raise
-            logger.error(f"Failed to generate blog post: {str(e)}")
+            logger.error("Failed to generate blog post: %s", e)
             raise Exception(f"Failed to generate blog post: {str(e)}")
     
-    @retry.Retry(predicate=is_rate_limit_error, initial=1.0, maximum=60.0, multiplier=2.0, deadline=300.0)
-    async def generate_meta_description(self, content: str) -> str:
-        """Generate a meta description for a blog post."""
+    async def _generate_text(self, prompt: RenderedPrompt, operation: Optional[str] = None) -> str:
+        """Run one generation for the prompt's task and return its text.
+
+        Tries the route's primary model, then its fallback. A model whose
+        breaker is open is skipped without being called; CircuitOpenError is
+        raised only when every model of the route is open. `operation`
+        (default: the task) groups calls of similar size for the hedging delay.
+        """
+        started = time.perf_counter()
         try:
-            logger.info("Generating meta description...")
-            prompt = f"""
-            Generate a compelling meta description (max 160 characters) for this blog post:
-            
-            {content}
-            """
-            
-            logger.info("Sending request to Gemini API for meta description...")
-            # Run the synchronous generate_content in a thread pool
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                self.model.generate_content,
-                prompt
-            )
-            
+            text = await self._call_route(prompt, operation)
+        except Exception:
+            self.telemetry.record_call(prompt.template, time.perf_counter() - started, succeeded=False)
+            raise
+        self.telemetry.record_call(prompt.template, time.perf_counter() - started)
+        return text
+
+    async def _call_route(self, prompt: RenderedPrompt, operation: Optional[str]) -> str:
+        task = prompt.task
+        route = self.router.route(task)
+        error: Optional[Exception] = None
+        for model in route.models:
+            breaker = self.router.breaker(model)
+            tracker = self.latency.setdefault(f"{operation or task}:{model}",
+                                              LatencyTracker(window=settings.GEMINI_HEDGE_WINDOW))
+            delay = None
+            if settings.GEMINI_HEDGE and breaker.state == CLOSED:
+                p95 = tracker.percentile(95)
+                if p95 is not None:
+                    delay = max(p95, settings.GEMINI_HEDGE_MIN_DELAY)
+            fallback = model != route.model
+            try:
+                return await breaker.call(
+                    lambda: self.hedger.run(lambda: self._attempt(route, model, prompt, tracker, fallback), delay)
+                )
+            except CircuitOpenError as e:
+                error = error or e
+            except Exception as e:
+                # A real failure is more useful to the caller than an open breaker
+                if error is None or isinstance(error, CircuitOpenError):
+                    error = e
+                if model != route.models[-1]:
+                    logger.warning("Gemini model %s failed for %s, failing over: %s", model, task, e)
+        raise error
+
+    async def _attempt(self, route: ModelRoute, model: str, prompt: RenderedPrompt, tracker: LatencyTracker,
+                       fallback: bool = False) -> str:
+        client = self.router.client(route, model)
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            try:
+                response = await asyncio.wait_for(
+                    loop.run_in_executor(self._executor, client.generate_content, prompt.text),
+                    timeout=settings.GEMINI_CALL_TIMEOUT,
+                )
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"Gemini call timed out after {settings.GEMINI_CALL_TIMEOUT:.0f}s")
             if not response.text:
                 raise ValueError("Empty response from Gemini API")
-                
-            logger.info("Received meta description from Gemini API")
-            return response.text.strip()
+        except Exception:
+            self.router.record(model, time.perf_counter() - started, succeeded=False)
+            raise
+        elapsed = time.perf_counter() - started
+        tracker.add(elapsed)
+        usage = getattr(response, "usage_metadata", None)
+        input_tokens = _token_count(usage, "prompt_token_count")
+        output_tokens = _token_count(usage, "candidates_token_count")
+        self.router.record(model, elapsed, input_tokens=input_tokens, output_tokens=output_tokens, fallback=fallback)
+        self.telemetry.record_usage(prompt.template, input_tokens, output_tokens,
+                                    self.router.cost(model, input_tokens, output_tokens))
+        return response.text
+
+    def model_stats(self) -> Dict[str, dict]:
+        """Per-model call counts, latency percentiles, token usage and estimated cost."""
+        return self.router.stats()
+
+    def prompt_stats(self) -> Dict[str, dict]:
+        """Per-template calls, error rate, latency percentiles, token usage and estimated cost."""
+        return self.telemetry.stats()
+
+    async def generate_outline(self,
+                               topic: str,
+                               keywords: List[str] = None,
+                               tone: str = "professional",
+                               target_audience: str = "general",
+                               sections: int = 6) -> Dict[str, Any]:
+        """Ask for a short structured outline of a blog post."""
+        logger.debug("Generating outline for topic: %s", topic)
+        prompt = OUTLINE.render(topic=topic, target_audience=target_audience, tone=tone,
+                                keywords=_keywords(keywords), sections=sections)
+        return parse_outline(await self._generate_text(prompt), sections)
+
+    async def generate_section(self,
+                               topic: str,
+                               outline: Dict[str, Any],
+                               index: int,
+                               keywords: List[str] = None,
+                               tone: str = "professional",
+                               target_audience: str = "general",
+                               words: int = 350) -> str:
+        """Write the body of one outline section, with the whole outline as shared context."""
+        sections = outline["sections"]
+        section = sections[index]
+        plan = "\n".join(
+            f"{i + 1}. {s['heading']}{'  <- this section' if i == index else ''}"
+            for i, s in enumerate(sections)
+        )
+        if index == 0:
+            role = "This is the opening section: introduce the topic and hook the reader."
+        elif index == len(sections) - 1:
+            role = "This is the closing section: summarize and end with a strong conclusion."
+        else:
+            role = "This is a middle section: do not write an introduction or conclusion for the article."
+        prompt = SECTION.render(
+            title=outline['title'] or topic, topic=topic, target_audience=target_audience, tone=tone,
+            keywords=_keywords(keywords), plan=plan, number=index + 1, heading=section['heading'], words=words,
+            key_points='; '.join(section['key_points']) or 'the heading', role=role,
+        )
+        return await self._generate_text(prompt)
+
+    async def regenerate_section(self,
+                                 title: str,
+                                 heading_path: List[str],
+                                 current_body: str,
+                                 previous_summary: str = "",
+                                 next_summary: str = "",
+                                 instructions: Optional[str] = None,
+                                 tone: str = "professional",
+                                 target_audience: str = "general") -> str:
+        """Rewrite one section of an existing article.
+
+        Only the target section and short summaries of its neighbours are sent,
+        so the prompt stays small regardless of the article's length.
+        """
+        words = max(80, len(current_body.split()))
+        prompt = SECTION_REWRITE.render(
+            title=title, target_audience=target_audience, tone=tone, heading_path=' > '.join(heading_path),
+            previous_summary=previous_summary or 'Nothing (this is the first section)',
+            next_summary=next_summary or 'Nothing (this is the last section)',
+            current_body=current_body or '(empty)', words=words, instructions=instructions,
+        )
+        return await self._generate_text(prompt)
+
+    async def generate_sectioned_blog_post(self,
+                                           topic: str,
+                                           keywords: List[str] = None,
+                                           tone: str = "professional",
+                                           target_audience: str = "general",
+                                           sections: Optional[int] = None,
+                                           total_words: Optional[int] = None,
+                                           concurrency: Optional[int] = None) -> str:
+        """Generate a long post as a short outline call plus concurrent section calls.
+
+        Wall-clock time is roughly outline + the slowest section, instead of one
+        long sequential completion. At most `concurrency` section calls run at
+        once.
+        """
+        sections = sections or settings.GEMINI_LONG_POST_SECTIONS
+        total_words = total_words or settings.GEMINI_LONG_POST_WORDS
+        semaphore = asyncio.Semaphore(concurrency or settings.GEMINI_SECTION_CONCURRENCY)
+
+        started = time.perf_counter()
+        outline = await self.generate_outline(topic, keywords, tone, target_audience, sections)
+        words = max(100, total_words // len(outline["sections"]))
+
+        async def write(index: int) -> str:
+            async with semaphore:
+                return await self.generate_section(topic, outline, index, keywords, tone, target_audience, words)
+
+        try:
+            bodies = await asyncio.gather(*(write(i) for i in range(len(outline["sections"]))))
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.error("Failed to generate sectioned blog post: %s", e)
+            raise Exception(f"Failed to generate blog post: {str(e)}")
+        logger.info("Generated %d sections for topic %s in %.2fs",
+                    len(bodies), topic, time.perf_counter() - started)
+        return stitch_article(
+            outline["title"] or topic,
+            [(section["heading"], body) for section, body in zip(outline["sections"], bodies)]
+        )
+
+    @retry.Retry(predicate=is_rate_limit_error, initial=1.0, maximum=60.0, multiplier=2.0, deadline=300.0)
+    async def generate_meta_description(self, content: str, title: Optional[str] = None) -> str:
+        """Generate a meta description for a blog post.
+
+        The description is extracted locally. Only when
+        META_DESCRIPTION_REFINE is enabled is Gemini asked to polish it, and
+        then it sees a token-budgeted excerpt rather than the whole article.
+        """
+        max_chars = settings.META_DESCRIPTION_MAX_LENGTH
+        description = extractive_description(content, max_chars)
+        if not settings.META_DESCRIPTION_REFINE:
+            return description
+        try:
+            logger.debug("Refining meta description with Gemini...")
+            excerpt = budgeted_excerpt(content, settings.META_DESCRIPTION_EXCERPT_TOKENS, title)
+            prompt = META_DESCRIPTION.render(title=title, max_chars=max_chars, description=description,
+                                             excerpt=excerpt)
+            refined = clamp_text(await self._generate_text(prompt), max_chars)
+            return refined or description
         except Exception as e:
             if "quota" in str(e).lower():
                 logger.warning("API quota exceeded. Please check your billing status.")
-                raise
-            logger.error(f"Failed to generate meta description: {str(e)}")
-            raise Exception(f"Failed to generate meta description: {str(e)}")
+            logger.warning("Meta description refinement failed, using extractive description: %s", e)
+            return description
     
     @retry.Retry(predicate=is_rate_limit_error, initial=1.0, maximum=60.0, multiplier=2.0, deadline=300.0)
     async def generate_slug(self, title: str) -> str:
         """Generate a URL-friendly slug from a title."""
         try:
-            logger.info(f"Generating slug for title: {title}")
-            prompt = f"""
-            Convert this blog post title into a URL-friendly slug:
-            
-            Title: {title}
-            
-            Rules:
-            1. Use lowercase
-            2. Replace spaces with hyphens
-            3. Remove special characters
-            4. Keep it concise
-            5. Make it SEO-friendly
-            """
-            
-            logger.info("Sending request to Gemini API for slug...")
-            # Run the synchronous generate_content in a thread pool
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                self.model.generate_content,
-                prompt
-            )
-            
-            if not response.text:
-                raise ValueError("Empty response from Gemini API")
-                
-            logger.info("Received slug from Gemini API")
-            return response.text.strip().lower()
+            logger.debug("Generating slug for title: %s", title)
+            prompt = SLUG.render(title=title)
+            logger.debug("Sending request to Gemini API for slug...")
+            text = await self._generate_text(prompt)
+            logger.debug("Received slug from Gemini API")
+            return text.strip().lower()
+        except CircuitOpenError:
+            raise
         except Exception as e:
             if "quota" in str(e).lower():
                 logger.warning("API quota exceeded. Please check your billing status.")
                 raise
-            logger.error(f"Failed to generate slug: {str(e)}")
+            logger.error("Failed to generate slug: %s", e)
             raise Exception(f"Failed to generate slug: {str(e)}") 
\ No newline at end of file
@@ -0,0 +1,350 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+logger = logging.getLogger(__name__)
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+
+@dataclass
+class IdempotencyRecord:
+    """State of one idempotency key."""
+    key: str
+    fingerprint: str
+    state: str
+    expires_at: float
+    status_code: Optional[int] = None
+    body: Any = None
+
+
+class IdempotencyStore:
+    """Interface for idempotency record backends.
+
+    `reserve` must be atomic: exactly one caller gets None back (and owns the
+    work); every other caller gets the existing record. The reservation's `ttl`
+    is a lease: once it passes, the next `reserve` of the key takes it over.
+    """
+
+    async def reserve(self, key: str, fingerprint: str, ttl: float) -> Optional[IdempotencyRecord]:
+        raise NotImplementedError
+
+    async def get(self, key: str) -> Optional[IdempotencyRecord]:
+        raise NotImplementedError
+
+    async def complete(self, key: str, status_code: int, body: Any, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def release(self, key: str) -> None:
+        """Forget an in-progress key after the work failed so a retry can run it."""
+        raise NotImplementedError
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    """Per-process store bounded by entry count (LRU) and TTL."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._records: "OrderedDict[str, IdempotencyRecord]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key: str) -> Optional[IdempotencyRecord]:
+        record = self._records.get(key)
+        if record is not None and record.expires_at < time.time():
+            del self._records[key]
+            return None
+        return record
+
+    async def reserve(self, key: str, fingerprint: str, ttl: float) -> Optional[IdempotencyRecord]:
+        with self._lock:
+            existing = self._live(key)
+            if existing is not None:
+                return existing
+            self._records[key] = IdempotencyRecord(key, fingerprint, IN_PROGRESS, time.time() + ttl)
+            while len(self._records) > self.max_entries:
+                self._records.popitem(last=False)
+            return None
+
+    async def get(self, key: str) -> Optional[IdempotencyRecord]:
+        with self._lock:
+            return self._live(key)
+
+    async def complete(self, key: str, status_code: int, body: Any, ttl: float) -> None:
+        with self._lock:
+            record = self._records.get(key)
+            if record is not None:
+                record.state = COMPLETED
+                record.status_code = status_code
+                record.body = body
+                record.expires_at = time.time() + ttl
+
+    async def release(self, key: str) -> None:
+        with self._lock:
+            self._records.pop(key, None)
+
+
+class SQLiteIdempotencyStore(IdempotencyStore):
+    """Store shared by all workers on one host, backed by a SQLite file."""
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS idempotency_keys (
+                key TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                state TEXT NOT NULL,
+                status_code INTEGER,
+                body TEXT,
+                expires_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_idempotency_expires ON idempotency_keys (expires_at)")
+
+    @staticmethod
+    def _to_record(row) -> IdempotencyRecord:
+        key, fingerprint, state, status_code, body, expires_at = row
+        return IdempotencyRecord(key, fingerprint, state, expires_at, status_code,
+                                 json.loads(body) if body is not None else None)
+
+    def _prune(self) -> None:
+        now = time.time()
+        self._conn.execute("DELETE FROM idempotency_keys WHERE expires_at < ?", (now,))
+        self._conn.execute(
+            """DELETE FROM idempotency_keys WHERE key IN (
+                SELECT key FROM idempotency_keys ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+            )""",
+            (self.max_entries,),
+        )
+
+    async def reserve(self, key: str, fingerprint: str, ttl: float) -> Optional[IdempotencyRecord]:
+        with self._lock:
+            now = time.time()
+            self._conn.execute("DELETE FROM idempotency_keys WHERE key = ? AND expires_at < ?", (key, now))
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO idempotency_keys (key, fingerprint, state, expires_at) VALUES (?, ?, ?, ?)",
+                (key, fingerprint, IN_PROGRESS, now + ttl),
+            )
+            if cursor.rowcount == 1:
+                # Amortize cleanup over roughly one in a hundred reservations
+                if hash(key) % 100 == 0:
+                    self._prune()
+                return None
+            row = self._conn.execute(
+                "SELECT key, fingerprint, state, status_code, body, expires_at FROM idempotency_keys WHERE key = ?",
+                (key,),
+            ).fetchone()
+            return self._to_record(row) if row else None
+
+    async def get(self, key: str) -> Optional[IdempotencyRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, fingerprint, state, status_code, body, expires_at FROM idempotency_keys "
+                "WHERE key = ? AND expires_at >= ?",
+                (key, time.time()),
+            ).fetchone()
+        return self._to_record(row) if row else None
+
+    async def complete(self, key: str, status_code: int, body: Any, ttl: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE idempotency_keys SET state = ?, status_code = ?, body = ?, expires_at = ? WHERE key = ?",
+                (COMPLETED, status_code, json.dumps(body), time.time() + ttl, key),
+            )
+
+    async def release(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM idempotency_keys WHERE key = ? AND state = ?", (key, IN_PROGRESS))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class FirestoreIdempotencyStore(IdempotencyStore):
+    """Store shared by every worker, backed by an `idempotency_keys` collection.
+
+    Reservation uses `DocumentReference.create`, which fails if the document
+    already exists. Configure a Firestore TTL policy on `expires_at_ts` to have
+    expired records deleted automatically.
+    """
+
+    def __init__(self, db, collection: str = "idempotency_keys"):
+        self.db = db
+        self.collection = db.collection(collection)
+
+    @staticmethod
+    def _doc_id(key: str) -> str:
+        # Keys are client supplied; hash them into a safe, fixed-length document id
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @staticmethod
+    def _to_record(key: str, data: Dict[str, Any]) -> IdempotencyRecord:
+        body = data.get("body")
+        return IdempotencyRecord(key, data["fingerprint"], data["state"], data["expires_at"],
+                                 data.get("status_code"), json.loads(body) if body is not None else None)
+
+    async def reserve(self, key: str, fingerprint: str, ttl: float) -> Optional[IdempotencyRecord]:
+        from datetime import datetime, timezone
+        from google.api_core.exceptions import AlreadyExists
+        from google.cloud import firestore
+
+        doc_ref = self.collection.document(self._doc_id(key))
+        expires_at = time.time() + ttl
+        data = {
+            "fingerprint": fingerprint,
+            "state": IN_PROGRESS,
+            "expires_at": expires_at,
+            "expires_at_ts": datetime.fromtimestamp(expires_at, tz=timezone.utc),
+        }
+
+        @firestore.transactional
+        def take_over(transaction) -> Optional[IdempotencyRecord]:
+            snapshot = doc_ref.get(transaction=transaction)
+            current = snapshot.to_dict() if snapshot.exists else None
+            if current is not None and current["expires_at"] >= time.time():
+                return self._to_record(key, current)
+            # Expired record still present (or a lease left by a worker that died): take it over
+            transaction.set(doc_ref, data)
+            return None
+
+        def reserve() -> Optional[IdempotencyRecord]:
+            try:
+                doc_ref.create(data)
+                return None
+            except AlreadyExists:
+                return take_over(self.db.transaction())
+
+        # Firestore calls are synchronous; keep them off the event loop
+        return await asyncio.to_thread(reserve)
+
+    async def get(self, key: str) -> Optional[IdempotencyRecord]:
+        # Polled by waiting duplicates, so it must not block the event loop
+        doc = await asyncio.to_thread(self.collection.document(self._doc_id(key)).get)
+        if not doc.exists:
+            return None
+        data = doc.to_dict()
+        if data["expires_at"] < time.time():
+            return None
+        return self._to_record(key, data)
+
+    async def complete(self, key: str, status_code: int, body: Any, ttl: float) -> None:
+        from datetime import datetime, timezone
+
+        expires_at = time.time() + ttl
+        await asyncio.to_thread(self.collection.document(self._doc_id(key)).update, {
+            "state": COMPLETED,
+            "status_code": status_code,
+            "body": json.dumps(body),
+            "expires_at": expires_at,
+            "expires_at_ts": datetime.fromtimestamp(expires_at, tz=timezone.utc),
+        })
+
+    async def release(self, key: str) -> None:
+        await asyncio.to_thread(self.collection.document(self._doc_id(key)).delete)
+
+
+def fingerprint_request(*parts: bytes) -> str:
+    """Fingerprint the raw request so a key reused with a different payload is rejected."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class IdempotencyService:
+    """Run a handler at most once per idempotency key.
+
+    Concurrent duplicates in this process attach to the original in-flight
+    coroutine; duplicates arriving at other workers poll the shared store until
+    the original completes. Completed results are replayed until they expire.
+    Failed attempts are released so the client can retry them.
+    """
+
+    def __init__(self, store: IdempotencyStore, ttl: float = 86400, wait_timeout: float = 120,
+                 poll_interval: float = 0.25):
+        self.store = store
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        # An in-progress key is only leased for as long as a duplicate waits for
+        # it, so a worker that dies mid-request blocks retries for that long;
+        # `complete` extends the record to the full `ttl`
+        self.lease = wait_timeout
+        self._in_flight: Dict[str, Tuple[str, "asyncio.Future[Tuple[int, Any]]"]] = {}
+
+    async def run(self, key: str, fingerprint: str,
+                  handler: Callable[[], Awaitable[Tuple[int, Any]]]) -> Tuple[int, Any, bool]:
+        """Return (status_code, json body, replayed)."""
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            in_flight_fingerprint, in_flight_future = in_flight
+            if in_flight_fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used with a different request payload",
+                )
+            status_code, body = await asyncio.shield(in_flight_future)
+            return status_code, body, True
+
+        existing = await self.store.reserve(key, fingerprint, self.lease)
+        if existing is not None:
+            return (*await self._resolve_existing(key, fingerprint, existing), True)
+
+        future: "asyncio.Future[Tuple[int, Any]]" = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = (fingerprint, future)
+        try:
+            status_code, body = await handler()
+        except BaseException as e:
+            await self.store.release(key)
+            future.set_exception(e)
+            # Mark retrieved so an unattached future doesn't log "exception never retrieved"
+            future.exception()
+            raise
+        else:
+            await self.store.complete(key, status_code, body, self.ttl)
+            future.set_result((status_code, body))
+            return status_code, body, False
+        finally:
+            self._in_flight.pop(key, None)
+
+    async def _resolve_existing(self, key: str, fingerprint: str,
+                                record: IdempotencyRecord) -> Tuple[int, Any]:
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            if record.fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used with a different request payload",
+                )
+            if record.state == COMPLETED:
+                logger.debug("Replaying stored response for idempotency key %s", key)
+                return record.status_code, record.body
+            if time.monotonic() >= deadline:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress",
+                )
+            await asyncio.sleep(self.poll_interval)
+            refreshed = await self.store.get(key)
+            if refreshed is None:
+                # The original attempt failed and was released; tell the client to retry
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="The original request with this Idempotency-Key failed; retry it",
+                )
+            record = refreshed
@@ -0,0 +1,173 @@
+"""
+Per-task model selection for Gemini calls.
+
+Each task (article, outline, section, meta, slug) maps to a `ModelRoute`: a
+primary model, an optional fallback model, and the generation config for the
+task (output token cap, temperature). Short outputs such as slugs and meta
+descriptions can run on a lighter model with a tight cap, while articles keep
+the larger model.
+
+`ModelRouter` caches one client per model and task, keeps one circuit breaker
+per model, and tracks rolling latency, token usage and estimated cost per
+model. `GeminiService` tries a route's models in order, so calls fail over to
+the fallback while the primary is erroring or its breaker is open.
+"""
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from .resilience import CircuitBreaker, LatencyTracker
+
+TASKS = ("article", "outline", "section", "meta", "slug")
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    task: str
+    model: str
+    fallback: Optional[str] = None
+    max_output_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+
+    @classmethod
+    def from_setting(cls, task: str, value: Union[str, Mapping[str, Any]]) -> "ModelRoute":
+        """Build a route from a GEMINI_MODEL_ROUTES entry: a model name or a dict."""
+        if isinstance(value, str):
+            return cls(task=task, model=value)
+        if not value.get("model"):
+            raise ValueError(f"Route for task '{task}' has no model")
+        return cls(
+            task=task,
+            model=value["model"],
+            fallback=value.get("fallback") or None,
+            max_output_tokens=value.get("max_output_tokens"),
+            temperature=value.get("temperature"),
+        )
+
+    @property
+    def models(self) -> List[str]:
+        """Models to try, in order."""
+        if self.fallback and self.fallback != self.model:
+            return [self.model, self.fallback]
+        return [self.model]
+
+    def generation_config(self) -> Dict[str, Any]:
+        config = {"max_output_tokens": self.max_output_tokens, "temperature": self.temperature}
+        return {name: value for name, value in config.items() if value is not None}
+
+
+class ModelStats:
+    """Rolling latency and cumulative call, token and cost counters for one model."""
+
+    def __init__(self, price: Sequence[float] = (0.0, 0.0), window: int = 200):
+        self.input_price, self.output_price = price  # USD per million tokens
+        self.latency = LatencyTracker(window=window, min_samples=1)
+        self.calls = 0
+        self.failures = 0
+        self.fallback_calls = 0  # successful calls served for a route whose primary failed
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    @property
+    def cost(self) -> float:
+        return (self.input_tokens * self.input_price + self.output_tokens * self.output_price) / 1_000_000
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "fallback_calls": self.fallback_calls,
+            "p50_seconds": self.latency.percentile(50),
+            "p95_seconds": self.latency.percentile(95),
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "estimated_cost_usd": round(self.cost, 6),
+        }
+
+
+class ModelRouter:
+    """Routes tasks to models and keeps per-model clients, breakers and stats.
+
+    `factory(model_name, generation_config)` creates a client; it is called
+    once per model and task.
+    """
+
+    def __init__(self,
+                 routes: Mapping[str, Union[str, Mapping[str, Any]]],
+                 factory: Callable[[str, Dict[str, Any]], Any],
+                 prices: Optional[Mapping[str, Sequence[float]]] = None,
+                 breaker_factory: Callable[[str], CircuitBreaker] = CircuitBreaker,
+                 latency_window: int = 200):
+        missing = [task for task in TASKS if task not in routes]
+        if missing:
+            raise ValueError(f"No model route for: {', '.join(missing)}")
+        self.routes = {task: ModelRoute.from_setting(task, value) for task, value in routes.items()}
+        self.factory = factory
+        self.prices = dict(prices or {})
+        self.breaker_factory = breaker_factory
+        self.latency_window = latency_window
+        self._clients: Dict[Tuple[str, str], Any] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._stats: Dict[str, ModelStats] = {}
+        self._lock = threading.Lock()
+
+    def route(self, task: str) -> ModelRoute:
+        try:
+            return self.routes[task]
+        except KeyError:
+            raise ValueError(f"Unknown generation task: {task}")
+
+    def client(self, route: ModelRoute, model: str) -> Any:
+        key = (model, route.task)
+        with self._lock:
+            client = self._clients.get(key)
+        if client is None:
+            client = self.factory(model, route.generation_config())
+            with self._lock:
+                client = self._clients.setdefault(key, client)
+        return client
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(model)
+            if breaker is None:
+                breaker = self._breakers[model] = self.breaker_factory(model)
+            return breaker
+
+    def _model_stats(self, model: str) -> ModelStats:
+        stats = self._stats.get(model)
+        if stats is None:
+            stats = self._stats[model] = ModelStats(self.prices.get(model, (0.0, 0.0)), self.latency_window)
+        return stats
+
+    def cost(self, model: str, input_tokens: int, output_tokens: int) -> float:
+        """Estimated USD for one call to `model` (0 without a configured price)."""
+        input_price, output_price = self.prices.get(model, (0.0, 0.0))
+        return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+    def record(self, model: str, seconds: float, succeeded: bool = True, input_tokens: int = 0,
+               output_tokens: int = 0, fallback: bool = False) -> None:
+        """Record one finished call; only successful calls feed the latency window."""
+        with self._lock:
+            stats = self._model_stats(model)
+            stats.calls += 1
+            stats.input_tokens += input_tokens
+            stats.output_tokens += output_tokens
+            if not succeeded:
+                stats.failures += 1
+                return
+            if fallback:
+                stats.fallback_calls += 1
+        stats.latency.add(seconds)
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-model counters, rolling latency percentiles and breaker state."""
+        with self._lock:
+            models = dict(self._stats)
+            breakers = dict(self._breakers)
+        report = {}
+        for model, stats in sorted(models.items()):
+            report[model] = stats.to_dict()
+            if model in breakers:
+                report[model]["breaker"] = breakers[model].state
+        return report
@@ -0,0 +1,55 @@
+import asyncio
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Sequence
+
+from ..models.blog_post import BlogPost
+
+logger = logging.getLogger(__name__)
+
+
+class PostIndexes:
+    """Fan-out of post writes to every in-memory index derived from posts.
+
+    Routes call this after a write has been persisted. Index failures are
+    logged rather than raised: the write already succeeded, and a stale index
+    only degrades suggestions until it is rebuilt.
+
+    Indexing a post (MinHash signatures, term extraction, neighbour rows) is
+    CPU work of several milliseconds, so the async methods run it on one
+    dedicated thread instead of the event loop. A single thread also applies
+    writes in the order they were submitted, so an older version of a post
+    never overwrites a newer one.
+    """
+
+    def __init__(self, indexes: Sequence):
+        self.indexes = list(indexes)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="post-indexes")
+
+    def add(self, post: BlogPost) -> None:
+        for index in self.indexes:
+            try:
+                index.add(post)
+            except Exception as e:
+                logger.warning("Failed to index post %s in %s: %s", post.id, type(index).__name__, e)
+
+    def remove(self, post_id: str) -> None:
+        for index in self.indexes:
+            try:
+                index.remove(post_id)
+            except Exception as e:
+                logger.warning("Failed to remove post %s from %s: %s", post_id, type(index).__name__, e)
+
+    def submit(self, post: BlogPost) -> Future:
+        """Queue `post` for indexing on the index thread without waiting for it."""
+        return self._executor.submit(self.add, post)
+
+    async def add_async(self, post: BlogPost) -> None:
+        await asyncio.wrap_future(self.submit(post))
+
+    async def remove_async(self, post_id: str) -> None:
+        await asyncio.wrap_future(self._executor.submit(self.remove, post_id))
+
+    def close(self) -> None:
+        """Finish the queued writes and stop the index thread."""
+        self._executor.shutdown(wait=True)
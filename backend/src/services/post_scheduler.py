@@ -0,0 +1,317 @@
+"""
+Scheduled publishing.
+
+`PostScheduler` keeps the scheduled posts due within a look-ahead window in a
+min-heap keyed by publish time. The window is filled by one range query over
+(status, scheduled_for) and refilled only when it runs out; posts scheduled
+through this worker's API are pushed into the heap directly. Between deadlines
+the background task sleeps until the earliest one (or until an earlier post is
+scheduled) and then publishes everything due in batched writes, so the
+collection is never scanned or polled.
+
+Several workers can run a scheduler against the same database. Before
+publishing, a worker takes a short lease on each due post, and the repository
+only publishes posts that are still scheduled, so each post is published once.
+If a lease holder dies, its posts stay scheduled and are loaded again by the
+next window refill after the lease expires.
+"""
+import asyncio
+import contextlib
+import heapq
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..models.blog_post import BlogPost
+
+logger = logging.getLogger(__name__)
+
+
+def _timestamp(value: datetime) -> float:
+    """Epoch seconds; naive datetimes are UTC, as everywhere else in the API."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class LeaseStore:
+    """Interface for lease backends.
+
+    `acquire` must be atomic per name: a lease is held by at most one holder
+    until it expires.
+    """
+
+    async def acquire(self, names: Sequence[str], holder: str, ttl: float) -> List[str]:
+        """Take every lease in `names` that is free, expired or already ours; return those taken."""
+        raise NotImplementedError
+
+    async def release(self, names: Sequence[str], holder: str) -> None:
+        raise NotImplementedError
+
+
+class InMemoryLeaseStore(LeaseStore):
+    """Leases shared by the schedulers of one process."""
+
+    def __init__(self):
+        self._leases: Dict[str, Tuple[str, float]] = {}  # name -> (holder, expires_at)
+        self._lock = threading.Lock()
+
+    async def acquire(self, names: Sequence[str], holder: str, ttl: float) -> List[str]:
+        now = time.time()
+        acquired = []
+        with self._lock:
+            for name in names:
+                current = self._leases.get(name)
+                if current is None or current[0] == holder or current[1] < now:
+                    self._leases[name] = (holder, now + ttl)
+                    acquired.append(name)
+        return acquired
+
+    async def release(self, names: Sequence[str], holder: str) -> None:
+        with self._lock:
+            for name in names:
+                current = self._leases.get(name)
+                if current is not None and current[0] == holder:
+                    del self._leases[name]
+
+
+class FirestoreLeaseStore(LeaseStore):
+    """Leases shared by every worker, one document per post in a `scheduler_leases` collection.
+
+    A free lease is taken with `DocumentReference.create`, which fails if the
+    document already exists; an expired one is taken over in a transaction.
+    Configure a Firestore TTL policy on `expires_at_ts` to have leases left by
+    crashed workers deleted automatically.
+    """
+
+    def __init__(self, db, collection: str = "scheduler_leases"):
+        self.db = db
+        self.collection = db.collection(collection)
+
+    def _acquire_one(self, name: str, holder: str, ttl: float) -> bool:
+        from google.api_core.exceptions import AlreadyExists
+        from google.cloud import firestore
+
+        doc_ref = self.collection.document(name)
+        expires_at = time.time() + ttl
+        data = {
+            "holder": holder,
+            "expires_at": expires_at,
+            "expires_at_ts": datetime.fromtimestamp(expires_at, tz=timezone.utc),
+        }
+        try:
+            doc_ref.create(data)
+            return True
+        except AlreadyExists:
+            pass
+
+        @firestore.transactional
+        def take_over(transaction) -> bool:
+            snapshot = doc_ref.get(transaction=transaction)
+            current = snapshot.to_dict() if snapshot.exists else None
+            if current and current["holder"] != holder and current["expires_at"] >= time.time():
+                return False
+            transaction.set(doc_ref, data)
+            return True
+
+        return take_over(self.db.transaction())
+
+    async def acquire(self, names: Sequence[str], holder: str, ttl: float) -> List[str]:
+        # One round trip per lease; run them off the event loop
+        def acquire_all() -> List[str]:
+            return [name for name in names if self._acquire_one(name, holder, ttl)]
+
+        return await asyncio.to_thread(acquire_all)
+
+    async def release(self, names: Sequence[str], holder: str) -> None:
+        # Called by the holder while its leases are still live, so no holder check is needed
+        def release_all() -> None:
+            for start in range(0, len(names), 500):  # Firestore batch limit
+                batch = self.db.batch()
+                for name in names[start:start + 500]:
+                    batch.delete(self.collection.document(name))
+                batch.commit()
+
+        await asyncio.to_thread(release_all)
+
+
+class PostScheduler:
+    """Publishes scheduled posts at their `scheduled_for` time."""
+
+    def __init__(self, repo, leases: LeaseStore,
+                 on_published: Optional[Callable[[List[BlogPost]], None]] = None,
+                 lookahead: float = 300.0, max_loaded: int = 5000, batch_size: int = 200,
+                 lease_ttl: float = 60.0, retry_delay: float = 10.0, holder: Optional[str] = None):
+        self.repo = repo
+        self.leases = leases
+        self.on_published = on_published
+        self.lookahead = lookahead
+        self.max_loaded = max_loaded
+        self.batch_size = batch_size
+        self.lease_ttl = lease_ttl
+        self.retry_delay = retry_delay
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._heap: List[Tuple[float, str]] = []
+        # Live deadline per post; heap entries that disagree with it are stale
+        self._deadlines: Dict[str, float] = {}
+        # Every scheduled post due before the horizon is in the heap
+        self._horizon = float("-inf")
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    @property
+    def next_deadline(self) -> Optional[float]:
+        """Epoch seconds of the earliest tracked post, if any."""
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def _discard_stale(self) -> None:
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def _push(self, post_id: str, when: float) -> None:
+        self._deadlines[post_id] = when
+        heapq.heappush(self._heap, (when, post_id))
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            # Mostly rescheduled or cancelled entries: rebuild from the live deadlines
+            self._heap = [(deadline, post_id) for post_id, deadline in self._deadlines.items()]
+            heapq.heapify(self._heap)
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def schedule(self, post_id: str, when: datetime) -> None:
+        """Track a post saved as scheduled (or rescheduled) by this worker."""
+        timestamp = _timestamp(when)
+        if timestamp > self._horizon:
+            # Beyond the loaded window: the refill that reaches it loads it
+            self._deadlines.pop(post_id, None)
+            return
+        next_deadline = self.next_deadline
+        self._push(post_id, timestamp)
+        if next_deadline is None or timestamp < next_deadline:
+            self._wake()
+
+    def unschedule(self, post_id: str) -> None:
+        self._deadlines.pop(post_id, None)
+
+    def sync(self, post: BlogPost) -> None:
+        """Follow a write to `post`: track it if it is scheduled, forget it otherwise."""
+        if post.status == "scheduled" and post.scheduled_for is not None:
+            self.schedule(post.id, post.scheduled_for)
+        else:
+            self.unschedule(post.id)
+
+    async def reload(self, now: Optional[float] = None) -> int:
+        """Load the scheduled posts due within `lookahead` of `now`; returns how many."""
+        now = time.time() if now is None else now
+        until = now + self.lookahead
+        due = await self.repo.list_scheduled(datetime.fromtimestamp(until, tz=timezone.utc),
+                                             limit=self.max_loaded)
+        if len(due) >= self.max_loaded:
+            # More due than fit in one load: end the window at the last loaded post,
+            # but refill at most once a second while a backlog drains
+            until = max(_timestamp(due[-1][1]), now + 1.0)
+        for post_id, scheduled_for in due:
+            self._push(post_id, _timestamp(scheduled_for))
+        self._horizon = until
+        self._wake()
+        logger.debug("Loaded %d scheduled posts due before %s", len(due),
+                     datetime.fromtimestamp(until, tz=timezone.utc).isoformat())
+        return len(due)
+
+    def _pop_due(self, now: float) -> List[str]:
+        due = []
+        while self._heap and len(due) < self.batch_size:
+            when, post_id = self._heap[0]
+            if self._deadlines.get(post_id) != when:
+                heapq.heappop(self._heap)
+                continue
+            if when > now:
+                break
+            heapq.heappop(self._heap)
+            del self._deadlines[post_id]
+            due.append(post_id)
+        return due
+
+    async def run_due(self, now: Optional[float] = None) -> List[BlogPost]:
+        """Publish every tracked post due by `now`, `batch_size` posts per write."""
+        now = time.time() if now is None else now
+        published: List[BlogPost] = []
+        while True:
+            due = self._pop_due(now)
+            if not due:
+                return published
+            published.extend(await self._publish(due, now))
+
+    async def _publish(self, post_ids: List[str], now: float) -> List[BlogPost]:
+        leased: List[str] = []
+        try:
+            # Posts leased by another worker are left to it
+            leased = await self.leases.acquire(post_ids, self.holder, self.lease_ttl)
+            if not leased:
+                return []
+            posts = await self.repo.publish_scheduled(leased, datetime.fromtimestamp(now, tz=timezone.utc))
+        except Exception as e:
+            logger.warning("Failed to publish %d scheduled posts, retrying in %.0fs: %s",
+                           len(post_ids), self.retry_delay, e)
+            for post_id in post_ids:
+                self._push(post_id, now + self.retry_delay)
+            return []
+        finally:
+            if leased:
+                try:
+                    await self.leases.release(leased, self.holder)
+                except Exception as e:
+                    logger.warning("Failed to release %d scheduler leases: %s", len(leased), e)
+
+        if posts:
+            logger.info("Published %d scheduled posts", len(posts))
+            if self.on_published is not None:
+                try:
+                    self.on_published(posts)
+                except Exception as e:
+                    logger.warning("Post-publish hook failed: %s", e)
+        return posts
+
+    def start(self) -> None:
+        """Start the background task on the running event loop."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="post-scheduler")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+            self._wakeup = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if time.time() >= self._horizon:
+                    await self.reload()
+                await self.run_due()
+            except Exception as e:
+                logger.warning("Scheduler pass failed, retrying in %.0fs: %s", self.retry_delay, e)
+                await asyncio.sleep(self.retry_delay)
+                continue
+
+            next_deadline = self.next_deadline
+            wake_at = self._horizon if next_deadline is None else min(next_deadline, self._horizon)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, wake_at - time.time()))
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,297 @@
+"""
+Versioned prompt templates for Gemini calls, with per-template telemetry.
+
+Templates are declared once, with typed parameters, and compiled at import:
+the text is dedented and stripped (indentation left in a prompt is sent, and
+billed, as input tokens), and its placeholders must match the declared
+parameters. `render` checks the arguments' types, so a missing or misspelt
+parameter fails before any tokens are spent. A line containing an optional
+parameter is left out when that parameter is empty.
+
+Each template has a version; bump it whenever the text changes so telemetry
+for the old and new wording stays apart. `PromptTelemetry` aggregates calls,
+errors, latency and the prompt and response token counts reported in each
+response's usage metadata per template version, most expensive first (see
+GET /api/admin/prompts).
+"""
+import re
+import string
+import textwrap
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from .resilience import LatencyTracker
+
+BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+@dataclass(frozen=True)
+class RenderedPrompt:
+    template: str  # "<name>@v<version>", the telemetry key
+    task: str  # model route (see services/model_router.py)
+    text: str
+
+
+class PromptTemplate:
+    """A compiled template: lines of literal text and `{name}` placeholders."""
+
+    def __init__(self, name: str, version: int, task: str, text: str,
+                 params: Mapping[str, type], optional: Sequence[str] = ()):
+        self.name = name
+        self.version = version
+        self.task = task
+        self.params = dict(params)
+        self.optional = frozenset(optional)
+        self.text = textwrap.dedent(text).strip()
+        self._lines: List[Tuple[List[Tuple[str, Optional[str], str]], frozenset]] = []
+        used = set()
+        for line in self.text.splitlines():
+            parts = []
+            for literal, field, spec, conversion in string.Formatter().parse(line.rstrip()):
+                if conversion:
+                    raise ValueError(f"Prompt '{name}': conversions are not supported ({{{field}!{conversion}}})")
+                if field is not None and field not in self.params:
+                    raise ValueError(f"Prompt '{name}' uses undeclared parameter '{field}'")
+                parts.append((literal, field, spec or ""))
+                used.add(field)
+            self._lines.append((parts, frozenset(field for _, field, _ in parts if field in self.optional)))
+        unused = set(self.params) - used
+        if unused or not self.optional <= set(self.params):
+            raise ValueError(f"Prompt '{name}' declares parameters it doesn't use: "
+                             f"{', '.join(sorted(unused | (self.optional - set(self.params))))}")
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}@v{self.version}"
+
+    def render(self, **values: Any) -> RenderedPrompt:
+        unknown = set(values) - set(self.params)
+        if unknown:
+            raise TypeError(f"Prompt '{self.name}' got unknown parameters: {', '.join(sorted(unknown))}")
+        for param, expected in self.params.items():
+            value = values.get(param)
+            if value is None and param in self.optional:
+                continue
+            if param not in values:
+                raise TypeError(f"Prompt '{self.name}' is missing parameter '{param}'")
+            if not isinstance(value, expected):
+                raise TypeError(f"Prompt '{self.name}' parameter '{param}' must be {expected.__name__}, "
+                                f"not {type(value).__name__}")
+        lines = []
+        for parts, optional in self._lines:
+            if any(values.get(param) in (None, "") for param in optional):
+                continue
+            lines.append("".join(
+                literal + (format(values[field], spec) if field is not None else "")
+                for literal, field, spec in parts
+            ))
+        text = BLANK_LINES_RE.sub("\n\n", "\n".join(lines))
+        return RenderedPrompt(template=self.key, task=self.task, text=text)
+
+
+class PromptRegistry:
+    """Templates by name; several versions of one name may be registered."""
+
+    def __init__(self):
+        self._templates: Dict[str, Dict[int, PromptTemplate]] = {}
+
+    def register(self, template: PromptTemplate) -> PromptTemplate:
+        versions = self._templates.setdefault(template.name, {})
+        if template.version in versions:
+            raise ValueError(f"Prompt {template.key} is already registered")
+        versions[template.version] = template
+        return template
+
+    def get(self, name: str, version: Optional[int] = None) -> PromptTemplate:
+        """The template `name` at `version`, by default its latest version."""
+        versions = self._templates.get(name)
+        if not versions or (version is not None and version not in versions):
+            raise KeyError(f"Unknown prompt: {name}" + (f"@v{version}" if version is not None else ""))
+        return versions[version if version is not None else max(versions)]
+
+    def __iter__(self) -> Iterator[PromptTemplate]:
+        for versions in self._templates.values():
+            yield from versions.values()
+
+
+class PromptStats:
+    """Cumulative counters and rolling latency for one template version."""
+
+    def __init__(self, window: int = 200):
+        self.latency = LatencyTracker(window=window, min_samples=1)
+        self.calls = 0  # generations requested, whatever the number of attempts
+        self.errors = 0
+        self.responses = 0  # model responses, including retried, hedged and failed-over attempts
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.cost = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.calls, 4) if self.calls else 0.0,
+            "p50_seconds": self.latency.percentile(50),
+            "p95_seconds": self.latency.percentile(95),
+            "prompt_tokens": self.prompt_tokens,
+            "response_tokens": self.response_tokens,
+            "avg_prompt_tokens": round(self.prompt_tokens / self.responses) if self.responses else None,
+            "avg_response_tokens": round(self.response_tokens / self.responses) if self.responses else None,
+            "estimated_cost_usd": round(self.cost, 6),
+        }
+
+
+class PromptTelemetry:
+    """Per-template aggregates, kept in process memory (one set per worker)."""
+
+    def __init__(self, latency_window: int = 200):
+        self.latency_window = latency_window
+        self._stats: Dict[str, PromptStats] = {}
+        self._lock = threading.Lock()
+
+    def _template_stats(self, template: str) -> PromptStats:
+        stats = self._stats.get(template)
+        if stats is None:
+            stats = self._stats[template] = PromptStats(self.latency_window)
+        return stats
+
+    def record_usage(self, template: str, prompt_tokens: int, response_tokens: int, cost: float = 0.0) -> None:
+        """Record the token usage of one model response."""
+        with self._lock:
+            stats = self._template_stats(template)
+            stats.responses += 1
+            stats.prompt_tokens += prompt_tokens
+            stats.response_tokens += response_tokens
+            stats.cost += cost
+
+    def record_call(self, template: str, seconds: float, succeeded: bool = True) -> None:
+        """Record one finished generation; only successful ones feed the latency window."""
+        with self._lock:
+            stats = self._template_stats(template)
+            stats.calls += 1
+            if not succeeded:
+                stats.errors += 1
+                return
+        stats.latency.add(seconds)
+
+    def empty_stats(self) -> dict:
+        return PromptStats(self.latency_window).to_dict()
+
+    def stats(self) -> Dict[str, dict]:
+        """Aggregates per template version, by estimated cost and then total tokens, highest first."""
+        with self._lock:
+            templates = list(self._stats.items())
+        templates.sort(key=lambda item: (item[1].cost, item[1].prompt_tokens + item[1].response_tokens),
+                       reverse=True)
+        return {template: stats.to_dict() for template, stats in templates}
+
+
+PROMPTS = PromptRegistry()
+
+ARTICLE = PROMPTS.register(PromptTemplate(
+    "article", 1, "article",
+    """
+    Write a {length} blog post about {topic} for a {target_audience} audience.
+    Tone: {tone}
+    Keywords to include: {keywords}
+
+    The blog post should be well-structured with:
+    1. An engaging introduction
+    2. Clear main points
+    3. Supporting evidence or examples
+    4. A strong conclusion
+
+    Format the content in markdown.
+    """,
+    params={"length": str, "topic": str, "target_audience": str, "tone": str, "keywords": str},
+))
+
+OUTLINE = PROMPTS.register(PromptTemplate(
+    "outline", 1, "outline",
+    """
+    Create an outline for a blog post about {topic} for a {target_audience} audience.
+    Tone: {tone}
+    Keywords to include: {keywords}
+
+    Use {sections} sections. The first section introduces the topic and the last one concludes it.
+    Respond with JSON only, in this exact shape:
+    {{"title": "...", "sections": [{{"heading": "...", "key_points": ["...", "..."]}}]}}
+    """,
+    params={"topic": str, "target_audience": str, "tone": str, "keywords": str, "sections": int},
+))
+
+SECTION = PROMPTS.register(PromptTemplate(
+    "section", 1, "section",
+    """
+    You are writing one section of a blog post titled "{title}" about {topic}
+    for a {target_audience} audience. Tone: {tone}
+    Keywords to include where natural: {keywords}
+
+    Article outline:
+    {plan}
+
+    Write section {number}, "{heading}", in about {words} words.
+    Cover: {key_points}
+    {role}
+    Format in markdown. Do not repeat the section heading; use ### for any sub-headings.
+    """,
+    params={"title": str, "topic": str, "target_audience": str, "tone": str, "keywords": str, "plan": str,
+            "number": int, "heading": str, "words": int, "key_points": str, "role": str},
+))
+
+SECTION_REWRITE = PROMPTS.register(PromptTemplate(
+    "section_rewrite", 1, "section",
+    """
+    You are revising one section of a blog post titled "{title}" for a {target_audience} audience.
+    Tone: {tone}
+    Section: {heading_path}
+
+    The preceding section covers: {previous_summary}
+    The following section covers: {next_summary}
+
+    Current text of the section:
+    {current_body}
+
+    Rewrite this section in about {words} words so it flows from the preceding section into the following one.
+    Additional instructions: {instructions}
+    Format in markdown. Return only the section body: do not repeat the section heading or
+    write other sections, and use headings only below the section's own level.
+    """,
+    params={"title": str, "target_audience": str, "tone": str, "heading_path": str, "previous_summary": str,
+            "next_summary": str, "current_body": str, "words": int, "instructions": str},
+    optional=("instructions",),
+))
+
+META_DESCRIPTION = PROMPTS.register(PromptTemplate(
+    "meta_description", 1, "meta",
+    """
+    Improve this meta description for a blog post.
+    Post title: {title}
+    Return only the description, at most {max_chars} characters, with no quotes.
+
+    Current description: {description}
+
+    Key sentences from the post:
+    {excerpt}
+    """,
+    params={"title": str, "max_chars": int, "description": str, "excerpt": str},
+    optional=("title",),
+))
+
+SLUG = PROMPTS.register(PromptTemplate(
+    "slug", 1, "slug",
+    """
+    Convert this blog post title into a URL-friendly slug:
+
+    Title: {title}
+
+    Rules:
+    1. Use lowercase
+    2. Replace spaces with hyphens
+    3. Remove special characters
+    4. Keep it concise
+    5. Make it SEO-friendly
+    """,
+    params={"title": str},
+))
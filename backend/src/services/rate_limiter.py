@@ -0,0 +1,225 @@
+"""
+Token-bucket rate limiting for endpoints that spend Gemini quota.
+
+Each caller draws from one or more buckets: a signed-in user from a bucket
+keyed by uid, whose tier depends on the sign-in provider, and an anonymous
+session from its own bucket plus one shared by every anonymous session from
+the same client IP. The IP bucket stops a client from getting more budget by
+minting fresh anonymous tokens. A request is admitted only if every one of
+its buckets has a token, and it then takes one from each.
+
+The default store keeps buckets in process memory, split into shards with
+their own locks, so a rejected request costs a few microseconds and never
+reaches Gemini. `SQLiteRateLimitStore` shares the buckets between the workers
+on one host.
+"""
+import math
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+ANONYMOUS = "anonymous"
+ANONYMOUS_IP = "anonymous_ip"
+AUTHENTICATED = "authenticated"
+
+
+@dataclass(frozen=True)
+class RateLimitTier:
+    name: str
+    burst: int  # bucket capacity
+    per_hour: float  # refill rate
+
+    @classmethod
+    def from_setting(cls, name: str, value: Mapping[str, Any]) -> "RateLimitTier":
+        tier = cls(name=name, burst=int(value["burst"]), per_hour=float(value["per_hour"]))
+        if tier.burst < 1 or tier.per_hour <= 0:
+            raise ValueError(f"Rate limit tier '{name}' needs burst >= 1 and per_hour > 0")
+        return tier
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.per_hour / 3600
+
+
+Bucket = Tuple[str, RateLimitTier]
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request finds one of its buckets empty."""
+
+    def __init__(self, tier: str, retry_after: float):
+        super().__init__(f"Rate limit '{tier}' exceeded; retry in {math.ceil(retry_after)}s")
+        self.tier = tier
+        self.retry_after = retry_after
+
+
+def _refill(tokens: float, updated: float, now: float, tier: RateLimitTier) -> float:
+    return min(float(tier.burst), tokens + max(0.0, now - updated) * tier.refill_per_second)
+
+
+def _wait(tokens: float, cost: float, tier: RateLimitTier) -> float:
+    """Seconds until the bucket holds `cost` tokens (0 if it already does)."""
+    if tokens >= cost:
+        return 0.0
+    return (cost - tokens) / tier.refill_per_second
+
+
+class RateLimitStore:
+    """Interface for bucket storage.
+
+    `take` must be atomic over all the buckets it is given: either each of
+    them loses `cost` tokens, or none changes.
+    """
+
+    async def take(self, buckets: Sequence[Bucket], cost: float = 1.0) -> Tuple[str, float]:
+        """Take `cost` tokens from every bucket.
+
+        Returns ("", 0.0) on success, otherwise the tier of the bucket that
+        refills last and the seconds until it has enough tokens.
+        """
+        raise NotImplementedError
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """Per-process buckets in `shards` LRU maps, each with its own lock.
+
+    Only buckets that were drawn from are stored. Once a shard holds its share
+    of `max_keys`, the least recently used bucket is dropped; it comes back
+    full, which is what an idle caller would have found anyway.
+    """
+
+    def __init__(self, shards: int = 16, max_keys: int = 100_000):
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(max(1, shards))]
+        self.max_keys_per_shard = max(1, max_keys // len(self._shards))
+
+    def _shard(self, key: str) -> int:
+        return zlib.crc32(key.encode()) % len(self._shards)
+
+    async def take(self, buckets: Sequence[Bucket], cost: float = 1.0) -> Tuple[str, float]:
+        # Lock every shard involved, in index order so concurrent takes can't deadlock
+        indexes = sorted({self._shard(key) for key, _ in buckets})
+        locks = [self._shards[i][0] for i in indexes]
+        for lock in locks:
+            lock.acquire()
+        try:
+            now = time.monotonic()
+            levels: List[float] = []
+            tier, wait = "", 0.0
+            for key, bucket_tier in buckets:
+                stored = self._shards[self._shard(key)][1].get(key)
+                tokens = _refill(*stored, now, bucket_tier) if stored else float(bucket_tier.burst)
+                levels.append(tokens)
+                bucket_wait = _wait(tokens, cost, bucket_tier)
+                if bucket_wait > wait:
+                    tier, wait = bucket_tier.name, bucket_wait
+            if wait:
+                return tier, wait
+            for (key, _), tokens in zip(buckets, levels):
+                shard = self._shards[self._shard(key)][1]
+                shard[key] = (tokens - cost, now)
+                shard.move_to_end(key)
+                while len(shard) > self.max_keys_per_shard:
+                    shard.popitem(last=False)
+            return "", 0.0
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+
+class SQLiteRateLimitStore(RateLimitStore):
+    """Buckets shared by all workers on one host, in a SQLite file.
+
+    Each take is one IMMEDIATE transaction, so workers serialize on the file
+    lock. That adds well under a millisecond per request, which is cheap next
+    to a Gemini call but much slower than the in-memory store.
+    """
+
+    def __init__(self, path: str, idle_seconds: float = 86400.0):
+        self.path = path
+        self.idle_seconds = idle_seconds  # rows untouched this long are pruned
+        self._lock = threading.Lock()
+        self._takes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+
+    async def take(self, buckets: Sequence[Bucket], cost: float = 1.0) -> Tuple[str, float]:
+        keys = [key for key, _ in buckets]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                rows = self._conn.execute(
+                    f"SELECT key, tokens, updated_at FROM rate_limit_buckets WHERE key IN ({','.join('?' * len(keys))})",
+                    keys,
+                ).fetchall()
+                stored: Dict[str, Tuple[float, float]] = {key: (tokens, updated) for key, tokens, updated in rows}
+                levels: List[float] = []
+                tier, wait = "", 0.0
+                for key, bucket_tier in buckets:
+                    tokens = _refill(*stored[key], now, bucket_tier) if key in stored else float(bucket_tier.burst)
+                    levels.append(tokens)
+                    bucket_wait = _wait(tokens, cost, bucket_tier)
+                    if bucket_wait > wait:
+                        tier, wait = bucket_tier.name, bucket_wait
+                if not wait:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                        [(key, tokens - cost, now) for key, tokens in zip(keys, levels)],
+                    )
+                    self._takes += 1
+                    # Amortize cleanup over one in a thousand admitted requests
+                    if self._takes % 1000 == 0:
+                        self._conn.execute("DELETE FROM rate_limit_buckets WHERE updated_at < ?",
+                                           (now - self.idle_seconds,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return tier, wait
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RateLimiter:
+    """Maps a caller to its buckets and admits or rejects a request."""
+
+    def __init__(self, store: RateLimitStore, tiers: Mapping[str, Mapping[str, Any]]):
+        missing = [name for name in (ANONYMOUS, ANONYMOUS_IP, AUTHENTICATED) if name not in tiers]
+        if missing:
+            raise ValueError(f"Missing rate limit tiers: {', '.join(missing)}")
+        self.store = store
+        self.tiers = {name: RateLimitTier.from_setting(name, value) for name, value in tiers.items()}
+
+    def buckets(self, scope: str, user: Mapping[str, Any], client_ip: str) -> List[Bucket]:
+        """The buckets a request from `user` at `client_ip` draws from.
+
+        Signed-in users get the tier named after their sign-in provider if one
+        is configured (e.g. "password", "google.com"), else "authenticated".
+        """
+        uid = user.get("uid") or ""
+        provider = (user.get("firebase") or {}).get("sign_in_provider") or ""
+        if provider == ANONYMOUS or not uid:
+            return [
+                (f"{scope}:anon:{uid}", self.tiers[ANONYMOUS]),
+                (f"{scope}:ip:{client_ip}", self.tiers[ANONYMOUS_IP]),
+            ]
+        return [(f"{scope}:user:{uid}", self.tiers.get(provider) or self.tiers[AUTHENTICATED])]
+
+    async def check(self, scope: str, user: Mapping[str, Any], client_ip: str, cost: float = 1.0) -> None:
+        """Take `cost` tokens (at most the smallest burst) for the request or raise RateLimitExceeded."""
+        tier, wait = await self.store.take(self.buckets(scope, user, client_ip), cost)
+        if wait:
+            raise RateLimitExceeded(tier, wait)
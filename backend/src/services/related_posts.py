@@ -0,0 +1,278 @@
+"""
+Related posts from hashed n-gram vectors and a precomputed neighbour table.
+
+Every post is embedded as an L2-normalized vector of signed, hashed unigram and
+bigram counts (no vocabulary is stored). Vectors sit in one float32 matrix, and
+a top-k table holds each post's most similar published posts, so reads are a
+row lookup. A write recomputes only the rows it affects: the written post's
+own row, rows whose k-th neighbour it now beats (patched in place), and rows
+that lost it as a neighbour (recomputed together in one matrix product).
+"""
+import logging
+import os
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..models.blog_post import BlogPost
+from .tag_index import extract_terms
+
+logger = logging.getLogger(__name__)
+
+EMPTY = -1
+
+
+@dataclass
+class RelatedPost:
+    post_id: str
+    title: str
+    slug: str
+    score: float
+
+
+class RelatedPostsIndex:
+    """Top-k cosine neighbours among published posts, maintained incrementally."""
+
+    def __init__(self, dimensions: int = 512, k: int = 10, block_size: int = 256):
+        if dimensions & (dimensions - 1):
+            raise ValueError("dimensions must be a power of two")
+        self.dimensions = dimensions
+        self.k = k
+        self.block_size = block_size
+        self._allocate(64)
+        self._ids: List[Optional[str]] = []
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._meta: Dict[int, Tuple[str, str]] = {}  # slot -> (title, slug)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _allocate(self, capacity: int) -> None:
+        self._vectors = np.zeros((capacity, self.dimensions), dtype=np.float32)
+        self._live = np.zeros(capacity, dtype=bool)
+        self._published = np.zeros(capacity, dtype=bool)
+        self._neighbours = np.full((capacity, self.k), EMPTY, dtype=np.int32)
+        self._scores = np.full((capacity, self.k), -np.inf, dtype=np.float32)
+
+    def _grow(self) -> None:
+        old = (self._vectors, self._live, self._published, self._neighbours, self._scores)
+        self._allocate(len(self._vectors) * 2)
+        n = len(old[0])
+        self._vectors[:n], self._live[:n], self._published[:n], self._neighbours[:n], self._scores[:n] = old
+
+    def vectorize(self, title: str, content: str) -> np.ndarray:
+        """Signed feature hashing of unigram and bigram counts; title terms count double."""
+        counts = extract_terms(content)
+        counts.update({term: 2 * count for term, count in extract_terms(title).items()})
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        if not counts:
+            return vector
+        hashes = np.fromiter((zlib.crc32(term.encode()) for term in counts), dtype=np.uint32, count=len(counts))
+        weights = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+        signs = np.where(hashes >> np.uint32(31), -1.0, 1.0).astype(np.float32)
+        np.add.at(vector, hashes & np.uint32(self.dimensions - 1), signs * weights)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _top_k(self, similarities: np.ndarray, exclude: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Row-wise top-k over a (rows, n) similarity block; `exclude` masks entries out."""
+        similarities = np.where(exclude, -np.inf, similarities).astype(np.float32)
+        rows, n = similarities.shape
+        neighbours = np.full((rows, self.k), EMPTY, dtype=np.int32)
+        scores = np.full((rows, self.k), -np.inf, dtype=np.float32)
+        if n == 0:
+            return neighbours, scores
+        k = min(self.k, n)
+        top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(similarities, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top, top_scores = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+        valid = np.isfinite(top_scores)
+        neighbours[:, :k] = np.where(valid, top, EMPTY)
+        scores[:, :k] = top_scores
+        return neighbours, scores
+
+    def _recompute_rows(self, rows: np.ndarray, n: int) -> None:
+        if len(rows) == 0:
+            return
+        not_candidate = ~self._published[:n]
+        for start in range(0, len(rows), self.block_size):
+            block = rows[start:start + self.block_size]
+            similarities = self._vectors[block] @ self._vectors[:n].T
+            exclude = not_candidate[None, :] | (np.arange(n)[None, :] == block[:, None])
+            self._neighbours[block], self._scores[block] = self._top_k(similarities, exclude)
+
+    def _insert_neighbour(self, row: int, slot: int, score: float) -> None:
+        """Put `slot` into `row`'s list (which must not contain it), dropping the weakest entry."""
+        position = int(np.searchsorted(-self._scores[row], -score, side="right"))
+        if position >= self.k:
+            return
+        self._neighbours[row, position + 1:] = self._neighbours[row, position:-1].copy()
+        self._scores[row, position + 1:] = self._scores[row, position:-1].copy()
+        self._neighbours[row, position] = slot
+        self._scores[row, position] = score
+
+    def add(self, post: BlogPost) -> None:
+        """Index `post` (or re-index a changed one) and patch the affected neighbour rows."""
+        vector = self.vectorize(post.title, post.content)
+        with self._lock:
+            slot = self._slots.get(post.id)
+            if slot is None:
+                if self._free:
+                    slot = self._free.pop()
+                else:
+                    slot = len(self._ids)
+                    self._ids.append(None)
+                    if slot >= len(self._vectors):
+                        self._grow()
+                self._ids[slot] = post.id
+                self._slots[post.id] = slot
+            self._vectors[slot] = vector
+            self._live[slot] = True
+            self._published[slot] = post.status == "published"
+            self._meta[slot] = (post.title, post.slug)
+            self._update_rows(slot)
+
+    def _update_rows(self, slot: int) -> None:
+        n = len(self._ids)
+        similarities = self._vectors[:n] @ self._vectors[slot]
+
+        # The written post's own row
+        exclude = ~self._published[:n]
+        exclude[slot] = True
+        neighbours, scores = self._top_k(similarities[None, :], exclude[None, :])
+        self._neighbours[slot], self._scores[slot] = neighbours[0], scores[0]
+
+        contains = (self._neighbours[:n] == slot).any(axis=1)
+        contains[slot] = False
+        others = self._live[:n].copy()
+        others[slot] = False
+        if self._published[slot]:
+            kth = self._scores[:n, -1]
+            # Everything missing from a row scores at most its k-th entry, so a row
+            # that lists the post stays exact as long as the new score clears it
+            still_in = contains & (similarities >= kth)
+            recompute = contains & ~still_in
+            for row in np.flatnonzero(still_in).tolist():
+                self._remove_neighbour(row, slot)
+                self._insert_neighbour(row, slot, float(similarities[row]))
+            for row in np.flatnonzero(others & ~contains & (similarities > kth)).tolist():
+                self._insert_neighbour(row, slot, float(similarities[row]))
+        else:
+            # Unpublished posts are never anyone's neighbour
+            recompute = contains
+        self._recompute_rows(np.flatnonzero(recompute), n)
+
+    def _remove_neighbour(self, row: int, slot: int) -> None:
+        keep = self._neighbours[row] != slot
+        count = int(keep.sum())
+        self._neighbours[row, :count] = self._neighbours[row, keep]
+        self._scores[row, :count] = self._scores[row, keep]
+        self._neighbours[row, count:] = EMPTY
+        self._scores[row, count:] = -np.inf
+
+    def remove(self, post_id: str) -> None:
+        with self._lock:
+            slot = self._slots.pop(post_id, None)
+            if slot is None:
+                return
+            self._ids[slot] = None
+            self._meta.pop(slot, None)
+            self._vectors[slot] = 0.0
+            self._live[slot] = False
+            self._published[slot] = False
+            self._neighbours[slot] = EMPTY
+            self._scores[slot] = -np.inf
+            self._free.append(slot)
+            n = len(self._ids)
+            self._recompute_rows(np.flatnonzero((self._neighbours[:n] == slot).any(axis=1)), n)
+
+    def related(self, post_id: str, limit: Optional[int] = None) -> Optional[List[RelatedPost]]:
+        """The precomputed neighbours of `post_id`, best first; None if it isn't indexed."""
+        with self._lock:
+            slot = self._slots.get(post_id)
+            if slot is None:
+                return None
+            results = []
+            for neighbour, score in zip(self._neighbours[slot].tolist(), self._scores[slot].tolist()):
+                if neighbour == EMPTY or score <= 0:
+                    break
+                title, slug = self._meta[neighbour]
+                results.append(RelatedPost(self._ids[neighbour], title, slug, round(score, 4)))
+        return results[:limit] if limit else results
+
+    def rebuild(self, posts: Iterable[BlogPost]) -> None:
+        """Replace the index with `posts`, computing every neighbour row in blocks."""
+        with self._lock:
+            self._allocate(64)
+            self._ids, self._slots, self._free, self._meta = [], {}, [], {}
+            for post in posts:
+                self._stage(post)
+            self._recompute_rows(np.arange(len(self._ids)), len(self._ids))
+
+    def stage(self, post: BlogPost) -> None:
+        """Bulk load: store a new post's vector without updating any neighbour rows.
+
+        Only the vector and title/slug are kept, so a whole archive can be
+        streamed in; call finish_staging() after the last post.
+        """
+        with self._lock:
+            if post.id not in self._slots:
+                self._stage(post)
+
+    def finish_staging(self) -> None:
+        """Compute every neighbour row for the posts staged so far."""
+        with self._lock:
+            self._recompute_rows(np.flatnonzero(self._live[:len(self._ids)]), len(self._ids))
+
+    def _stage(self, post: BlogPost) -> None:
+        slot = len(self._ids)
+        if slot >= len(self._vectors):
+            self._grow()
+        self._ids.append(post.id)
+        self._slots[post.id] = slot
+        self._vectors[slot] = self.vectorize(post.title, post.content)
+        self._live[slot] = True
+        self._published[slot] = post.status == "published"
+        self._meta[slot] = (post.title, post.slug)
+
+    def save(self, path: str) -> None:
+        """Write vectors, neighbour table and metadata to `path` (a .npz file) atomically."""
+        with self._lock:
+            n = len(self._ids)
+            ids = np.array([post_id or "" for post_id in self._ids], dtype=str)
+            meta = np.array([self._meta.get(slot, ("", "")) for slot in range(n)], dtype=str).reshape(-1, 2)
+            arrays = dict(ids=ids, meta=meta, vectors=self._vectors[:n], published=self._published[:n],
+                          neighbours=self._neighbours[:n], scores=self._scores[:n])
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)
+        logger.info("Saved related posts index with %d posts to %s", len(self), path)
+
+    @classmethod
+    def load(cls, path: str, dimensions: int = 512, k: int = 10) -> "RelatedPostsIndex":
+        with np.load(path) as data:
+            n, file_dimensions = data["vectors"].shape
+            file_k = data["neighbours"].shape[1]
+            if (file_dimensions, file_k) != (dimensions, k):
+                raise ValueError("Related posts index file was built with different dimensions or k")
+            index = cls(dimensions=dimensions, k=k)
+            capacity = max(64, 1 << int(np.ceil(np.log2(n + 1))))
+            index._allocate(capacity)
+            index._vectors[:n] = data["vectors"]
+            index._published[:n] = data["published"]
+            index._live[:n] = data["ids"] != ""
+            index._neighbours[:n] = data["neighbours"]
+            index._scores[:n] = data["scores"]
+            index._ids = [post_id or None for post_id in data["ids"].tolist()]
+            index._slots = {post_id: slot for slot, post_id in enumerate(index._ids) if post_id}
+            index._free = [slot for slot, post_id in enumerate(index._ids) if not post_id]
+            index._meta = {slot: tuple(row) for slot, row in enumerate(data["meta"].tolist()) if index._ids[slot]}
+        logger.info("Loaded related posts index with %d posts from %s", len(index), path)
+        return index
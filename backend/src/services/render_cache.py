@@ -0,0 +1,181 @@
+"""
+Rendered HTML for posts, cached by content hash.
+
+The key is a hash of the renderer version and the markdown (see
+utils/rendering.py), so a post is rendered once per version of its content
+and per renderer version, and a stale entry can never be served: editing a
+post or changing the renderer simply produces a new key.
+
+Entries are kept in a process-local LRU bounded by size. With the Firestore
+backend they are also written to a `rendered_content` collection, so HTML
+rendered by one worker, or precomputed when the post was saved, is served by
+every other worker without rendering it again. Rendering and the store's
+Firestore reads and writes run in worker threads so a long article or a
+slow round trip doesn't stall the event loop.
+"""
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Mapping, Optional, Sequence
+
+from ..utils.rendering import RENDERER_VERSION, content_key, render_html
+
+logger = logging.getLogger(__name__)
+
+
+class RenderStore:
+    """Interface for shared rendered-HTML storage."""
+
+    async def get_many(self, keys: Sequence[str]) -> Dict[str, str]:
+        """HTML for the keys that are stored."""
+        raise NotImplementedError
+
+    async def put_many(self, entries: Mapping[str, str]) -> None:
+        raise NotImplementedError
+
+
+class FirestoreRenderStore(RenderStore):
+    """HTML in a `rendered_content` collection, one document per key.
+
+    Documents record the renderer version that produced them, so the re-render
+    job can delete entries left behind by earlier versions.
+    """
+
+    BATCH = 500  # Firestore batch limit
+    MAX_HTML_BYTES = 900_000  # documents are limited to 1 MiB
+
+    def __init__(self, db, collection: str = "rendered_content"):
+        self.db = db
+        self.collection = db.collection(collection)
+
+    def _get_many(self, keys: Sequence[str]) -> Dict[str, str]:
+        refs = [self.collection.document(key) for key in keys]
+        found = {}
+        for snapshot in self.db.get_all(refs):
+            if snapshot.exists:
+                found[snapshot.id] = snapshot.to_dict()["html"]
+        return found
+
+    def _put_many(self, entries: Mapping[str, str]) -> None:
+        items = [(key, html) for key, html in entries.items() if len(html.encode()) <= self.MAX_HTML_BYTES]
+        for start in range(0, len(items), self.BATCH):
+            batch = self.db.batch()
+            for key, html in items[start:start + self.BATCH]:
+                batch.set(self.collection.document(key), {
+                    "html": html,
+                    "renderer_version": RENDERER_VERSION,
+                    "created_at": datetime.utcnow(),
+                })
+            batch.commit()
+
+    def _prune(self, before_version: int) -> int:
+        deleted = 0
+        while True:
+            docs = list(self.collection.where("renderer_version", "<", before_version).limit(self.BATCH).stream())
+            if not docs:
+                return deleted
+            batch = self.db.batch()
+            for doc in docs:
+                batch.delete(doc.reference)
+            batch.commit()
+            deleted += len(docs)
+
+    # Firestore calls are synchronous; run them off the event loop
+
+    async def get_many(self, keys: Sequence[str]) -> Dict[str, str]:
+        return await asyncio.to_thread(self._get_many, keys)
+
+    async def put_many(self, entries: Mapping[str, str]) -> None:
+        await asyncio.to_thread(self._put_many, entries)
+
+    async def prune(self, before_version: int = RENDERER_VERSION) -> int:
+        """Delete entries rendered by renderer versions older than `before_version`."""
+        return await asyncio.to_thread(self._prune, before_version)
+
+
+class RenderCache:
+    """Size-bounded LRU of rendered HTML in front of an optional shared store."""
+
+    def __init__(self, store: Optional[RenderStore] = None, max_bytes: int = 64 * 1024 * 1024,
+                 render: Callable[[str], str] = render_html):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.render = render
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._size = 0  # characters held, a close proxy for bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.store_hits = 0
+        self.renders = 0
+
+    def _get_local(self, key: str) -> Optional[str]:
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+            return html
+
+    def _put_local(self, key: str, html: str) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = html
+            self._size += len(html)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    async def html_many(self, contents: Sequence[str]) -> List[str]:
+        """Rendered HTML for each markdown document, in order.
+
+        Local misses are looked up in the store with one batched read; only
+        what neither has is rendered (in one worker thread) and stored.
+        """
+        keys = [content_key(content) for content in contents]
+        found: Dict[str, str] = {}
+        missing: Dict[str, str] = {}
+        for key, content in zip(keys, contents):
+            html = found.get(key) or self._get_local(key)
+            if html is not None:
+                found[key] = html
+                self.hits += 1
+            else:
+                missing[key] = content
+
+        if missing and self.store is not None:
+            try:
+                stored = await self.store.get_many(list(missing))
+            except Exception as e:
+                logger.warning("Failed to read rendered HTML from the store: %s", e)
+                stored = {}
+            for key, html in stored.items():
+                self._put_local(key, html)
+                found[key] = html
+                missing.pop(key, None)
+            self.store_hits += len(stored)
+
+        if missing:
+            rendered = await asyncio.to_thread(lambda: {key: self.render(content) for key, content in missing.items()})
+            self.renders += len(rendered)
+            for key, html in rendered.items():
+                self._put_local(key, html)
+            found.update(rendered)
+            if self.store is not None:
+                try:
+                    await self.store.put_many(rendered)
+                except Exception as e:
+                    logger.warning("Failed to store rendered HTML: %s", e)
+        return [found[key] for key in keys]
+
+    async def html(self, content: str) -> str:
+        return (await self.html_many([content]))[0]
+
+    async def precompute(self, content: str) -> None:
+        """Render and store `content` ahead of its first HTML read (run after a write)."""
+        try:
+            await self.html(content)
+        except Exception as e:
+            logger.warning("Failed to precompute rendered HTML: %s", e)
@@ -0,0 +1,203 @@
+"""
+Failure isolation for calls to slow upstream services (Gemini).
+
+`CircuitBreaker` watches the outcome and duration of recent calls. When too
+many of them fail or run slow it opens and rejects calls immediately with
+`CircuitOpenError` instead of letting them wait for the upstream timeout; after
+a cool-down it lets a few probe calls through (half-open) and closes again if
+they succeed.
+
+`Hedger` runs a second attempt of a call once the first has been outstanding
+longer than a delay (the rolling p95 from `LatencyTracker`) and keeps
+whichever finishes first, trimming the latency tail for a bounded number of
+extra calls.
+"""
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the upstream while the circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable; retry in {math.ceil(retry_after)}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Count-based circuit breaker over the last `window` calls.
+
+    Opens when, with at least `min_calls` recorded, the failure rate reaches
+    `failure_rate` or the share of calls slower than `slow_call_seconds`
+    reaches `slow_call_rate`. Stays open for `open_seconds`, then admits up to
+    `half_open_calls` concurrent probes: one failure reopens it, and that many
+    successes close it.
+    """
+
+    def __init__(self, name: str = "upstream", window: int = 20, min_calls: int = 10,
+                 failure_rate: float = 0.5, slow_call_seconds: float = 45.0, slow_call_rate: float = 0.8,
+                 open_seconds: float = 30.0, half_open_calls: int = 1):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self._calls: Deque[Tuple[bool, bool]] = deque(maxlen=window)  # (failed, slow)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def before_call(self) -> None:
+        """Admit a call or raise CircuitOpenError."""
+        with self._lock:
+            if self._state == OPEN:
+                remaining = self.open_seconds - (time.monotonic() - self._opened_at)
+                if remaining > 0:
+                    raise CircuitOpenError(self.name, remaining)
+                self._state = HALF_OPEN
+                self._probes = 0
+                self._probe_successes = 0
+            if self._state == HALF_OPEN:
+                if self._probes >= self.half_open_calls:
+                    raise CircuitOpenError(self.name, 1.0)
+                self._probes += 1
+
+    def record(self, succeeded: bool, duration: float) -> None:
+        slow = duration >= self.slow_call_seconds
+        with self._lock:
+            if self._state == HALF_OPEN:
+                if not succeeded or slow:
+                    self._open()
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_calls:
+                    self._state = CLOSED
+                    self._calls.clear()
+                return
+            if self._state == OPEN:
+                # A call admitted before the circuit opened
+                return
+            self._calls.append((not succeeded, slow))
+            if len(self._calls) >= self.min_calls:
+                failures = sum(failed for failed, _ in self._calls) / len(self._calls)
+                slow_calls = sum(is_slow for _, is_slow in self._calls) / len(self._calls)
+                if failures >= self.failure_rate or slow_calls >= self.slow_call_rate:
+                    self._open()
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._calls.clear()
+
+    async def call(self, func: Callable[[], Awaitable[T]]) -> T:
+        """Run `func` under the breaker, recording its outcome and duration."""
+        self.before_call()
+        started = time.monotonic()
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            # The caller went away; that says nothing about the upstream, but a
+            # half-open probe slot must be given back
+            with self._lock:
+                if self._state == HALF_OPEN:
+                    self._probes = max(0, self._probes - 1)
+            raise
+        except Exception:
+            self.record(False, time.monotonic() - started)
+            raise
+        self.record(True, time.monotonic() - started)
+        return result
+
+
+class LatencyTracker:
+    """Rolling window of successful call durations."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """The q-th percentile (0-100), or None until `min_samples` calls were seen."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(math.ceil(q / 100 * len(ordered))) - 1)]
+
+
+def _consume_result(task: asyncio.Future) -> None:
+    # Keeps abandoned attempts from logging "exception was never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+class Hedger:
+    """Second attempts for slow calls, with at most `max_in_flight` hedges at once."""
+
+    def __init__(self, max_in_flight: int = 4):
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.hedged = 0  # second attempts started
+        self.won = 0  # second attempts that finished first
+
+    async def run(self, call: Callable[[], Awaitable[T]], delay: Optional[float]) -> T:
+        """Await `call()`; if it takes longer than `delay`, race it against a second `call()`."""
+        if delay is None:
+            return await call()
+        first = asyncio.ensure_future(call())
+        first.add_done_callback(_consume_result)
+        try:
+            done, _ = await asyncio.wait({first}, timeout=delay)
+            if done or self.in_flight >= self.max_in_flight:
+                return await first
+        except BaseException:
+            first.cancel()
+            raise
+
+        self.in_flight += 1
+        self.hedged += 1
+        second = asyncio.ensure_future(call())
+        second.add_done_callback(_consume_result)
+        try:
+            pending = {first, second}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.won += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            self.in_flight -= 1
+            for task in (first, second):
+                if not task.done():
+                    task.cancel()
@@ -0,0 +1,286 @@
+"""
+Revision history for posts, stored as compressed line deltas.
+
+Every save of a post appends a revision to its `revisions` subcollection.
+Most revisions hold only a delta against the previous revision's content
+(see utils/delta.py), so an autosave that touches one paragraph of a 50 KB
+article stores and sends a few hundred bytes. A revision holds a full
+compressed snapshot instead when:
+
+- it is the first revision, or the delta chain since the last snapshot has
+  reached `snapshot_every` revisions, so rebuilding any revision reads at
+  most that many documents;
+- the delta would be larger than the snapshot (the content was rewritten);
+- the caller's previous content doesn't match the latest revision (the post
+  was changed without going through here), so there is nothing to diff
+  against safely.
+
+The editable fields other than `content` are small and are stored whole in
+every revision, with datetimes as naive-UTC ISO strings so they compare equal
+however the store hands them back. Revision numbers are document ids, created with a
+precondition, so two concurrent saves can't claim the same number.
+"""
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from ..models.blog_post import BlogPost
+from ..models.revision import RevisionDetail, RevisionInfo
+from ..utils.delta import apply_delta, compress_text, decode_delta, decompress_text, encode_delta, line_delta
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT = "snapshot"
+DELTA = "delta"
+# Stored whole with every revision; restore brings back all but the publishing fields
+REVISION_FIELDS = ("title", "slug", "status", "tags", "category", "featured_image", "meta_description",
+                   "published_at", "scheduled_for")
+RESTORED_FIELDS = ("title", "slug", "tags", "category", "featured_image", "meta_description")
+INFO_FIELDS = ("number", "kind", "base", "source", "author_id", "created_at", "content_length",
+               "stored_bytes", "restored_from", "fields")
+
+
+class RevisionError(Exception):
+    """Raised when a revision can't be rebuilt from what is stored."""
+
+
+def content_hash(content: str) -> str:
+    return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+
+def _field_value(value: Any) -> Any:
+    # Firestore returns datetimes tz-aware; the models hold naive UTC
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.isoformat()
+    return value
+
+
+def _fields(post: BlogPost) -> Dict[str, Any]:
+    return {name: _field_value(getattr(post, name)) for name in REVISION_FIELDS}
+
+
+class RevisionStore:
+    """Interface for per-post revision records (plain dicts)."""
+
+    async def head(self, post_id: str) -> Optional[Dict[str, Any]]:
+        """The latest revision, or None."""
+        raise NotImplementedError
+
+    async def add(self, post_id: str, record: Dict[str, Any]) -> bool:
+        """Store `record` unless its number is taken; returns whether it was stored."""
+        raise NotImplementedError
+
+    async def get(self, post_id: str, number: int) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def range(self, post_id: str, start: int, end: int) -> List[Dict[str, Any]]:
+        """Revisions start..end inclusive, oldest first."""
+        raise NotImplementedError
+
+    async def list(self, post_id: str, limit: int, before: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Newest first, without the stored content (`data`)."""
+        raise NotImplementedError
+
+    async def delete_all(self, post_id: str) -> int:
+        raise NotImplementedError
+
+
+class InMemoryRevisionStore(RevisionStore):
+    """Per-process revisions, for tests and local runs."""
+
+    def __init__(self):
+        self._posts: Dict[str, Dict[int, Dict[str, Any]]] = {}
+
+    async def head(self, post_id: str) -> Optional[Dict[str, Any]]:
+        revisions = self._posts.get(post_id)
+        return dict(revisions[max(revisions)]) if revisions else None
+
+    async def add(self, post_id: str, record: Dict[str, Any]) -> bool:
+        revisions = self._posts.setdefault(post_id, {})
+        if record["number"] in revisions:
+            return False
+        revisions[record["number"]] = dict(record)
+        return True
+
+    async def get(self, post_id: str, number: int) -> Optional[Dict[str, Any]]:
+        record = self._posts.get(post_id, {}).get(number)
+        return dict(record) if record else None
+
+    async def range(self, post_id: str, start: int, end: int) -> List[Dict[str, Any]]:
+        revisions = self._posts.get(post_id, {})
+        return [dict(revisions[n]) for n in sorted(revisions) if start <= n <= end]
+
+    async def list(self, post_id: str, limit: int, before: Optional[int] = None) -> List[Dict[str, Any]]:
+        revisions = self._posts.get(post_id, {})
+        numbers = [n for n in sorted(revisions, reverse=True) if before is None or n < before][:limit]
+        return [{name: revisions[n].get(name) for name in INFO_FIELDS} for n in numbers]
+
+    async def delete_all(self, post_id: str) -> int:
+        return len(self._posts.pop(post_id, {}))
+
+
+class FirestoreRevisionStore(RevisionStore):
+    """Revisions in `blog_posts/{post_id}/revisions`, one document per revision.
+
+    Document ids are the zero-padded revision number and are written with
+    `create`, which fails if the id exists. Listing projects away the stored
+    content, so it reads only a few hundred bytes per revision. Firestore calls
+    are synchronous, so each method runs them in a worker thread.
+    """
+
+    BATCH = 500  # Firestore batch limit
+
+    def __init__(self, db, posts_collection: str = "blog_posts", collection: str = "revisions"):
+        self.db = db
+        self.posts = db.collection(posts_collection)
+        self.collection_name = collection
+
+    def _revisions(self, post_id: str):
+        return self.posts.document(post_id).collection(self.collection_name)
+
+    @staticmethod
+    def _doc_id(number: int) -> str:
+        return f"{number:08d}"
+
+    async def head(self, post_id: str) -> Optional[Dict[str, Any]]:
+        from google.cloud import firestore
+
+        query = self._revisions(post_id).order_by("number", direction=firestore.Query.DESCENDING).limit(1)
+        docs = await asyncio.to_thread(lambda: list(query.stream()))
+        return docs[0].to_dict() if docs else None
+
+    async def add(self, post_id: str, record: Dict[str, Any]) -> bool:
+        from google.api_core.exceptions import AlreadyExists
+
+        try:
+            await asyncio.to_thread(self._revisions(post_id).document(self._doc_id(record["number"])).create, record)
+        except AlreadyExists:
+            return False
+        return True
+
+    async def get(self, post_id: str, number: int) -> Optional[Dict[str, Any]]:
+        doc = await asyncio.to_thread(self._revisions(post_id).document(self._doc_id(number)).get)
+        return doc.to_dict() if doc.exists else None
+
+    async def range(self, post_id: str, start: int, end: int) -> List[Dict[str, Any]]:
+        query = (self._revisions(post_id).where("number", ">=", start).where("number", "<=", end)
+                 .order_by("number"))
+        return await asyncio.to_thread(lambda: [doc.to_dict() for doc in query.stream()])
+
+    async def list(self, post_id: str, limit: int, before: Optional[int] = None) -> List[Dict[str, Any]]:
+        from google.cloud import firestore
+
+        query = self._revisions(post_id)
+        if before is not None:
+            query = query.where("number", "<", before)
+        query = query.order_by("number", direction=firestore.Query.DESCENDING).select(INFO_FIELDS).limit(limit)
+        return await asyncio.to_thread(lambda: [doc.to_dict() for doc in query.stream()])
+
+    async def delete_all(self, post_id: str) -> int:
+        def delete_all() -> int:
+            deleted = 0
+            while True:
+                docs = list(self._revisions(post_id).limit(self.BATCH).stream())
+                if not docs:
+                    return deleted
+                batch = self.db.batch()
+                for doc in docs:
+                    batch.delete(doc.reference)
+                batch.commit()
+                deleted += len(docs)
+
+        return await asyncio.to_thread(delete_all)
+
+
+@dataclass
+class RevisionHistory:
+    store: RevisionStore
+    snapshot_every: int = 20  # longest delta chain, counting the snapshot it starts from
+
+    def _record(self, post: BlogPost, head: Optional[Dict[str, Any]], previous_content: Optional[str],
+                author_id: str, source: str, restored_from: Optional[int]) -> Dict[str, Any]:
+        number = head["number"] + 1 if head else 1
+        snapshot = compress_text(post.content)
+        kind, base, data = SNAPSHOT, number, snapshot
+        if (head is not None and previous_content is not None
+                and number - head["base"] < self.snapshot_every
+                and head["content_hash"] == content_hash(previous_content)):
+            delta = encode_delta(line_delta(previous_content, post.content))
+            if len(delta) < len(snapshot):
+                kind, base, data = DELTA, head["base"], delta
+        return {
+            "number": number,
+            "kind": kind,
+            "base": base,
+            "data": data,
+            "content_hash": content_hash(post.content),
+            "content_length": len(post.content),
+            "stored_bytes": len(data),
+            "fields": _fields(post),
+            "source": source,
+            "author_id": author_id,
+            "restored_from": restored_from,
+            "created_at": datetime.utcnow(),
+        }
+
+    async def record(self, post: BlogPost, previous_content: Optional[str], author_id: str, source: str,
+                     restored_from: Optional[int] = None) -> Optional[RevisionInfo]:
+        """Append the saved state of `post` as a new revision.
+
+        `previous_content` is the content the save replaced (None for a new
+        post). Returns None, storing nothing, when neither the content nor the
+        other fields changed since the latest revision.
+        """
+        for _ in range(3):
+            head = await self.store.head(post.id)
+            if (head is not None and head["content_hash"] == content_hash(post.content)
+                    and {name: _field_value(value) for name, value in head["fields"].items()} == _fields(post)):
+                return None
+            record = self._record(post, head, previous_content, author_id, source, restored_from)
+            if await self.store.add(post.id, record):
+                logger.debug("Stored revision %d of post %s as %s (%d bytes)",
+                             record["number"], post.id, record["kind"], record["stored_bytes"])
+                return _info(record)
+            # Another save took this number; diff against the new head instead
+        raise RevisionError(f"Could not store a revision of post {post.id}: too many concurrent saves")
+
+    async def list(self, post_id: str, limit: int = 20, before: Optional[int] = None) -> List[RevisionInfo]:
+        return [_info(record) for record in await self.store.list(post_id, limit, before)]
+
+    async def get(self, post_id: str, number: int) -> Optional[RevisionDetail]:
+        """Rebuild revision `number` from its snapshot and the deltas after it."""
+        target = await self.store.get(post_id, number)
+        if target is None:
+            return None
+        chain = await self.store.range(post_id, target["base"], number) if target["kind"] == DELTA else [target]
+        if [record["number"] for record in chain] != list(range(target["base"], number + 1)) \
+                or chain[0]["kind"] != SNAPSHOT:
+            raise RevisionError(f"Revision {number} of post {post_id} has a broken delta chain")
+        content = decompress_text(chain[0]["data"])
+        for record in chain[1:]:
+            content = apply_delta(content, decode_delta(record["data"]))
+        if content_hash(content) != target["content_hash"]:
+            raise RevisionError(f"Revision {number} of post {post_id} does not rebuild to its stored hash")
+        return RevisionDetail(**_info(target).model_dump(), fields=target["fields"], content=content)
+
+    async def delete_all(self, post_id: str) -> int:
+        return await self.store.delete_all(post_id)
+
+
+def _info(record: Dict[str, Any]) -> RevisionInfo:
+    return RevisionInfo(
+        number=record["number"],
+        kind=record["kind"],
+        source=record["source"],
+        author_id=record["author_id"],
+        created_at=record["created_at"],
+        title=record["fields"].get("title") or "",
+        content_length=record["content_length"],
+        stored_bytes=record["stored_bytes"],
+        restored_from=record.get("restored_from"),
+    )
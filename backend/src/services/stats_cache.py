@@ -0,0 +1,43 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from ..models.blog_post import PostStats
+
+
+class StatsCache:
+    """Per-author dashboard stats kept for a short TTL (bounded, LRU).
+
+    Writes made through this process drop the author's entry right away;
+    writes made by other workers show up once the TTL expires.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, PostStats]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, author_id: str) -> Optional[PostStats]:
+        with self._lock:
+            entry = self._entries.get(author_id)
+            if entry is None:
+                return None
+            expires_at, stats = entry
+            if expires_at < time.monotonic():
+                del self._entries[author_id]
+                return None
+            self._entries.move_to_end(author_id)
+            return stats
+
+    def put(self, author_id: str, stats: PostStats) -> None:
+        with self._lock:
+            self._entries[author_id] = (time.monotonic() + self.ttl, stats)
+            self._entries.move_to_end(author_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, author_id: str) -> None:
+        with self._lock:
+            self._entries.pop(author_id, None)
@@ -0,0 +1,177 @@
+"""
+Corpus-level tag suggestions.
+
+`TagIndex` keeps document frequencies for the unigrams and bigrams of every
+stored post, so a post's terms can be weighted by TF-IDF against the whole
+archive without reading Firestore. Terms are hashed into a fixed-size NumPy
+frequency array (no vocabulary is kept, so memory does not grow with the
+number of distinct bigrams), and each indexed post is a sparse row of hashed
+term ids, which lets create/update/delete adjust the frequencies
+incrementally. The index can be saved to and loaded from disk.
+"""
+import logging
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from ..models.blog_post import BlogPost
+from ..utils.summarizer import STOPWORDS, TOKEN_RE
+
+logger = logging.getLogger(__name__)
+
+FENCE_RE = re.compile(r"^(```|~~~).*?^\1", re.MULTILINE | re.DOTALL)
+LINK_TARGET_RE = re.compile(r"\]\([^)]*\)")
+
+
+def extract_terms(text: str) -> Counter:
+    """Count candidate tag terms: content unigrams and bigrams of adjacent content words."""
+    text = LINK_TARGET_RE.sub("]", FENCE_RE.sub(" ", text))
+    counts: Counter = Counter()
+    previous: Optional[str] = None
+    for token in TOKEN_RE.findall(text.lower()):
+        token = token.strip("'-")
+        if token in STOPWORDS or len(token) < 3 or token.isdigit():
+            previous = None
+            continue
+        counts[token] += 1
+        if previous is not None:
+            counts[f"{previous} {token}"] += 1
+        previous = token
+    return counts
+
+
+class TagIndex:
+    """Incrementally maintained document frequencies over the post archive."""
+
+    def __init__(self, max_terms_per_post: int = 150, buckets: int = 1 << 22):
+        if buckets & (buckets - 1):
+            raise ValueError("buckets must be a power of two")
+        self.max_terms_per_post = max_terms_per_post
+        self._df = np.zeros(buckets, dtype=np.int32)
+        self._rows: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _term_ids(self, terms: Iterable[str]) -> np.ndarray:
+        # crc32 is stable across processes, so saved rows stay valid after a restart
+        mask = len(self._df) - 1
+        return np.fromiter((zlib.crc32(t.encode()) & mask for t in terms), dtype=np.uint32)
+
+    def document_frequency(self, term: str) -> int:
+        return int(self._df[self._term_ids([term])[0]])
+
+    @staticmethod
+    def _document_text(post: BlogPost) -> str:
+        return f"{post.title}\n{post.content}"
+
+    def add(self, post: BlogPost) -> None:
+        """Index `post`, replacing any previous version of it."""
+        counts = extract_terms(self._document_text(post))
+        # Only the post's most frequent terms count towards document frequency
+        top_terms = [term for term, _ in counts.most_common(self.max_terms_per_post)]
+        row = np.unique(self._term_ids(top_terms))
+        with self._lock:
+            previous = self._rows.pop(post.id, None)
+            if previous is not None:
+                self._df[previous] -= 1
+            self._df[row] += 1
+            self._rows[post.id] = row
+
+    def remove(self, post_id: str) -> None:
+        with self._lock:
+            previous = self._rows.pop(post_id, None)
+            if previous is not None:
+                self._df[previous] -= 1
+
+    def rebuild(self, posts: Iterable[BlogPost]) -> None:
+        """Replace the whole index with `posts`."""
+        with self._lock:
+            self._df[:] = 0
+            self._rows.clear()
+        for post in posts:
+            self.add(post)
+
+    def suggest(self, title: str, content: str, k: int = 5, exclude: Sequence[str] = ()) -> List[str]:
+        """Top-k tags for a document, weighted by TF-IDF against the indexed archive."""
+        counts = extract_terms(f"{title}\n{content}")
+        if not counts:
+            return []
+        title_terms = set(extract_terms(title))
+        excluded = {tag.lower() for tag in exclude}
+        # A term must recur or appear in the title to be a tag candidate
+        terms = [t for t, c in counts.items() if (c > 1 or t in title_terms) and t not in excluded]
+        if not terms:
+            return []
+
+        term_ids = self._term_ids(terms)
+        with self._lock:
+            n_docs = len(self._rows)
+            df = self._df[term_ids].astype(np.float64)
+        tf = np.fromiter((counts[t] for t in terms), dtype=np.float64, count=len(terms))
+        idf = np.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+        boost = np.fromiter(
+            ((1.5 if t in title_terms else 1.0) * (1.2 if " " in t else 1.0) for t in terms),
+            dtype=np.float64, count=len(terms),
+        )
+        scores = (1.0 + np.log(tf)) * idf * boost
+
+        tags: List[str] = []
+        for index in np.argsort(-scores, kind="stable"):
+            term = terms[index]
+            words = set(term.split())
+            overlapping = [i for i, tag in enumerate(tags) if words.intersection(tag.split())]
+            if not overlapping:
+                if len(tags) >= k:
+                    break
+                tags.append(term)
+            elif (len(overlapping) == 1 and " " not in tags[overlapping[0]] and " " in term
+                  and counts[term] * 2 >= counts[tags[overlapping[0]]]):
+                # "event loop" is a better tag than "event" when the phrase accounts for most uses
+                tags[overlapping[0]] = term
+        return tags
+
+    def save(self, path: str) -> None:
+        """Write the index to `path` (a .npz file) atomically."""
+        with self._lock:
+            post_ids = list(self._rows)
+            rows = [self._rows[post_id] for post_id in post_ids]
+            indptr = np.cumsum([0] + [len(row) for row in rows], dtype=np.int64)
+            indices = np.concatenate(rows) if rows else np.zeros(0, dtype=np.uint32)
+        # Document frequencies are recomputed from the rows on load
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, post_ids=np.array(post_ids, dtype=str), indptr=indptr, indices=indices,
+                                buckets=np.array(len(self._df)),
+                                max_terms_per_post=np.array(self.max_terms_per_post))
+        os.replace(tmp_path, path)
+        logger.info("Saved tag index with %d posts to %s", len(post_ids), path)
+
+    @classmethod
+    def load(cls, path: str) -> "TagIndex":
+        with np.load(path) as data:
+            index = cls(max_terms_per_post=int(data["max_terms_per_post"]), buckets=int(data["buckets"]))
+            indptr, indices = data["indptr"], data["indices"]
+            index._df = np.bincount(indices, minlength=len(index._df)).astype(np.int32)
+            index._rows = dict(zip(data["post_ids"].tolist(), np.split(indices, indptr[1:-1])))
+        logger.info("Loaded tag index with %d posts from %s", len(index), path)
+        return index
+
+
+def merge_tags(*groups: Iterable[str], limit: Optional[int] = None) -> List[str]:
+    """Concatenate tag lists, dropping case-insensitive duplicates and keeping order."""
+    seen = set()
+    merged: List[str] = []
+    for group in groups:
+        for tag in group:
+            key = tag.strip().lower()
+            if key and key not in seen:
+                seen.add(key)
+                merged.append(tag.strip())
+    return merged[:limit] if limit is not None else merged
@@ -0,0 +1,54 @@
+"""
+Compressed line-level deltas between two versions of a text.
+
+A delta is a list of edits `[start, end, text]` against the old text's lines
+(line endings kept): lines start..end are replaced by `text`, which may be
+empty. Lines between edits are copied, so an edit to one paragraph of a long
+article costs about the size of that paragraph. Deltas are stored as
+zlib-compressed JSON.
+"""
+import json
+import zlib
+from difflib import SequenceMatcher
+from typing import List, Tuple
+
+Edit = Tuple[int, int, str]
+
+
+def line_delta(old: str, new: str) -> List[Edit]:
+    """The edits that turn `old` into `new`."""
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    # autojunk would treat lines repeated across a long article (blank lines,
+    # list markers) as noise and produce larger deltas
+    matcher = SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    return [(i1, i2, "".join(new_lines[j1:j2]))
+            for op, i1, i2, j1, j2 in matcher.get_opcodes() if op != "equal"]
+
+
+def apply_delta(old: str, edits: List[Edit]) -> str:
+    lines = old.splitlines(keepends=True)
+    parts = []
+    position = 0
+    for start, end, text in edits:
+        parts.extend(lines[position:start])
+        parts.append(text)
+        position = end
+    parts.extend(lines[position:])
+    return "".join(parts)
+
+
+def encode_delta(edits: List[Edit]) -> bytes:
+    return zlib.compress(json.dumps(edits, ensure_ascii=False, separators=(",", ":")).encode())
+
+
+def decode_delta(data: bytes) -> List[Edit]:
+    return [tuple(edit) for edit in json.loads(zlib.decompress(data))]
+
+
+def compress_text(text: str) -> bytes:
+    return zlib.compress(text.encode())
+
+
+def decompress_text(data: bytes) -> str:
+    return zlib.decompress(data).decode()
@@ -0,0 +1,92 @@
+"""
+Streaming archive formats for post exports.
+
+Both encoders consume an async iterator of posts and yield bytes as they go, so
+an export holds one post (plus one compressed entry for zips) in memory at a
+time, whatever the size of the archive. The only per-post state is the zip
+central directory record (about 600 bytes per file), which the format
+requires at the end of the archive.
+"""
+import json
+import re
+import zipfile
+from typing import AsyncIterator
+
+from ..models.blog_post import BlogPost
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ZIP_MEDIA_TYPE = "application/zip"
+FLUSH_BYTES = 64 * 1024
+
+UNSAFE_FILENAME_RE = re.compile(r"[^a-z0-9-]+")
+FRONT_MATTER_FIELDS = ("title", "slug", "status", "tags", "category", "meta_description",
+                       "published_at", "created_at", "updated_at")
+
+
+async def ndjson_stream(posts: AsyncIterator[BlogPost]) -> AsyncIterator[bytes]:
+    """One JSON object per line, flushed in chunks of roughly FLUSH_BYTES."""
+    buffer = bytearray()
+    async for post in posts:
+        buffer += post.model_dump_json().encode()
+        buffer += b"\n"
+        if len(buffer) >= FLUSH_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def markdown_filename(post: BlogPost) -> str:
+    """`<slug>-<id>.md`; the id keeps names unique without remembering earlier ones."""
+    slug = UNSAFE_FILENAME_RE.sub("-", (post.slug or "").lower()).strip("-")[:80] or "post"
+    return f"{slug}-{post.id}.md"
+
+
+def markdown_document(post: BlogPost) -> str:
+    """The post's markdown with its metadata as YAML front matter (values JSON-quoted)."""
+    lines = ["---"]
+    data = json.loads(post.model_dump_json(include=set(FRONT_MATTER_FIELDS)))
+    for name in FRONT_MATTER_FIELDS:
+        value = data.get(name)
+        if value is not None:
+            lines.append(f"{name}: {json.dumps(value, ensure_ascii=False)}")
+    lines.extend(["---", "", post.content.rstrip(), ""])
+    return "\n".join(lines)
+
+
+class _ZipSink:
+    """Write-only file object that zipfile appends to and the stream drains."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def write(self, data) -> int:
+        self.buffer += data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+async def zip_stream(posts: AsyncIterator[BlogPost]) -> AsyncIterator[bytes]:
+    """A zip of one markdown file per post, written without seeking.
+
+    zipfile switches to data descriptors on an unseekable file, so each entry
+    is complete once written and can be sent before the next post is read.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        async for post in posts:
+            info = zipfile.ZipInfo(markdown_filename(post), date_time=post.updated_at.timetuple()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with archive.open(info, mode="w") as entry:
+                entry.write(markdown_document(post).encode())
+            if len(sink.buffer) >= FLUSH_BYTES:
+                yield sink.drain()
+    # Closing the archive writes the central directory
+    yield sink.drain()
@@ -0,0 +1,116 @@
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, List, Sequence, Tuple
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+
+
+def normalize_section_body(body: str, heading: str, level: int = 2) -> str:
+    """Clean up a model-written section body before stitching it into an article.
+
+    Drops a leading heading that repeats the section title and demotes any other
+    headings so they sit below `level`, keeping the article's outline consistent.
+    """
+    lines = body.strip().strip("`").splitlines()
+    if lines:
+        match = HEADING_RE.match(lines[0])
+        if match and match.group(2).strip().lower() == heading.strip().lower():
+            lines = lines[1:]
+
+    normalized = []
+    for line in lines:
+        match = HEADING_RE.match(line)
+        if match:
+            depth = min(6, max(len(match.group(1)), level + 1))
+            line = f"{'#' * depth} {match.group(2)}"
+        normalized.append(line)
+    return "\n".join(normalized).strip()
+
+
+def stitch_article(title: str, sections: Iterable[Tuple[str, str]]) -> str:
+    """Join (heading, body) pairs into one markdown article under an H1 title."""
+    parts = [f"# {title.strip()}"]
+    for heading, body in sections:
+        parts.append(f"## {heading.strip()}\n\n{normalize_section_body(body, heading)}")
+    return "\n\n".join(parts) + "\n"
+
+
+@dataclass
+class Section:
+    """A heading and the lines it owns, up to the next heading of the same or higher level."""
+    heading: str
+    level: int
+    start: int  # line index of the heading
+    end: int  # exclusive line index where the section (including subsections) ends
+    path: Tuple[str, ...] = ()
+    children: List["Section"] = field(default_factory=list)
+
+
+def parse_sections(markdown: str) -> List[Section]:
+    """Parse markdown into a flat, document-ordered list of heading-addressed sections.
+
+    Each section's `path` lists the headings from the outermost ancestor down
+    to itself. Headings inside fenced code blocks are ignored.
+    """
+    lines = markdown.splitlines()
+    sections: List[Section] = []
+    stack: List[Section] = []
+    in_fence = False
+    for index, line in enumerate(lines):
+        if line.lstrip().startswith(("```", "~~~")):
+            in_fence = not in_fence
+            continue
+        match = None if in_fence else HEADING_RE.match(line)
+        if not match:
+            continue
+        level = len(match.group(1))
+        while stack and stack[-1].level >= level:
+            stack.pop().end = index
+        section = Section(
+            heading=match.group(2).strip(),
+            level=level,
+            start=index,
+            end=len(lines),
+            path=tuple(s.heading for s in stack) + (match.group(2).strip(),),
+        )
+        if stack:
+            stack[-1].children.append(section)
+        sections.append(section)
+        stack.append(section)
+    return sections
+
+
+def find_sections(sections: Sequence[Section], path: Sequence[str]) -> List[Section]:
+    """Sections whose heading path ends with `path` (case-insensitive)."""
+    wanted = tuple(part.strip().lower() for part in path)
+    return [
+        s for s in sections
+        if len(s.path) >= len(wanted) and tuple(p.lower() for p in s.path[-len(wanted):]) == wanted
+    ]
+
+
+def section_body(markdown: str, section: Section) -> str:
+    """The section's text below its heading, including any subsections."""
+    return "\n".join(markdown.splitlines()[section.start + 1:section.end]).strip()
+
+
+def replace_section_body(markdown: str, section: Section, body: str) -> str:
+    """Return `markdown` with the section's body (below its heading) replaced."""
+    lines = markdown.splitlines()
+    new_body = normalize_section_body(body, section.heading, section.level).splitlines()
+    replacement = [""] + new_body + ([""] if section.end < len(lines) else [])
+    patched = lines[:section.start + 1] + replacement + lines[section.end:]
+    return "\n".join(patched) + ("\n" if markdown.endswith("\n") else "")
+
+
+def summarize_text(text: str, max_chars: int = 240) -> str:
+    """Compact plain-text summary: leading sentences of `text` up to `max_chars`."""
+    plain = " ".join(
+        line.strip().lstrip("#>*- ").strip() for line in text.splitlines()
+        if line.strip() and not line.lstrip().startswith(("```", "~~~"))
+    )
+    if len(plain) <= max_chars:
+        return plain
+    cut = plain[:max_chars]
+    sentence_end = cut.rfind(". ")
+    return cut[:sentence_end + 1] if sentence_end > max_chars // 3 else cut.rsplit(" ", 1)[0] + "..."
@@ -0,0 +1,48 @@
+"""
+Markdown to sanitized HTML for posts served with ?format=html.
+
+Posts are CommonMark plus tables and strikethrough, rendered by markdown-it-py.
+The output is safe by construction rather than cleaned afterwards: raw HTML
+in the markdown is escaped instead of passed through, link and image URLs with
+script-capable schemes (javascript:, vbscript:, file:, non-image data:) are
+left as text, and links get rel="nofollow ugc noopener" since the content is
+user-edited model output.
+
+RENDERER_VERSION is part of every render cache key. Bump it whenever a change
+here alters the output, then run `python -m src.jobs.render_posts` to fill the
+cache for the new version.
+"""
+import hashlib
+from functools import lru_cache
+
+RENDERER_VERSION = 1
+LINK_REL = "nofollow ugc noopener"
+
+
+@lru_cache(maxsize=1)
+def _parser():
+    # Imported on first render, like the other optional heavy dependencies
+    from markdown_it import MarkdownIt
+
+    md = MarkdownIt("commonmark", {"html": False, "linkify": False, "typographer": False})
+    md.enable(["table", "strikethrough"])
+
+    def link_open(renderer, tokens, idx, options, env):
+        tokens[idx].attrSet("rel", LINK_REL)
+        return renderer.renderToken(tokens, idx, options, env)
+
+    md.add_render_rule("link_open", link_open)
+    return md
+
+
+def render_html(markdown: str) -> str:
+    """Render post markdown to HTML that is safe to insert into a page."""
+    return _parser().render(markdown or "")
+
+
+def content_key(markdown: str) -> str:
+    """Render cache key: a hash of the renderer version and the markdown."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"v{RENDERER_VERSION}\0".encode())
+    digest.update((markdown or "").encode())
+    return f"v{RENDERER_VERSION}-{digest.hexdigest()}"
@@ -0,0 +1,155 @@
+"""
+Local extractive summarization for meta descriptions.
+
+Sentences are scored by TF-IDF similarity to the whole article, with a
+position prior that favours the opening and a boost for sharing terms with the
+title. Scoring is a handful of vectorized NumPy operations; a 2,000-word
+article is summarized in a few milliseconds without any network call.
+"""
+import re
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9'-]*")
+MARKUP_RE = re.compile(r"!?\[([^\]]*)\]\([^)]*\)|[*_`~]+|<[^>]+>")
+LIST_MARKER_RE = re.compile(r"^\s*(?:[-*+>]|\d+[.)])\s+")
+STOPWORDS = frozenset("""
+    a about above after again all also am an and any are as at be because been before being below between
+    both but by can could did do does doing down during each few for from further had has have having he her
+    here hers him his how i if in into is it its itself just me more most my no nor not now of off on once only
+    or other our ours out over own same she should so some such than that the their theirs them then there these
+    they this those through to too under until up very was we were what when where which while who whom why will
+    with would you your yours
+""".split())
+
+# Characters per token, for budgeting text sent to the LLM
+CHARS_PER_TOKEN = 4
+ELLIPSIS = "..."
+
+
+def split_sentences(markdown: str) -> Tuple[str, List[str]]:
+    """Return (title, sentences) from a markdown article.
+
+    Headings, code blocks, tables and link targets are dropped; list items and
+    paragraphs become plain sentences.
+    """
+    title = ""
+    blocks: List[str] = []
+    paragraph: List[str] = []
+    in_fence = False
+    for line in markdown.splitlines():
+        stripped = line.strip()
+        if stripped.startswith(("```", "~~~")):
+            in_fence = not in_fence
+            continue
+        if in_fence or stripped.startswith("|"):
+            continue
+        if not stripped or stripped.startswith("#") or LIST_MARKER_RE.match(line):
+            if paragraph:
+                blocks.append(" ".join(paragraph))
+                paragraph = []
+            if stripped.startswith("# ") and not title:
+                title = stripped.lstrip("# ").strip()
+            elif LIST_MARKER_RE.match(line):
+                blocks.append(LIST_MARKER_RE.sub("", line))
+            continue
+        paragraph.append(stripped)
+    if paragraph:
+        blocks.append(" ".join(paragraph))
+
+    sentences = []
+    for block in blocks:
+        text = " ".join(MARKUP_RE.sub(lambda m: m.group(1) or "", block).split())
+        sentences.extend(s.strip() for s in SENTENCE_SPLIT_RE.split(text) if s.strip())
+    return title, sentences
+
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+def score_sentences(sentences: List[str], title: str = "", position_weight: float = 0.35) -> np.ndarray:
+    """Score each sentence; higher is more representative of the article."""
+    n = len(sentences)
+    if n == 0:
+        return np.zeros(0)
+    tokenized = [_tokens(s) for s in sentences]
+    vocabulary = {term: i for i, term in enumerate(sorted({t for tokens in tokenized for t in tokens}))}
+    if not vocabulary:
+        return np.zeros(n)
+
+    rows = np.fromiter((i for i, tokens in enumerate(tokenized) for _ in tokens), dtype=np.intp)
+    cols = np.fromiter((vocabulary[t] for tokens in tokenized for t in tokens), dtype=np.intp)
+    counts = np.zeros((n, len(vocabulary)))
+    np.add.at(counts, (rows, cols), 1.0)
+
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1.0 + n) / (1.0 + document_frequency)) + 1.0
+    tfidf = counts * idf
+    norms = np.linalg.norm(tfidf, axis=1)
+    norms[norms == 0] = 1.0
+    tfidf /= norms[:, None]
+
+    # Cosine similarity to the article centroid
+    centroid = tfidf.sum(axis=0)
+    centroid /= np.linalg.norm(centroid) or 1.0
+    relevance = tfidf @ centroid
+
+    title_terms = [vocabulary[t] for t in set(_tokens(title)) if t in vocabulary]
+    title_overlap = (counts[:, title_terms] > 0).sum(axis=1) / len(title_terms) if title_terms else np.zeros(n)
+
+    position = 1.0 / np.sqrt(1.0 + np.arange(n))
+    lengths = np.fromiter((len(tokens) for tokens in tokenized), dtype=float, count=n)
+    # Fragments and headings-as-sentences make poor descriptions
+    length_factor = np.clip(lengths / 6.0, 0.0, 1.0)
+    return (relevance + 0.3 * title_overlap + position_weight * position) * length_factor
+
+
+def clamp_text(text: str, max_chars: int) -> str:
+    """Collapse whitespace and cut `text` to `max_chars` at a word boundary."""
+    text = " ".join(text.split()).strip().strip('"')
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars - len(ELLIPSIS)]
+    if text[len(cut)] != " " and " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip(",;:- ") + ELLIPSIS
+
+
+def extractive_description(markdown: str, max_chars: int = 160) -> str:
+    """Pick the best-scoring sentences, in document order, that fit in `max_chars`."""
+    title, sentences = split_sentences(markdown)
+    if not sentences:
+        return clamp_text(title, max_chars)
+    scores = score_sentences(sentences, title)
+    chosen: List[int] = []
+    used = 0
+    for index in np.argsort(-scores, kind="stable"):
+        if scores[index] < 0.5 * scores.max():
+            # Padding with weak sentences reads worse than a shorter description
+            break
+        length = len(sentences[index]) + (1 if chosen else 0)
+        if used + length <= max_chars:
+            chosen.append(int(index))
+            used += length
+    if not chosen:
+        return clamp_text(sentences[int(np.argmax(scores))], max_chars)
+    return " ".join(sentences[i] for i in sorted(chosen))
+
+
+def budgeted_excerpt(markdown: str, max_tokens: int, title: Optional[str] = None) -> str:
+    """Top-scoring sentences, in document order, within roughly `max_tokens` tokens."""
+    parsed_title, sentences = split_sentences(markdown)
+    budget = max_tokens * CHARS_PER_TOKEN
+    scores = score_sentences(sentences, title or parsed_title)
+    chosen: List[int] = []
+    used = 0
+    for index in np.argsort(-scores, kind="stable"):
+        length = len(sentences[index]) + 1
+        if used + length > budget:
+            continue
+        chosen.append(int(index))
+        used += length
+    return " ".join(sentences[i] for i in sorted(chosen))
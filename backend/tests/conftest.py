@@ -1,20 +1,31 @@
 import pytest
 from fastapi.testclient import TestClient
-from src.main import app
-from src.core.firebase import initialize_firebase
-import os
+from benchmarks.app import apply_bench_settings, build_app
+from benchmarks.fakes import FakeGeminiService, InMemoryBlogRepository
 from dotenv import load_dotenv
 
 load_dotenv()
 
-@pytest.fixture(scope="session")
-def test_client():
-    """Create a test client for the FastAPI application."""
-    return TestClient(app)
+@pytest.fixture
+def fake_gemini():
+    """Gemini stand-in that answers instantly."""
+    return FakeGeminiService(time_scale=0, blocking=False, seed=0)
 
-@pytest.fixture(scope="session", autouse=True)
-def setup_firebase():
-    """Initialize Firebase for testing."""
-    initialize_firebase()
-    yield
-    # Cleanup if needed 
\ No newline at end of file
+@pytest.fixture
+def fake_repo():
+    """In-memory replacement for the Firestore-backed BlogRepository."""
+    return InMemoryBlogRepository()
+
+@pytest.fixture
+def app(fake_gemini, fake_repo, monkeypatch):
+    """A fresh FastAPI application wired to the fakes with a signed-in user."""
+    apply_bench_settings(monkeypatch.setattr)
+    app, _, _ = build_app(gemini=fake_gemini, repo=fake_repo)
+    yield app
+    app.dependency_overrides.clear()
+
+@pytest.fixture
+def test_client(app):
+    """Create a test client for the FastAPI application (runs the lifespan)."""
+    with TestClient(app) as client:
+        yield client
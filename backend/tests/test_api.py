@@ -1,233 +1,416 @@
 import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from db.database import Base, get_db
-from main import app
-import os
-from unittest.mock import AsyncMock, patch
-from ai_service import BlogGenerationParams
-
-# Use an in-memory SQLite database for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-def override_get_db():
-    try:
-        db = TestingSessionLocal()
-        yield db
-    finally:
-        db.close()
+from src.api.dependencies import get_current_user_or_anonymous, get_post_scheduler
+from src.models.blog_post import BlogPost
 
-@pytest.fixture
-def test_db():
-    Base.metadata.create_all(bind=engine)
-    yield
-    Base.metadata.drop_all(bind=engine)
+GENERATE_PARAMS = {
+    "topic": "Test Topic",
+    "tone": "professional",
+    "length": "medium",
+    "target_audience": "general",
+    "keywords": ["test", "blog"]
+}
 
 @pytest.fixture
-def client(test_db):
-    app.dependency_overrides[get_db] = override_get_db
-    return TestClient(app)
+def blog_data():
+    return {
+        "title": "Test Blog",
+        "content": "This is a test blog post",
+        "slug": "test-blog",
+        "author_id": "someone-else",
+        "status": "draft"
+    }
 
-@pytest.fixture
-def test_client():
-    return TestClient(app)
+def test_health_check(test_client):
+    response = test_client.get("/health")
+    assert response.status_code == 200
+    assert response.json() == {"status": "healthy"}
 
-@pytest.fixture
-def mock_current_user():
-    return {"email": "test@example.com", "id": 1}
+def test_generate_blog_unauthorized(app, test_client):
+    # Arrange
+    app.dependency_overrides.pop(get_current_user_or_anonymous)
 
-@pytest.fixture
-def mock_ai_service():
-    with patch('main.app.ai_service') as mock:
-        mock.generate_blog = AsyncMock()
-        yield mock
+    # Act
+    response = test_client.post("/api/blogs/generate", json=GENERATE_PARAMS)
 
-def test_read_main(client):
-    response = client.get("/")
-    assert response.status_code == 200
-    assert response.json() == {"message": "Welcome to the Automated Blog Generator API"}
+    # Assert
+    assert response.status_code == 403
+    assert "Not authenticated" in response.json()["message"]
 
-def test_health_check(client):
-    response = client.get("/health")
-    assert response.status_code == 200
-    assert response.json() == {"status": "healthy"}
+def test_generate_blog_success(test_client, fake_gemini):
+    # Act
+    response = test_client.post("/api/blogs/generate", json=GENERATE_PARAMS)
 
-def test_register_user(client):
-    response = client.post(
-        "/register",
-        json={"email": "test@example.com", "password": "testpassword123"}
-    )
-    assert response.status_code == 200
-    data = response.json()
-    assert "access_token" in data
-    assert "token_type" in data
-
-def test_login_user(client):
-    # First register a user
-    client.post(
-        "/register",
-        json={"email": "test@example.com", "password": "testpassword123"}
-    )
-    
-    # Then try to login
-    response = client.post(
-        "/token",
-        data={"username": "test@example.com", "password": "testpassword123"}
-    )
+    # Assert
     assert response.status_code == 200
     data = response.json()
-    assert "access_token" in data
-    assert "token_type" in data
-
-def test_create_blog(client):
-    # First register and login
-    register_response = client.post(
-        "/register",
-        json={"email": "test@example.com", "password": "testpassword123"}
-    )
-    token = register_response.json()["access_token"]
-    
-    # Create a blog post
-    response = client.post(
-        "/blog",
-        headers={"Authorization": f"Bearer {token}"},
-        json={
-            "title": "Test Blog",
-            "content": "This is a test blog post",
-            "author": "test@example.com"
-        }
-    )
+    assert data["title"] == "Test Topic"
+    assert data["content"].startswith("# Test Topic")
+    assert data["slug"] == "test-topic"
+    assert data["tags"][:2] == ["test", "blog"]
+    assert fake_gemini.calls["generate_blog_post"] == 1
+
+def test_generate_blog_validation_error(test_client):
+    # Arrange
+    params = {"tone": "professional"}  # topic and keywords are required
+
+    # Act
+    response = test_client.post("/api/blogs/generate", json=params)
+
+    # Assert
+    assert response.status_code == 422
+
+def test_create_blog_success(test_client, fake_repo, blog_data):
+    # Act
+    response = test_client.post("/api/blogs/", json=blog_data)
+
+    # Assert
     assert response.status_code == 200
     data = response.json()
     assert data["title"] == "Test Blog"
-    assert data["content"] == "This is a test blog post"
-    assert data["author"] == "test@example.com"
-
-def test_get_blogs(client):
-    # First register and login
-    register_response = client.post(
-        "/register",
-        json={"email": "test@example.com", "password": "testpassword123"}
-    )
-    token = register_response.json()["access_token"]
-    
-    # Create a blog post
-    client.post(
-        "/blog",
-        headers={"Authorization": f"Bearer {token}"},
-        json={
-            "title": "Test Blog",
-            "content": "This is a test blog post",
-            "author": "test@example.com"
-        }
-    )
-    
-    # Get all blogs
-    response = client.get(
-        "/blogs",
-        headers={"Authorization": f"Bearer {token}"}
-    )
+    assert data["author_id"] == "bench-user"  # taken from the token, not the payload
+    assert data["status"] == "draft"
+    assert data["id"] in fake_repo.posts
+    assert "created_at" in data
+    assert "updated_at" in data
+
+def test_get_blogs(test_client, blog_data):
+    test_client.post("/api/blogs/", json=blog_data)
+
+    response = test_client.get("/api/blogs/")
+
     assert response.status_code == 200
     data = response.json()
-    assert len(data) > 0
+    assert len(data) == 1
     assert data[0]["title"] == "Test Blog"
 
-def test_generate_blog_unauthorized(test_client):
+def test_get_missing_post(test_client):
+    response = test_client.get("/api/blogs/does-not-exist")
+    assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_update_post_requires_ownership(test_client, fake_repo, blog_data):
+    post = await fake_repo.create(BlogPost(**blog_data))
+
+    response = test_client.put(f"/api/blogs/{post.id}", json=blog_data)
+
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_patch_post_writes_and_returns_only_changed_fields(test_client, fake_repo, blog_data):
     # Arrange
-    params = {
-        "topic": "Test Topic",
-        "tone": "professional",
-        "length": "medium",
-        "target_audience": "general",
-        "keywords": ["test", "blog"]
-    }
+    post = await fake_repo.create(BlogPost(**{**blog_data, "author_id": "bench-user", "tags": ["a"]}))
+    before = fake_repo.posts[post.id].updated_at
 
     # Act
-    response = test_client.post("/api/blogs/generate", json=params)
+    response = test_client.patch(f"/api/blogs/{post.id}", json={"status": "published", "tags": ["a"]},
+                                 headers={"Prefer": "return=minimal"})
 
     # Assert
-    assert response.status_code == 401
-    assert "Not authenticated" in response.json()["detail"]
+    assert response.status_code == 200
+    assert response.headers["Preference-Applied"] == "return=minimal"
+    data = response.json()
+    assert set(data) == {"id", "updated_at", "status"}  # tags were unchanged
+    stored = fake_repo.posts[post.id]
+    assert stored.status == "published"
+    assert stored.content == blog_data["content"]
+    assert stored.updated_at > before
+
+    full = test_client.patch(f"/api/blogs/{post.id}", json={"category": "news"})
+    assert full.status_code == 200
+    assert full.json()["title"] == blog_data["title"]
+    assert full.json()["category"] == "news"
 
 @pytest.mark.asyncio
-async def test_generate_blog_success(test_client, mock_current_user, mock_ai_service):
-    # Arrange
-    params = {
-        "topic": "Test Topic",
-        "tone": "professional",
-        "length": "medium",
-        "target_audience": "general",
-        "keywords": ["test", "blog"]
-    }
-    mock_ai_service.generate_blog.return_value = "Generated blog content"
+async def test_patch_post_validation(test_client, fake_repo, blog_data):
+    post = await fake_repo.create(BlogPost(**{**blog_data, "author_id": "bench-user"}))
+    other = await fake_repo.create(BlogPost(**blog_data))
+
+    assert test_client.patch(f"/api/blogs/{other.id}", json={"status": "archived"}).status_code == 403
+    assert test_client.patch(f"/api/blogs/{post.id}", json={"title": None}).status_code == 422
+    assert test_client.patch(f"/api/blogs/{post.id}", json={"titel": "Typo"}).status_code == 422
+    assert test_client.patch(f"/api/blogs/{post.id}", json={"status": "scheduled"}).status_code == 400
+    assert fake_repo.posts[post.id].status == "draft"
+
+@pytest.mark.asyncio
+async def test_get_post_as_html_is_rendered_on_write_and_cached_separately(test_client, fake_repo, blog_data):
+    created = test_client.post("/api/blogs/", json={**blog_data, "status": "published",
+                                                    "content": "# Hello\n\n<b>hi</b> **there**"})
+    post_id = created.json()["id"]
+    render_cache = test_client.app.state.container.render_cache
+    assert render_cache.renders == 1  # precomputed after the create response
+
+    markdown = test_client.get(f"/api/blogs/{post_id}")
+    html = test_client.get(f"/api/blogs/{post_id}", params={"format": "html"})
+    listed = test_client.get("/api/blogs/", params={"format": "html"})
+
+    assert markdown.json()["content"].startswith("# Hello")
+    assert html.json()["content"] == "<h1>Hello</h1>\n<p>&lt;b&gt;hi&lt;/b&gt; <strong>there</strong></p>\n"
+    assert listed.json()[0]["content"] == html.json()["content"]
+    assert html.headers["ETag"] != markdown.headers["ETag"]
+    assert render_cache.renders == 1
+    revalidated = test_client.get(f"/api/blogs/{post_id}", params={"format": "html"},
+                                  headers={"If-None-Match": html.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+def test_revisions_can_be_listed_read_and_restored(test_client, blog_data):
+    post_id = test_client.post("/api/blogs/", json={**blog_data, "content": "One\n\nTwo\n"}).json()["id"]
+    test_client.patch(f"/api/blogs/{post_id}", json={"content": "One\n\nTwo, edited\n", "title": "Renamed"})
+    test_client.patch(f"/api/blogs/{post_id}", json={"status": "published"})
+
+    listed = test_client.get(f"/api/blogs/{post_id}/revisions")
+    first = test_client.get(f"/api/blogs/{post_id}/revisions/1")
+    restored = test_client.post(f"/api/blogs/{post_id}/revisions/1/restore")
 
-    with patch('main.get_current_user', return_value=mock_current_user):
-        # Act
-        response = test_client.post("/api/blogs/generate", json=params)
+    assert [(r["number"], r["source"]) for r in listed.json()] == [(3, "patch"), (2, "patch"), (1, "create")]
+    assert first.json()["content"] == "One\n\nTwo\n" and first.json()["title"] == blog_data["title"]
+    assert restored.status_code == 200
+    assert restored.json()["content"] == "One\n\nTwo\n" and restored.json()["title"] == blog_data["title"]
+    assert restored.json()["status"] == "published"  # publishing state is not rolled back
+    latest = test_client.get(f"/api/blogs/{post_id}/revisions", params={"limit": 1}).json()
+    assert latest[0]["source"] == "restore" and latest[0]["restored_from"] == 1
+    assert test_client.get(f"/api/blogs/{post_id}/revisions/9").status_code == 404
 
-        # Assert
-        assert response.status_code == 200
-        assert response.json() == {"content": "Generated blog content"}
-        mock_ai_service.generate_blog.assert_called_once()
+SECTIONED_CONTENT = "# Guide\n\nIntro.\n\n## Setup\n\nOld setup text.\n\n## Usage\n\nRun it.\n"
 
 @pytest.mark.asyncio
-async def test_generate_blog_validation_error(test_client, mock_current_user):
+async def test_regenerate_section_patches_only_target(test_client, fake_repo, fake_gemini):
     # Arrange
-    params = {
-        "topic": "",  # Empty topic should fail validation
-        "tone": "professional"
-    }
+    post = await fake_repo.create(BlogPost(title="Guide", content=SECTIONED_CONTENT, slug="guide", author_id="bench-user"))
+    before = fake_repo.posts[post.id].updated_at
 
-    with patch('main.get_current_user', return_value=mock_current_user):
-        # Act
-        response = test_client.post("/api/blogs/generate", json=params)
+    # Act
+    response = test_client.post(f"/api/blogs/{post.id}/regenerate-section", json={"path": ["setup"]})
 
-        # Assert
-        assert response.status_code == 422
-        assert "validation error" in response.json()["detail"][0]["msg"].lower()
+    # Assert
+    assert response.status_code == 200
+    data = response.json()
+    assert data["path"] == ["Guide", "Setup"]
+    stored = fake_repo.posts[post.id]
+    assert "Old setup text." not in stored.content
+    assert data["content"] in stored.content
+    assert stored.content.startswith("# Guide\n\nIntro.\n\n## Setup\n\n")
+    assert stored.content.endswith("\n\n## Usage\n\nRun it.\n")
+    assert stored.updated_at > before
+    assert fake_gemini.calls["regenerate_section"] == 1
 
 @pytest.mark.asyncio
-async def test_generate_blog_rate_limit(test_client, mock_current_user):
-    # Arrange
-    params = {
-        "topic": "Test Topic",
-        "tone": "professional"
-    }
+async def test_regenerate_section_refreshes_my_stats(test_client, fake_repo):
+    post = await fake_repo.create(BlogPost(title="Guide", content=SECTIONED_CONTENT, slug="guide", author_id="bench-user"))
+    before = test_client.get("/api/blogs/me/stats").json()
 
-    with patch('main.get_current_user', return_value=mock_current_user):
-        # Act
-        # Make multiple requests to trigger rate limit
-        responses = [
-            test_client.post("/api/blogs/generate", json=params)
-            for _ in range(10)  # Assuming rate limit is less than 10
-        ]
+    test_client.post(f"/api/blogs/{post.id}/regenerate-section", json={"path": ["setup"]})
+    after = test_client.get("/api/blogs/me/stats").json()
 
-        # Assert
-        assert any(r.status_code == 429 for r in responses)
-        rate_limited = next(r for r in responses if r.status_code == 429)
-        assert "rate limit exceeded" in rate_limited.json()["detail"].lower()
+    assert after["last_updated"] > before["last_updated"]
 
 @pytest.mark.asyncio
-async def test_create_blog_success(test_client, mock_current_user):
-    # Arrange
-    blog_data = {
-        "title": "Test Blog",
-        "content": "Test content",
-        "status": "draft"
+async def test_regenerate_section_unknown_or_ambiguous_path(test_client, fake_repo):
+    content = "# A\n\n## Notes\n\nx\n\n# B\n\n## Notes\n\ny\n"
+    post = await fake_repo.create(BlogPost(title="T", content=content, slug="t", author_id="bench-user"))
+
+    missing = test_client.post(f"/api/blogs/{post.id}/regenerate-section", json={"path": ["Nope"]})
+    ambiguous = test_client.post(f"/api/blogs/{post.id}/regenerate-section", json={"path": ["Notes"]})
+    exact = test_client.post(f"/api/blogs/{post.id}/regenerate-section", json={"path": ["B", "Notes"]})
+
+    assert missing.status_code == 404
+    assert ambiguous.status_code == 409
+    assert exact.status_code == 200
+
+@pytest.mark.asyncio
+async def test_regenerate_section_requires_ownership(test_client, fake_repo, blog_data):
+    post = await fake_repo.create(BlogPost(**blog_data))
+
+    response = test_client.post(f"/api/blogs/{post.id}/regenerate-section", json={"path": ["Intro"]})
+
+    assert response.status_code == 403
+
+def test_generate_returns_keywords_then_suggested_tags(test_client):
+    response = test_client.post("/api/blogs/generate", json=GENERATE_PARAMS)
+
+    tags = response.json()["tags"]
+    assert tags[:2] == ["test", "blog"]
+    assert len(tags) > 2
+
+def test_create_without_tags_gets_suggestions(test_client, fake_repo):
+    content = "Vector databases store embeddings. Vector databases answer similarity queries fast."
+    response = test_client.post("/api/blogs/", json={"title": "Vector databases", "content": content, "slug": "v", "author_id": "x"})
+
+    assert response.status_code == 200
+    assert "vector databases" in fake_repo.posts[response.json()["id"]].tags
+
+def test_suggest_tags_endpoint(test_client):
+    response = test_client.post("/api/blogs/suggest-tags", json={
+        "title": "Vector databases", "content": "Vector databases store embeddings. Embeddings matter.", "k": 2,
+    })
+
+    assert response.status_code == 200
+    assert response.json()["tags"][0] == "vector databases"
+
+def test_create_near_duplicate_sets_warning_header(test_client):
+    content = " ".join(f"word{i}" for i in range(300))
+    first = test_client.post("/api/blogs/", json={"title": "One", "content": content, "slug": "one", "author_id": "x"})
+
+    second = test_client.post("/api/blogs/", json={"title": "Two", "content": content + " extra", "slug": "two", "author_id": "x"})
+
+    assert "X-Near-Duplicates" not in first.headers
+    assert second.headers["X-Near-Duplicates"].startswith(first.json()["id"] + ";similarity=")
+
+def test_generate_offers_existing_post_on_same_topic(test_client, fake_gemini):
+    test_client.post("/api/blogs/", json={
+        "title": "Test Topic", "content": "Body.", "slug": "t", "author_id": "x", "tags": ["test", "blog"],
+    })
+
+    offered = test_client.post("/api/blogs/generate", json={**GENERATE_PARAMS, "check_duplicates": True})
+    forced = test_client.post("/api/blogs/generate", json=GENERATE_PARAMS)
+
+    assert offered.status_code == 409
+    assert offered.json()["similar_posts"][0]["title"] == "Test Topic"
+    assert forced.status_code == 200
+    assert fake_gemini.calls["generate_blog_post"] == 1
+
+@pytest.mark.asyncio
+async def test_related_posts_endpoint(test_client, fake_repo):
+    content = "Python asyncio event loops run coroutines. Python asyncio tasks share the event loop."
+    for title in ("Asyncio basics", "Asyncio in depth"):
+        test_client.post("/api/blogs/", json={"title": title, "content": content, "slug": "s", "author_id": "x",
+                                              "status": "published"})
+    # Written directly to the store, so it is only indexed on first read
+    unindexed = await fake_repo.create(BlogPost(title="Asyncio", content=content, slug="a", author_id="x"))
+
+    response = test_client.get(f"/api/blogs/{unindexed.id}/related")
+    missing = test_client.get("/api/blogs/does-not-exist/related")
+
+    assert response.status_code == 200
+    assert {post["title"] for post in response.json()} == {"Asyncio basics", "Asyncio in depth"}
+    assert response.headers["Cache-Control"].startswith("public")
+    assert missing.status_code == 404
+
+@pytest.mark.asyncio
+async def test_scheduled_post_is_published_by_the_scheduler(app, test_client, fake_repo):
+    scheduler = await app.dependency_overrides[get_post_scheduler]()
+    await scheduler.reload()
+    missing_time = test_client.post("/api/blogs/", json={"title": "T", "content": "C", "slug": "t",
+                                                         "author_id": "x", "status": "scheduled"})
+    created = test_client.post("/api/blogs/", json={"title": "T", "content": "C", "slug": "t", "author_id": "x",
+                                                    "status": "scheduled", "scheduled_for": "2000-01-01T00:00:00"})
+
+    published = await scheduler.run_due()
+
+    assert missing_time.status_code == 400
+    assert created.json()["status"] == "scheduled"
+    assert [post.id for post in published] == [created.json()["id"]]
+    assert fake_repo.posts[created.json()["id"]].status == "published"
+
+
+@pytest.mark.asyncio
+async def test_analytics_events_are_reported_after_a_flush(app, test_client, fake_repo):
+    post = await fake_repo.create(BlogPost(title="T", content="C", slug="t", author_id="bench-user"))
+    events = [{"type": "view", "post_id": post.id, "visitor_id": f"v{i % 3}"} for i in range(6)]
+    events.append({"type": "engagement", "post_id": post.id, "visitor_id": "v1", "time_on_page": 42.0})
+
+    accepted = test_client.post("/api/analytics/events", json={"events": events})
+    too_many = test_client.post("/api/analytics/events", json={"events": events * 20})
+    before_flush = test_client.get("/api/analytics/posts")
+    await app.state.container.analytics.flush()
+    report = test_client.get(f"/api/analytics/posts?post_id={post.id}")
+
+    assert accepted.status_code == 202 and accepted.json() == {"accepted": 7}
+    assert too_many.status_code == 413
+    assert before_flush.json()["posts"] == []
+    [entry] = report.json()["posts"]
+    assert entry["totals"]["views"] == 6
+    assert entry["totals"]["unique_visitors"] == 3
+    assert entry["totals"]["average_time_on_page"] == 42.0
+
+@pytest.mark.asyncio
+async def test_export_streams_only_my_posts(test_client, fake_repo):
+    import io
+    import json
+    import zipfile
+
+    for i in range(3):
+        await fake_repo.create(BlogPost(title=f"Mine {i}", content=f"# Post {i}\n\nBody", slug=f"mine-{i}",
+                                        author_id="bench-user"))
+    await fake_repo.create(BlogPost(title="Theirs", content="x", slug="theirs", author_id="someone-else"))
+
+    ndjson = test_client.get("/api/blogs/me/export")
+    archive = test_client.get("/api/blogs/me/export?format=zip")
+
+    assert ndjson.headers["content-type"] == "application/x-ndjson"
+    assert "attachment" in ndjson.headers["content-disposition"]
+    assert sorted(json.loads(line)["title"] for line in ndjson.text.splitlines()) == ["Mine 0", "Mine 1", "Mine 2"]
+    with zipfile.ZipFile(io.BytesIO(archive.content)) as zf:
+        names = zf.namelist()
+        document = zf.read(names[0]).decode()
+    assert len(names) == 3 and all(name.startswith("mine-") and name.endswith(".md") for name in names)
+    assert document.startswith("---\ntitle: \"Mine") and "# Post" in document
+
+@pytest.mark.asyncio
+async def test_stats_are_cached_until_my_next_write(test_client, fake_repo):
+    for status_value, views in (("draft", 0), ("published", 7), ("published", 5)):
+        await fake_repo.create(BlogPost(title="T", content="C", slug="t", author_id="bench-user",
+                                        status=status_value, views=views))
+    await fake_repo.create(BlogPost(title="T", content="C", slug="t", author_id="someone-else", views=100))
+
+    first = test_client.get("/api/blogs/me/stats").json()
+    await fake_repo.create(BlogPost(title="T", content="C", slug="t", author_id="bench-user"))
+    cached = test_client.get("/api/blogs/me/stats").json()
+    test_client.post("/api/blogs/", json={"title": "T", "content": "C", "slug": "t", "author_id": "x"})
+    refreshed = test_client.get("/api/blogs/me/stats").json()
+
+    assert first["counts"] == {"draft": 1, "scheduled": 0, "published": 2, "archived": 0}
+    assert (first["total"], first["total_views"]) == (3, 12)
+    assert cached == first
+    assert refreshed["total"] == 5 and refreshed["counts"]["draft"] == 3
+
+def test_generate_returns_503_while_gemini_circuit_is_open(test_client, fake_gemini, monkeypatch):
+    from src.services.resilience import CircuitOpenError
+
+    async def unavailable(**kwargs):
+        raise CircuitOpenError("Gemini", 12.5)
+
+    monkeypatch.setattr(fake_gemini, "generate_blog_post", unavailable)
+    response = test_client.post("/api/blogs/generate", json=GENERATE_PARAMS)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "13"
+
+def test_generate_is_rate_limited_per_user(app, test_client, fake_gemini, monkeypatch):
+    from src.core.config import settings
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_TIERS", {
+        "anonymous": {"burst": 1, "per_hour": 1},
+        "anonymous_ip": {"burst": 1, "per_hour": 1},
+        "authenticated": {"burst": 2, "per_hour": 60},
+    })
+    assert test_client.post("/api/blogs/generate", json=GENERATE_PARAMS).status_code == 200
+    assert test_client.post("/api/blogs/generate", json=GENERATE_PARAMS).status_code == 200
+
+    response = test_client.post("/api/blogs/generate", json=GENERATE_PARAMS)
+
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["Retry-After"]) <= 60
+    assert fake_gemini.calls["generate_blog_post"] == 2
+
+    # Anonymous sessions get their own, smaller tier
+    app.dependency_overrides[get_current_user_or_anonymous] = lambda: {
+        "uid": "anon-1", "firebase": {"sign_in_provider": "anonymous"}
     }
+    assert test_client.post("/api/blogs/generate", json=GENERATE_PARAMS).status_code == 200
+    assert test_client.post("/api/blogs/generate", json=GENERATE_PARAMS).status_code == 429
+
+def test_admin_prompt_stats_require_admin_claim(app, test_client):
+    from benchmarks.app import BENCH_USER
 
-    with patch('main.get_current_user', return_value=mock_current_user):
-        # Act
-        response = test_client.post("/blog", json=blog_data)
-
-        # Assert
-        assert response.status_code == 200
-        assert response.json()["title"] == "Test Blog"
-        assert response.json()["author"] == "test@example.com"
-        assert response.json()["status"] == "draft"
-        assert "id" in response.json()
-        assert "created_at" in response.json()
-        assert "updated_at" in response.json() 
\ No newline at end of file
+    assert test_client.get("/api/admin/prompts").status_code == 403
+
+    app.dependency_overrides[get_current_user_or_anonymous] = lambda: {**BENCH_USER, "admin": True}
+    app.state.container.prompt_telemetry.record_usage("slug@v1", 60, 4)
+    response = test_client.get("/api/admin/prompts")
+
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["slug@v1"]["prompt_tokens"] == 60
+    assert stats["article@v1"]["calls"] == 0
+    assert test_client.get("/api/admin/models").json() == {}
@@ -0,0 +1,259 @@
+import pytest
+from unittest.mock import Mock, patch
+from src.services.gemini_service import GeminiService, OutlineError, parse_outline
+
+@pytest.fixture
+def gemini_service(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test_api_key")
+    with patch('google.generativeai.configure'), \
+         patch('google.generativeai.list_models', return_value=[]), \
+         patch('google.generativeai.GenerativeModel') as mock_model_cls:
+        mock_model_cls.return_value.generate_content.return_value = Mock(text="ok")
+        service = GeminiService()
+        yield service
+
+@pytest.mark.asyncio
+async def test_generate_blog_success(gemini_service):
+    # Arrange
+    gemini_service.model.generate_content.return_value = Mock(text="Generated blog content")
+
+    # Act
+    result = await gemini_service.generate_blog_post(
+        topic="Test Topic",
+        keywords=["test", "blog"],
+        tone="professional",
+        length="short",
+        target_audience="technical"
+    )
+
+    # Assert
+    assert result == "Generated blog content"
+    prompt = gemini_service.model.generate_content.call_args[0][0]
+    assert "Test Topic" in prompt
+    assert "professional" in prompt
+    assert "technical" in prompt
+    assert "test, blog" in prompt
+
+@pytest.mark.asyncio
+async def test_generate_blog_empty_response(gemini_service):
+    # Arrange
+    gemini_service.model.generate_content.return_value = Mock(text="")
+
+    # Act & Assert
+    with pytest.raises(Exception, match="Empty response from Gemini API"):
+        await gemini_service.generate_blog_post(topic="Test Topic")
+
+@pytest.mark.asyncio
+async def test_generate_blog_api_error(gemini_service):
+    # Arrange
+    gemini_service.model.generate_content.side_effect = Exception("API Error")
+
+    # Act & Assert
+    with pytest.raises(Exception, match="Failed to generate blog post: API Error"):
+        await gemini_service.generate_blog_post(topic="Test Topic")
+
+def test_missing_api_key(monkeypatch):
+    # Act & Assert
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    with pytest.raises(ValueError, match="GEMINI_API_KEY"):
+        GeminiService()
+
+OUTLINE_JSON = """```json
+{"title": "Deep Dive", "sections": [
+  {"heading": "Intro", "key_points": ["why"]},
+  {"heading": "Middle", "key_points": ["how"]},
+  {"heading": "Wrap Up", "key_points": ["so what"]}
+]}
+```"""
+
+def _fake_generate(delay=0.0):
+    """generate_content stand-in: JSON for outline prompts, a section body otherwise."""
+    import time
+
+    def generate_content(prompt):
+        if "Create an outline" in prompt:
+            return Mock(text=OUTLINE_JSON)
+        time.sleep(delay)
+        heading = prompt.split('Write section ', 1)[1].split('"')[1]
+        return Mock(text=f"## {heading}\n\nBody of {heading}.\n\n# Stray heading\n")
+    return generate_content
+
+@pytest.mark.asyncio
+async def test_long_post_uses_outline_and_parallel_sections(gemini_service):
+    import time
+    gemini_service.model.generate_content.reset_mock()
+    gemini_service.model.generate_content.side_effect = _fake_generate(delay=0.2)
+
+    started = time.perf_counter()
+    result = await gemini_service.generate_blog_post(topic="Test Topic", length="long")
+    elapsed = time.perf_counter() - started
+
+    # 1 outline call + 3 section calls, sections overlapping rather than sequential
+    assert gemini_service.model.generate_content.call_count == 4
+    assert elapsed < 0.5
+    assert result.startswith("# Deep Dive\n")
+    assert result.index("## Intro") < result.index("## Middle") < result.index("## Wrap Up")
+    assert result.count("## Intro") == 1  # repeated heading from the model is dropped
+    assert "### Stray heading" in result  # nested headings are demoted
+
+@pytest.mark.asyncio
+async def test_long_post_falls_back_when_outline_is_unusable(gemini_service):
+    gemini_service.model.generate_content.side_effect = [Mock(text="not json"), Mock(text="Single pass")]
+
+    result = await gemini_service.generate_blog_post(topic="Test Topic", length="long")
+
+    assert result == "Single pass"
+
+@pytest.mark.parametrize("reply", [
+    '[1, 2]',
+    '"an outline"',
+    '{"sections": {"heading": "Intro"}}',
+    '{"sections": ["Intro", "Outro"]}',
+    '{"sections": [{"heading": "Intro", "key_points": "abc"}]}',
+])
+def test_parse_outline_rejects_malformed_structure(reply):
+    with pytest.raises(OutlineError):
+        parse_outline(reply, max_sections=5)
+
+@pytest.mark.asyncio
+async def test_long_post_falls_back_when_outline_is_not_an_object(gemini_service):
+    gemini_service.model.generate_content.side_effect = [Mock(text="[1, 2]"), Mock(text="Single pass")]
+
+    result = await gemini_service.generate_blog_post(topic="Test Topic", length="long")
+
+    assert result == "Single pass"
+
+@pytest.mark.asyncio
+async def test_section_concurrency_is_bounded(gemini_service):
+    import threading
+    import time
+    active, peak = 0, 0
+    lock = threading.Lock()
+    base = _fake_generate()
+
+    def tracking(prompt):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return base(prompt)
+
+    gemini_service.model.generate_content.side_effect = tracking
+    await gemini_service.generate_sectioned_blog_post(topic="Test Topic", concurrency=2)
+
+    assert peak == 2
+
+@pytest.mark.asyncio
+async def test_regenerate_section_prompt_only_carries_section_and_neighbours(gemini_service):
+    gemini_service.model.generate_content.return_value = Mock(text="Rewritten body")
+
+    result = await gemini_service.regenerate_section(
+        title="Guide",
+        heading_path=["Guide", "Setup"],
+        current_body="Old setup text.",
+        previous_summary="An introduction.",
+        next_summary="How to run it.",
+        instructions="Mention Docker",
+    )
+
+    assert result == "Rewritten body"
+    prompt = gemini_service.model.generate_content.call_args[0][0]
+    assert "Guide > Setup" in prompt
+    assert "Old setup text." in prompt
+    assert "An introduction." in prompt and "How to run it." in prompt
+    assert "Mention Docker" in prompt
+
+@pytest.mark.asyncio
+async def test_meta_description_is_local_by_default(gemini_service):
+    gemini_service.model.generate_content.reset_mock()
+
+    result = await gemini_service.generate_meta_description("# Title\n\nA useful opening sentence about the title.")
+
+    assert result == "A useful opening sentence about the title."
+    gemini_service.model.generate_content.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_meta_description_refinement_is_budgeted_and_clamped(gemini_service, monkeypatch):
+    from src.core.config import settings
+    monkeypatch.setattr(settings, "META_DESCRIPTION_REFINE", True)
+    monkeypatch.setattr(settings, "META_DESCRIPTION_EXCERPT_TOKENS", 40)
+    gemini_service.model.generate_content.return_value = Mock(text='"' + "refined " * 40 + '"')
+    content = "# Title\n\n" + "A sentence about the title and more. " * 200
+
+    result = await gemini_service.generate_meta_description(content, title="Title")
+
+    assert len(result) <= 160
+    prompt = gemini_service.model.generate_content.call_args[0][0]
+    assert len(prompt) < 1000
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_without_calling_gemini(gemini_service):
+    from src.core.config import settings
+    from src.services.resilience import CircuitOpenError
+
+    gemini_service.model.generate_content.side_effect = Exception("503 Service Unavailable")
+    for _ in range(settings.GEMINI_BREAKER_MIN_CALLS):
+        with pytest.raises(Exception, match="Service Unavailable"):
+            await gemini_service.generate_blog_post(topic="Test Topic")
+    calls = gemini_service.model.generate_content.call_count
+
+    # Primary and fallback share the mock, so both breakers are open now
+    with pytest.raises(CircuitOpenError):
+        await gemini_service.generate_blog_post(topic="Test Topic")
+    assert gemini_service.model.generate_content.call_count == calls
+
+def _routed(gemini_service, models):
+    """Route every task over `models` (name -> mock client), first name as primary."""
+    from src.services.model_router import TASKS, ModelRouter
+
+    names = list(models)
+    routes = {task: {"model": names[0], "fallback": names[-1], "max_output_tokens": 64} for task in TASKS}
+    gemini_service.router = ModelRouter(routes, factory=lambda name, config: models[name],
+                                        prices={names[0]: [1.0, 2.0]})
+
+@pytest.mark.asyncio
+async def test_failed_primary_model_fails_over_and_is_tracked(gemini_service):
+    primary, secondary = Mock(), Mock()
+    primary.generate_content.side_effect = Exception("500 Internal")
+    secondary.generate_content.return_value = Mock(text="my-slug")
+    _routed(gemini_service, {"big": primary, "small": secondary})
+
+    assert await gemini_service.generate_slug("My Slug") == "my-slug"
+
+    stats = gemini_service.model_stats()
+    assert stats["big"]["failures"] == 1
+    assert stats["small"]["calls"] == stats["small"]["fallback_calls"] == 1
+
+@pytest.mark.asyncio
+async def test_model_stats_count_tokens_and_cost(gemini_service):
+    model = Mock()
+    model.generate_content.return_value = Mock(
+        text="Body", usage_metadata=Mock(prompt_token_count=1000, candidates_token_count=500)
+    )
+    _routed(gemini_service, {"big": model})
+
+    await gemini_service.generate_blog_post(topic="Test Topic", length="short")
+
+    stats = gemini_service.model_stats()["big"]
+    assert (stats["calls"], stats["input_tokens"], stats["output_tokens"]) == (1, 1000, 500)
+    assert stats["estimated_cost_usd"] == pytest.approx(0.002)
+    assert stats["p50_seconds"] is not None and stats["breaker"] == "closed"
+
+@pytest.mark.asyncio
+async def test_prompt_telemetry_is_kept_per_template(gemini_service):
+    model = Mock()
+    model.generate_content.return_value = Mock(
+        text="my-slug", usage_metadata=Mock(prompt_token_count=60, candidates_token_count=4)
+    )
+    _routed(gemini_service, {"big": model})
+
+    await gemini_service.generate_slug("My Slug")
+
+    prompt = model.generate_content.call_args[0][0]
+    assert prompt.startswith("Convert this blog post title") and "\n    " not in prompt
+    stats = gemini_service.prompt_stats()["slug@v1"]
+    assert (stats["calls"], stats["errors"], stats["prompt_tokens"], stats["response_tokens"]) == (1, 0, 60, 4)
+    assert stats["estimated_cost_usd"] == pytest.approx(0.000068)
@@ -0,0 +1,100 @@
+import pytest
+from src.models.blog_post import BlogPost
+
+def _post(status="published", author_id="bench-user"):
+    return BlogPost(title="Cached", content="Body", slug="cached", author_id=author_id, status=status)
+
+@pytest.fixture
+def repo_reads(fake_repo, monkeypatch):
+    """Count repository reads so tests can assert a 304 skipped Firestore."""
+    calls = {"get": 0, "list": 0}
+    original_get, original_list = fake_repo.get, fake_repo.list
+
+    async def counting_get(*args, **kwargs):
+        calls["get"] += 1
+        return await original_get(*args, **kwargs)
+
+    async def counting_list(*args, **kwargs):
+        calls["list"] += 1
+        return await original_list(*args, **kwargs)
+
+    monkeypatch.setattr(fake_repo, "get", counting_get)
+    monkeypatch.setattr(fake_repo, "list", counting_list)
+    return calls
+
+@pytest.mark.asyncio
+async def test_published_post_is_edge_cacheable(test_client, fake_repo):
+    post = await fake_repo.create(_post())
+
+    response = test_client.get(f"/api/blogs/{post.id}")
+
+    assert response.status_code == 200
+    cache_control = response.headers["cache-control"]
+    assert cache_control.startswith("public")
+    assert "s-maxage=" in cache_control
+    assert "stale-while-revalidate=" in cache_control
+    assert response.headers["etag"].startswith('W/"')
+    assert "last-modified" in response.headers
+
+@pytest.mark.asyncio
+async def test_draft_post_is_private(test_client, fake_repo):
+    post = await fake_repo.create(_post(status="draft"))
+
+    response = test_client.get(f"/api/blogs/{post.id}")
+
+    assert response.headers["cache-control"] == "private, no-store"
+    assert "etag" not in response.headers
+
+@pytest.mark.asyncio
+async def test_conditional_get_short_circuits_before_repository(test_client, fake_repo, repo_reads):
+    post = await fake_repo.create(_post())
+    etag = test_client.get(f"/api/blogs/{post.id}").headers["etag"]
+    assert repo_reads["get"] == 1
+
+    response = test_client.get(f"/api/blogs/{post.id}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert repo_reads["get"] == 1
+
+@pytest.mark.asyncio
+async def test_if_modified_since(test_client, fake_repo):
+    post = await fake_repo.create(_post())
+    last_modified = test_client.get(f"/api/blogs/{post.id}").headers["last-modified"]
+
+    response = test_client.get(f"/api/blogs/{post.id}", headers={"If-Modified-Since": last_modified})
+
+    assert response.status_code == 304
+
+@pytest.mark.asyncio
+async def test_update_changes_validators(test_client, fake_repo):
+    post = await fake_repo.create(_post())
+    etag = test_client.get(f"/api/blogs/{post.id}").headers["etag"]
+    body = _post().model_dump(mode="json", exclude={"id"})
+    body["title"] = "Edited"
+    assert test_client.put(f"/api/blogs/{post.id}", json=body).status_code == 200
+
+    response = test_client.get(f"/api/blogs/{post.id}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.json()["title"] == "Edited"
+    assert response.headers["etag"] != etag
+
+@pytest.mark.asyncio
+async def test_list_validators_are_invalidated_by_writes(test_client, fake_repo, repo_reads):
+    await fake_repo.create(_post())
+    etag = test_client.get("/api/blogs/?status=published").headers["etag"]
+    assert test_client.get("/api/blogs/?status=published", headers={"If-None-Match": etag}).status_code == 304
+    assert repo_reads["list"] == 1
+
+    test_client.post("/api/blogs/", json=_post().model_dump(mode="json", exclude={"id"}))
+    response = test_client.get("/api/blogs/?status=published", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+def test_empty_list_is_not_edge_cacheable(test_client):
+    response = test_client.get("/api/blogs/", params={"author_id": "nobody-yet"})
+
+    assert response.json() == []
+    assert response.headers["cache-control"] == "private, no-store"
@@ -0,0 +1,70 @@
+import asyncio
+import httpx
+import pytest
+
+GENERATE_PARAMS = {"topic": "Retries", "keywords": ["mobile"]}
+POST_BODY = {"title": "Once", "content": "Only once", "slug": "once", "author_id": "x"}
+
+def test_generate_retry_replays_without_calling_gemini(test_client, fake_gemini):
+    headers = {"Idempotency-Key": "gen-1"}
+
+    first = test_client.post("/api/blogs/generate", json=GENERATE_PARAMS, headers=headers)
+    second = test_client.post("/api/blogs/generate", json=GENERATE_PARAMS, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert fake_gemini.calls["generate_blog_post"] == 1
+
+def test_create_retry_does_not_duplicate_post(test_client, fake_repo):
+    headers = {"Idempotency-Key": "create-1"}
+
+    first = test_client.post("/api/blogs/", json=POST_BODY, headers=headers)
+    second = test_client.post("/api/blogs/", json=POST_BODY, headers=headers)
+
+    assert first.json()["id"] == second.json()["id"]
+    assert len(fake_repo.posts) == 1
+    render_cache = test_client.app.state.container.render_cache
+    assert (render_cache.renders, render_cache.hits) == (1, 0)  # the replay doesn't render again
+
+def test_create_retry_after_its_record_is_gone_keeps_the_stored_post(test_client, fake_repo):
+    headers = {"Idempotency-Key": "create-3"}
+    post_id = test_client.post("/api/blogs/", json=POST_BODY, headers=headers).json()["id"]
+    test_client.patch(f"/api/blogs/{post_id}", json={"title": "Edited"})
+    # Evicted, expired, or stored by another worker
+    test_client.app.state.container.idempotency_service.store._records.clear()
+
+    retry = test_client.post("/api/blogs/", json=POST_BODY, headers=headers)
+
+    assert retry.json()["id"] == post_id and retry.json()["title"] == "Edited"
+    assert fake_repo.posts[post_id].title == "Edited"
+    revisions = test_client.get(f"/api/blogs/{post_id}/revisions").json()
+    assert [r["source"] for r in revisions] == ["patch", "create"]
+
+def test_key_reused_with_different_payload_is_rejected(test_client):
+    headers = {"Idempotency-Key": "create-2"}
+    test_client.post("/api/blogs/", json=POST_BODY, headers=headers)
+
+    response = test_client.post("/api/blogs/", json=dict(POST_BODY, title="Other"), headers=headers)
+
+    assert response.status_code == 422
+
+def test_requests_without_key_are_not_deduplicated(test_client, fake_repo):
+    test_client.post("/api/blogs/", json=POST_BODY)
+    test_client.post("/api/blogs/", json=POST_BODY)
+    assert len(fake_repo.posts) == 2
+
+@pytest.mark.asyncio
+async def test_concurrent_retries_share_one_generation(app, fake_gemini):
+    fake_gemini.time_scale = 0.01
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(*(
+                client.post("/api/blogs/generate", json=GENERATE_PARAMS, headers={"Idempotency-Key": "gen-2"})
+                for _ in range(4)
+            ))
+
+    assert {response.status_code for response in responses} == {200}
+    assert fake_gemini.calls["generate_blog_post"] == 1
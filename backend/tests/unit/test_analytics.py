@@ -0,0 +1,93 @@
+from datetime import date
+
+import pytest
+
+from src.services.analytics import (
+    AnalyticsAggregator,
+    ENGAGEMENT,
+    HyperLogLog,
+    InMemoryAnalyticsStore,
+    VIEW,
+)
+
+
+def test_hyperloglog_estimates_and_merges_within_error():
+    first, second = HyperLogLog(12), HyperLogLog(12)
+    for i in range(20000):
+        first.add(f"visitor-{i}")
+        second.add(f"visitor-{i + 10000}")  # half overlap
+    assert abs(first.count() - 20000) / 20000 < 0.05
+    assert HyperLogLog(12).count() == 0
+
+    first.merge(second)
+
+    assert abs(first.count() - 30000) / 30000 < 0.05
+    assert HyperLogLog(12, first.to_bytes()).count() == first.count()
+
+
+class CountingStore(InMemoryAnalyticsStore):
+    def __init__(self, fail=False):
+        super().__init__()
+        self.calls = []
+        self.fail = fail
+
+    async def merge(self, rollups):
+        self.calls.append(len(rollups))
+        if self.fail:
+            raise RuntimeError("unavailable")
+        await super().merge(rollups)
+
+
+@pytest.mark.asyncio
+async def test_events_become_one_rollup_write_per_post_and_day():
+    store = CountingStore()
+    aggregator = AnalyticsAggregator(store)
+    day = date(2025, 1, 1)
+    for i in range(1000):
+        aggregator.record("a", VIEW, f"v{i % 10}", day=day)
+    aggregator.record("a", ENGAGEMENT, "v1", time_on_page=30, bounced=False, day=day)
+    aggregator.record("a", ENGAGEMENT, "v2", time_on_page=10, bounced=True, day=day)
+    aggregator.record("b", VIEW, "v1", day=day)
+
+    assert await aggregator.flush() == 2
+    aggregator.record("a", ENGAGEMENT, "v3", time_on_page=50, day=day)
+    await aggregator.flush()
+
+    assert store.calls == [2, 1]
+    [rollup] = await store.query(["a"], day, day)
+    assert (rollup.views, rollup.visitors.count(), rollup.engagements, rollup.bounces) == (1000, 10, 3, 1)
+    assert rollup.mean_time_on_page == pytest.approx(30.0)
+    assert rollup.to_dict()["bounce_rate"] == pytest.approx(1 / 3, abs=1e-4)
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_rollups_for_the_next_one():
+    store = CountingStore(fail=True)
+    aggregator = AnalyticsAggregator(store)
+    aggregator.record("a", VIEW, "v1")
+
+    with pytest.raises(RuntimeError):
+        await aggregator.flush()
+    aggregator.record("a", VIEW, "v2")
+    store.fail = False
+    await aggregator.flush()
+
+    [rollup] = await store.query(["a"], date.min, date.max)
+    assert rollup.views == 2 and aggregator.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_events_past_the_pending_cap_are_dropped_until_the_flush():
+    store = CountingStore()
+    aggregator = AnalyticsAggregator(store, max_pending=2)
+    day = date(2025, 1, 1)
+
+    assert aggregator.record("a", VIEW, "v1", day=day)
+    assert aggregator.record("b", VIEW, "v1", day=day)
+    assert not aggregator.record("c", VIEW, "v1", day=day)
+    assert aggregator.record("a", VIEW, "v2", day=day)  # existing rollups still take events
+    assert (aggregator.pending, aggregator.dropped) == (2, 1)
+
+    assert await aggregator.flush() == 2
+    assert aggregator.record("c", VIEW, "v1", day=day)
+    assert aggregator.dropped == 0
@@ -0,0 +1,24 @@
+import pytest
+from benchmarks.driver import compare, percentile, run_benchmark
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 99) == 0.0
+
+def test_compare_flags_regressions():
+    route = {"p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": 30.0, "throughput_rps": 100.0}
+    baseline = {"routes": {"GET /x": route}}
+    slower = {"routes": {"GET /x": dict(route, p95_ms=30.0)}}
+    assert compare({"routes": {"GET /x": route}}, baseline) == []
+    assert compare(slower, baseline, tolerance=0.1)[0].startswith("GET /x p95_ms")
+
+@pytest.mark.asyncio
+async def test_run_benchmark_reports_every_route(app, fake_repo):
+    report = await run_benchmark(app, fake_repo, total_requests=60, concurrency=4, seed_count=8)
+    assert sum(route["count"] for route in report["routes"].values()) == 60
+    assert all(route["errors"] == 0 for route in report["routes"].values())
+    assert {"p50_ms", "p95_ms", "p99_ms", "throughput_rps"} <= set(report["routes"]["GET /api/blogs/"])
+    assert report["machine"]["cpu_count"] and report["config"]["concurrency"] == 4
@@ -0,0 +1,63 @@
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from src.core.container import Container
+
+@pytest.mark.asyncio
+async def test_clients_are_created_lazily_and_closed():
+    container = Container()
+    fake_client = MagicMock()
+    with patch("src.core.container.initialize_firebase") as init_app, \
+         patch("src.core.container.create_firestore_client", return_value=fake_client) as create_client:
+        assert init_app.call_count == 0
+
+        repo = container.blog_repository
+        assert container.blog_repository is repo
+        assert repo.db is fake_client
+        create_client.assert_called_once_with(init_app.return_value)
+
+        await container.aclose()
+        fake_client.close.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_aclose_without_clients_is_a_noop():
+    container = Container()
+    await container.aclose()
+
+@pytest.mark.asyncio
+async def test_index_files_are_loaded_but_never_written_by_workers(tmp_path, monkeypatch):
+    from src.core.config import settings
+    from src.models.blog_post import BlogPost
+    from src.services.tag_index import TagIndex
+
+    path = tmp_path / "tags.npz"
+    built = TagIndex()
+    built.add(BlogPost(id="p1", title="Bread", content="sourdough starter", slug="b", author_id="u"))
+    built.save(str(path))
+    written = path.read_bytes()
+    monkeypatch.setattr(settings, "TAG_INDEX_PATH", str(path))
+    container = Container()
+
+    await container.post_indexes.add_async(BlogPost(id="p2", title="Rye", content="rye flour", slug="r", author_id="u"))
+    assert len(container.tag_index) == 2 and container.post_indexes is container.post_indexes
+    await container.aclose()
+
+    assert path.read_bytes() == written
+
+def test_app_starts_with_default_settings_and_no_credentials(monkeypatch):
+    from fastapi.testclient import TestClient
+    from src.core.config import settings
+    from src.main import create_app
+
+    for name in ("FIREBASE_PROJECT_ID", "FIREBASE_PRIVATE_KEY", "FIREBASE_CLIENT_EMAIL"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr("firebase_admin._apps", {})
+    assert settings.SCHEDULER_ENABLED
+
+    app = create_app()
+    with TestClient(app) as client:
+        assert client.get("/health").status_code == 200
+        time.sleep(0.1)
+        container = app.state.container
+        # Still retrying in the background rather than failing startup
+        assert container._post_scheduler is None and not container._post_scheduler_start.done()
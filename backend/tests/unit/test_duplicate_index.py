@@ -0,0 +1,79 @@
+import random
+
+from src.models.blog_post import BlogPost
+from src.services.duplicate_index import DuplicateIndex, LSHIndex, MinHasher, shingle_hashes
+
+_rng = random.Random(0)
+_WORDS = [f"word{i}" for i in range(5000)]
+
+
+def _text(words=400):
+    return " ".join(_rng.choice(_WORDS) for _ in range(words))
+
+
+def _post(post_id, content, title="Untitled", author_id="a", status="published", tags=None):
+    return BlogPost(id=post_id, title=title, content=content, slug=post_id, author_id=author_id,
+                    status=status, tags=tags or [])
+
+
+def test_signature_similarity_tracks_jaccard():
+    hasher = MinHasher(256)
+    a = shingle_hashes(_text())
+    b = a[: len(a) // 2]
+    agreement = (hasher.signature(a) == hasher.signature(b)).mean()
+    assert abs(agreement - 0.5) < 0.1
+
+def test_lsh_finds_near_duplicates_across_merges_and_removals():
+    hasher = MinHasher(128)
+    lsh = LSHIndex(128, 16, merge_every=8)
+    texts = {str(i): _text() for i in range(50)}
+    for key, text in texts.items():
+        lsh.add(key, hasher.signature(shingle_hashes(text)))
+
+    tokens = texts["7"].split()
+    tokens[100] = "edited"
+    query = hasher.signature(shingle_hashes(" ".join(tokens)))
+    assert [key for key, _ in lsh.query(query, 0.7)] == ["7"]
+
+    lsh.remove("7")
+    assert lsh.query(query, 0.7) == []
+    assert len(lsh) == 49
+
+def test_duplicates_are_limited_to_own_or_published_posts():
+    index = DuplicateIndex()
+    content = _text()
+    index.add(_post("mine", content, author_id="me", status="draft"))
+    index.add(_post("theirs-draft", content, author_id="other", status="draft"))
+    index.add(_post("theirs-published", content, author_id="other"))
+
+    found = {d.post_id for d in index.find_duplicates(content, author_id="me")}
+
+    assert found == {"mine", "theirs-published"}
+    assert index.find_duplicates(content, author_id="me", exclude_id="mine")[0].post_id == "theirs-published"
+
+def test_unrelated_content_is_not_a_duplicate():
+    index = DuplicateIndex()
+    index.add(_post("p1", _text()))
+    assert index.find_duplicates(_text(), author_id="a") == []
+
+def test_similar_topics_use_title_and_tags():
+    index = DuplicateIndex()
+    index.add(_post("p1", _text(), title="Getting started with Python asyncio", tags=["python", "asyncio"]))
+
+    assert index.find_similar_topics("Python asyncio: getting started", ["asyncio"])[0].post_id == "p1"
+    assert index.find_similar_topics("Sourdough bread at home") == []
+
+def test_save_and_load_round_trip(tmp_path):
+    index = DuplicateIndex()
+    content = _text()
+    index.add(_post("p1", content, title="Python asyncio"))
+    index.add(_post("p2", _text()))
+    index.remove("p2")
+    path = str(tmp_path / "duplicates.npz")
+
+    index.save(path)
+    loaded = DuplicateIndex.load(path)
+
+    assert len(loaded) == 1
+    assert loaded.find_duplicates(content)[0].post_id == "p1"
+    assert loaded.find_similar_topics("python asyncio")[0].post_id == "p1"
@@ -0,0 +1,121 @@
+import asyncio
+import time
+import pytest
+from fastapi import HTTPException
+from src.services.idempotency_service import (
+    COMPLETED,
+    IdempotencyService,
+    InMemoryIdempotencyStore,
+    SQLiteIdempotencyStore,
+)
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        store = SQLiteIdempotencyStore(str(tmp_path / "idempotency.sqlite3"))
+        yield store
+        store.close()
+    else:
+        yield InMemoryIdempotencyStore()
+
+@pytest.mark.asyncio
+async def test_store_reserve_is_exclusive(store):
+    assert await store.reserve("k", "fp", ttl=60) is None
+    existing = await store.reserve("k", "fp", ttl=60)
+    assert existing.state == "in_progress"
+
+    await store.complete("k", 200, {"ok": True}, ttl=60)
+    record = await store.get("k")
+    assert record.state == COMPLETED
+    assert record.body == {"ok": True}
+
+@pytest.mark.asyncio
+async def test_store_release_and_expiry(store):
+    await store.reserve("k", "fp", ttl=60)
+    await store.release("k")
+    assert await store.get("k") is None
+
+    await store.reserve("expired", "fp", ttl=-1)
+    assert await store.reserve("expired", "fp", ttl=60) is None
+
+def test_memory_store_is_bounded():
+    store = InMemoryIdempotencyStore(max_entries=2)
+    for key in ("a", "b", "c"):
+        asyncio.run(store.reserve(key, "fp", ttl=60))
+    assert asyncio.run(store.get("a")) is None
+    assert asyncio.run(store.get("c")) is not None
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_attach_to_in_flight_work():
+    service = IdempotencyService(InMemoryIdempotencyStore())
+    calls = 0
+
+    async def handler():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return 200, {"n": calls}
+
+    results = await asyncio.gather(*(service.run("k", "fp", handler) for _ in range(5)))
+
+    assert calls == 1
+    assert [body for _, body, _ in results] == [{"n": 1}] * 5
+    assert sorted(replayed for _, _, replayed in results) == [False, True, True, True, True]
+
+@pytest.mark.asyncio
+async def test_completed_result_is_replayed_and_payload_mismatch_rejected():
+    service = IdempotencyService(InMemoryIdempotencyStore())
+
+    async def handler():
+        return 200, {"id": "1"}
+
+    await service.run("k", "fp", handler)
+    assert await service.run("k", "fp", handler) == (200, {"id": "1"}, True)
+    with pytest.raises(HTTPException) as exc_info:
+        await service.run("k", "other", handler)
+    assert exc_info.value.status_code == 422
+
+@pytest.mark.asyncio
+async def test_failed_work_is_released_for_retry():
+    service = IdempotencyService(InMemoryIdempotencyStore())
+
+    async def failing():
+        raise RuntimeError("boom")
+
+    async def succeeding():
+        return 200, {"ok": True}
+
+    with pytest.raises(RuntimeError):
+        await service.run("k", "fp", failing)
+    assert await service.run("k", "fp", succeeding) == (200, {"ok": True}, False)
+
+@pytest.mark.asyncio
+async def test_duplicate_waits_for_other_worker_via_store():
+    store = InMemoryIdempotencyStore()
+    worker_a = IdempotencyService(store, poll_interval=0.005)
+    worker_b = IdempotencyService(store, poll_interval=0.005)
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return 201, {"id": "x"}
+
+    first, second = await asyncio.gather(worker_a.run("k", "fp", slow), worker_b.run("k", "fp", slow))
+
+    assert first == (201, {"id": "x"}, False)
+    assert second == (201, {"id": "x"}, True)
+
+@pytest.mark.asyncio
+async def test_reservation_of_a_dead_worker_expires_after_the_wait_timeout(store):
+    service = IdempotencyService(store, ttl=3600, wait_timeout=0.05, poll_interval=0.005)
+
+    async def handler():
+        return 201, {"id": "x"}
+
+    # A worker reserved the key and died before completing or releasing it
+    assert await store.reserve("k", "fp", service.lease) is None
+    with pytest.raises(HTTPException) as exc_info:
+        await service.run("k", "fp", handler)
+    assert exc_info.value.status_code == 409
+
+    assert await service.run("k", "fp", handler) == (201, {"id": "x"}, False)
+    assert (await store.get("k")).expires_at > time.time() + 3000
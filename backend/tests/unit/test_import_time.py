@@ -0,0 +1,39 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+# Generous enough for a cold CI runner; override with IMPORT_TIME_BUDGET_SECONDS.
+IMPORT_TIME_BUDGET_SECONDS = float(os.getenv("IMPORT_TIME_BUDGET_SECONDS", "2.5"))
+
+SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import src.main
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "elapsed": elapsed,
+    "modules": [m for m in ("google.generativeai", "google.cloud.firestore") if m in sys.modules],
+    "firebase_apps": len(sys.modules["firebase_admin"]._apps),
+}))
+"""
+
+def _import_main() -> dict:
+    env = {k: v for k, v in os.environ.items() if not k.startswith(("FIREBASE_", "GEMINI_"))}
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_import_main_has_no_side_effects_and_fits_budget():
+    """Importing the app must not initialize Firebase or load the Gemini/Firestore SDKs."""
+    report = _import_main()
+    assert report["firebase_apps"] == 0
+    assert report["modules"] == []
+    assert report["elapsed"] < IMPORT_TIME_BUDGET_SECONDS, (
+        f"import src.main took {report['elapsed']:.2f}s (budget {IMPORT_TIME_BUDGET_SECONDS}s)"
+    )
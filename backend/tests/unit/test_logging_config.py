@@ -0,0 +1,67 @@
+import json
+import logging
+import queue
+import threading
+
+from src.core.logging_config import (
+    DebugSamplingFilter,
+    DeferredQueueHandler,
+    JsonFormatter,
+    truncate,
+)
+
+
+def _record(msg, *args, level=logging.INFO, name="test", **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_truncate_long_values():
+    """Test that long values are cut down with a marker."""
+    assert truncate("short", 10) == "short"
+    result = truncate("x" * 100, 10)
+    assert result.startswith("x" * 10)
+    assert "truncated 90 chars" in result
+
+
+def test_json_formatter_outputs_structured_fields():
+    """Test JSON output includes extras and truncates large bodies."""
+    formatter = JsonFormatter(max_field_length=20)
+    record = _record("post %s", "abc", post_id="p1", body="y" * 100)
+    payload = json.loads(formatter.format(record))
+    assert payload["msg"] == "post abc"
+    assert payload["level"] == "INFO"
+    assert payload["post_id"] == "p1"
+    assert payload["body"].startswith("y" * 20)
+    assert "truncated" in payload["body"]
+
+
+def test_debug_sampling_filter():
+    """Test that only one in N DEBUG records pass and other levels always pass."""
+    sampler = DebugSamplingFilter(every=5)
+    passed = sum(sampler.filter(_record("d", level=logging.DEBUG)) for _ in range(50))
+    assert passed == 10
+    assert all(sampler.filter(_record("w", level=logging.WARNING)) for _ in range(5))
+
+
+def test_deferred_queue_handler_skips_formatter_on_caller():
+    """Test the queue handler interpolates args but leaves formatting to the listener."""
+    calls = []
+
+    class RecordingFormatter(logging.Formatter):
+        def format(self, record):
+            calls.append(threading.current_thread().name)
+            return super().format(record)
+
+    log_queue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    handler.setFormatter(RecordingFormatter())
+    args = ["before"]
+    handler.handle(_record("value=%s", args))
+    args[0] = "after"
+
+    queued = log_queue.get_nowait()
+    assert queued.getMessage() == "value=['before']"
+    assert queued.args is None
+    assert calls == []
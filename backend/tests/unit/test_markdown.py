@@ -0,0 +1,42 @@
+from src.utils.markdown import (
+    find_sections,
+    normalize_section_body,
+    parse_sections,
+    replace_section_body,
+    section_body,
+    stitch_article,
+    summarize_text,
+)
+
+def test_normalize_drops_repeated_heading_and_demotes_others():
+    body = "## Setup\n\nText.\n\n# Details\nMore."
+    assert normalize_section_body(body, "Setup") == "Text.\n\n### Details\nMore."
+
+def test_stitch_article_uses_consistent_levels():
+    article = stitch_article("Title", [("One", "First."), ("Two", "#### Deep\nSecond.")])
+    assert article == "# Title\n\n## One\n\nFirst.\n\n## Two\n\n#### Deep\nSecond.\n"
+
+ARTICLE = "# Title\n\nIntro.\n\n## Setup\n\nInstall it.\n\n### Linux\n\nUse apt.\n\n```\n# not a heading\n```\n\n## Usage\n\nRun it.\n"
+
+def test_parse_sections_builds_heading_paths_and_skips_code_fences():
+    sections = parse_sections(ARTICLE)
+    assert [s.path for s in sections] == [
+        ("Title",), ("Title", "Setup"), ("Title", "Setup", "Linux"), ("Title", "Usage"),
+    ]
+    assert sections[1].children == [sections[2]]
+    assert "# not a heading" in section_body(ARTICLE, sections[2])
+
+def test_find_sections_matches_trailing_path_case_insensitively():
+    sections = parse_sections(ARTICLE)
+    assert [s.heading for s in find_sections(sections, ["setup", "LINUX"])] == ["Linux"]
+    assert find_sections(sections, ["Missing"]) == []
+
+def test_replace_section_body_leaves_other_sections_untouched():
+    setup = find_sections(parse_sections(ARTICLE), ["Setup"])[0]
+    patched = replace_section_body(ARTICLE, setup, "## Setup\n\nNew text.")
+    assert patched == "# Title\n\nIntro.\n\n## Setup\n\nNew text.\n\n## Usage\n\nRun it.\n"
+
+def test_summarize_text_cuts_at_sentence_boundary():
+    text = "First sentence is here. " * 20
+    summary = summarize_text(text, max_chars=60)
+    assert summary.endswith(".") and len(summary) <= 60
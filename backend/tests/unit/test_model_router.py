@@ -0,0 +1,48 @@
+import pytest
+
+from src.services.model_router import TASKS, ModelRouter
+
+
+def _routes(**overrides):
+    routes = {task: "base-model" for task in TASKS}
+    routes.update(overrides)
+    return routes
+
+
+def test_routes_carry_generation_config_and_clients_are_cached_per_task():
+    created = []
+    router = ModelRouter(
+        _routes(slug={"model": "lite", "fallback": "base-model", "max_output_tokens": 32, "temperature": 0}),
+        factory=lambda name, config: created.append((name, config)) or object(),
+    )
+
+    slug = router.route("slug")
+    assert slug.models == ["lite", "base-model"]
+    assert router.route("article").models == ["base-model"]
+    assert router.client(slug, "lite") is router.client(slug, "lite")
+    router.client(slug, "base-model")
+    assert created == [("lite", {"max_output_tokens": 32, "temperature": 0}),
+                       ("base-model", {"max_output_tokens": 32, "temperature": 0})]
+
+
+def test_missing_or_unknown_tasks_are_rejected():
+    with pytest.raises(ValueError, match="slug"):
+        ModelRouter({task: "m" for task in TASKS if task != "slug"}, factory=lambda name, config: None)
+    router = ModelRouter(_routes(), factory=lambda name, config: None)
+    with pytest.raises(ValueError, match="Unknown generation task"):
+        router.route("poem")
+
+
+def test_stats_track_latency_tokens_cost_and_failures_per_model():
+    router = ModelRouter(_routes(), factory=lambda name, config: None, prices={"base-model": [0.1, 0.4]})
+    router.breaker("base-model")
+    router.record("base-model", 0.5, input_tokens=2_000_000, output_tokens=1_000_000)
+    router.record("base-model", 1.5, input_tokens=10, succeeded=False)
+    router.record("lite", 0.2, fallback=True)
+
+    stats = router.stats()
+    assert stats["base-model"]["calls"] == 2 and stats["base-model"]["failures"] == 1
+    assert stats["base-model"]["p95_seconds"] == 0.5  # failed calls don't feed latency
+    assert stats["base-model"]["estimated_cost_usd"] == pytest.approx(0.6, rel=1e-4)
+    assert stats["base-model"]["breaker"] == "closed"
+    assert stats["lite"]["fallback_calls"] == 1 and stats["lite"]["estimated_cost_usd"] == 0
@@ -0,0 +1,29 @@
+import threading
+import pytest
+from src.models.blog_post import BlogPost
+from src.services.post_indexes import PostIndexes
+
+class RecordingIndex:
+    def __init__(self):
+        self.calls = []
+
+    def add(self, post):
+        self.calls.append(("add", post.id, post.title, threading.current_thread().name))
+
+    def remove(self, post_id):
+        self.calls.append(("remove", post_id, None, threading.current_thread().name))
+
+@pytest.mark.asyncio
+async def test_writes_are_applied_off_the_event_loop_in_order():
+    index = RecordingIndex()
+    indexes = PostIndexes([index])
+    versions = [BlogPost(id="p1", title=f"v{i}", content="C", slug="s", author_id="u") for i in range(5)]
+
+    for post in versions[:-1]:
+        indexes.submit(post)
+    await indexes.add_async(versions[-1])
+    await indexes.remove_async("p1")
+    indexes.close()
+
+    assert [(op, title) for op, _, title, _ in index.calls] == [("add", f"v{i}") for i in range(5)] + [("remove", None)]
+    assert all(thread.startswith("post-indexes") for *_, thread in index.calls)
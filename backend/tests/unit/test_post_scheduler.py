@@ -0,0 +1,87 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from benchmarks.fakes import InMemoryBlogRepository
+from src.models.blog_post import BlogPost
+from src.services.post_scheduler import InMemoryLeaseStore, PostScheduler
+
+
+async def _scheduled(repo, post_id, seconds_from_now):
+    when = datetime.utcnow() + timedelta(seconds=seconds_from_now)
+    post = BlogPost(title=post_id, content="c", slug=post_id, author_id="a", status="scheduled", scheduled_for=when)
+    return await repo.create(post, post_id=post_id)
+
+
+@pytest.mark.asyncio
+async def test_publishes_only_due_posts_in_the_window():
+    repo = InMemoryBlogRepository()
+    for post_id, offset in (("due", -5), ("soon", 60), ("later", 3600)):
+        await _scheduled(repo, post_id, offset)
+    published = []
+    scheduler = PostScheduler(repo, InMemoryLeaseStore(), on_published=published.extend, lookahead=300)
+
+    assert await scheduler.reload() == 2  # "later" is outside the window
+    result = await scheduler.run_due()
+
+    assert [post.id for post in result] == ["due"] == [post.id for post in published]
+    assert repo.posts["due"].status == "published"
+    assert repo.posts["due"].published_at == repo.posts["due"].scheduled_for
+    assert repo.posts["soon"].status == "scheduled"
+    assert len(scheduler) == 1
+
+
+@pytest.mark.asyncio
+async def test_rescheduled_and_cancelled_posts_are_not_published():
+    repo = InMemoryBlogRepository()
+    moved = await _scheduled(repo, "moved", -1)
+    await _scheduled(repo, "cancelled", -1)
+    scheduler = PostScheduler(repo, InMemoryLeaseStore())
+    await scheduler.reload()
+
+    moved.scheduled_for = datetime.utcnow() + timedelta(seconds=120)
+    await repo.update("moved", moved)
+    scheduler.sync(moved)
+    await repo.update_fields("cancelled", {"status": "draft"})
+    scheduler.unschedule("cancelled")
+
+    assert await scheduler.run_due() == []
+    assert scheduler.next_deadline == pytest.approx(time.time() + 120, abs=5)
+
+
+@pytest.mark.asyncio
+async def test_workers_sharing_leases_publish_each_post_once():
+    repo = InMemoryBlogRepository()
+    for i in range(50):
+        await _scheduled(repo, f"p{i}", -1)
+    leases = InMemoryLeaseStore()
+    published = []
+    workers = [PostScheduler(repo, leases, on_published=published.extend, batch_size=7) for _ in range(3)]
+    for worker in workers:
+        await worker.reload()
+
+    await asyncio.gather(*(worker.run_due() for worker in workers))
+
+    assert sorted(post.id for post in published) == sorted(f"p{i}" for i in range(50))
+
+
+@pytest.mark.asyncio
+async def test_background_task_wakes_for_newly_scheduled_posts():
+    repo = InMemoryBlogRepository()
+    published = []
+    scheduler = PostScheduler(repo, InMemoryLeaseStore(), on_published=published.extend, lookahead=300)
+    scheduler.start()
+    try:
+        await asyncio.sleep(0.01)  # first window load; nothing scheduled yet
+        post = await _scheduled(repo, "p", 0.05)
+        scheduler.sync(post)
+        for _ in range(100):
+            if published:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await scheduler.stop()
+
+    assert [p.id for p in published] == ["p"]
@@ -0,0 +1,65 @@
+import pytest
+from src.services.prompts import PROMPTS, PromptRegistry, PromptTelemetry, PromptTemplate
+
+def test_templates_are_dedented_and_drop_empty_optional_lines():
+    template = PromptTemplate("t", 1, "slug", """
+        Title: {title}
+            Indented: {count:03d}
+
+        Extra: {extra}
+
+        End.
+        """, params={"title": str, "count": int, "extra": str}, optional=("extra",))
+
+    assert template.render(title="A", count=7, extra="x").text == "Title: A\n    Indented: 007\n\nExtra: x\n\nEnd."
+    rendered = template.render(title="A", count=7)
+    assert rendered.text == "Title: A\n    Indented: 007\n\nEnd."
+    assert (rendered.template, rendered.task) == ("t@v1", "slug")
+
+def test_parameters_are_checked():
+    with pytest.raises(ValueError, match="undeclared"):
+        PromptTemplate("t", 1, "slug", "{title} {typo}", params={"title": str})
+    with pytest.raises(ValueError, match="doesn't use"):
+        PromptTemplate("t", 1, "slug", "{title}", params={"title": str, "unused": int})
+
+    template = PromptTemplate("t", 1, "slug", "{title} in {words} words", params={"title": str, "words": int})
+    with pytest.raises(TypeError, match="missing parameter 'words'"):
+        template.render(title="A")
+    with pytest.raises(TypeError, match="must be int"):
+        template.render(title="A", words="300")
+    with pytest.raises(TypeError, match="unknown parameters: tone"):
+        template.render(title="A", words=300, tone="dry")
+
+def test_registry_serves_latest_version_unless_pinned():
+    registry = PromptRegistry()
+    registry.register(PromptTemplate("t", 1, "slug", "old {title}", params={"title": str}))
+    registry.register(PromptTemplate("t", 2, "slug", "new {title}", params={"title": str}))
+
+    assert registry.get("t").render(title="x").text == "new x"
+    assert registry.get("t", version=1).render(title="x").text == "old x"
+    with pytest.raises(ValueError, match="already registered"):
+        registry.register(PromptTemplate("t", 2, "slug", "{title}", params={"title": str}))
+    with pytest.raises(KeyError):
+        registry.get("t", version=3)
+
+def test_shipped_prompts_carry_no_source_indentation():
+    for template in PROMPTS:
+        assert not any(line.startswith(" ") for line in template.text.splitlines()), template.key
+
+def test_telemetry_aggregates_per_template_costliest_first():
+    telemetry = PromptTelemetry()
+    telemetry.record_usage("slug@v1", 40, 5, cost=0.00001)
+    telemetry.record_call("slug@v1", 0.2)
+    for _ in range(2):
+        telemetry.record_usage("article@v1", 300, 2000, cost=0.001)
+    telemetry.record_call("article@v1", 9.0)  # one generation, one hedged attempt
+    telemetry.record_call("article@v1", 30.0, succeeded=False)
+
+    stats = telemetry.stats()
+
+    assert list(stats) == ["article@v1", "slug@v1"]
+    article = stats["article@v1"]
+    assert (article["calls"], article["errors"], article["error_rate"]) == (2, 1, 0.5)
+    assert (article["prompt_tokens"], article["avg_response_tokens"]) == (600, 2000)
+    assert article["p95_seconds"] == 9.0
+    assert article["estimated_cost_usd"] == pytest.approx(0.002)
@@ -0,0 +1,88 @@
+import time
+
+import pytest
+
+from src.services.rate_limiter import (
+    InMemoryRateLimitStore,
+    RateLimiter,
+    RateLimitExceeded,
+    SQLiteRateLimitStore,
+)
+
+TIERS = {
+    "anonymous": {"burst": 2, "per_hour": 3600},
+    "anonymous_ip": {"burst": 3, "per_hour": 3600},
+    "authenticated": {"burst": 5, "per_hour": 3600},
+    "google.com": {"burst": 1, "per_hour": 3600},
+}
+ANON = {"uid": "a1", "firebase": {"sign_in_provider": "anonymous"}}
+
+
+def _anonymous(uid):
+    return {"uid": uid, "firebase": {"sign_in_provider": "anonymous"}}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def limiter(request, tmp_path):
+    if request.param == "sqlite":
+        store = SQLiteRateLimitStore(str(tmp_path / "limits.sqlite3"))
+        yield RateLimiter(store, TIERS)
+        store.close()
+    else:
+        yield RateLimiter(InMemoryRateLimitStore(shards=4), TIERS)
+
+
+@pytest.mark.asyncio
+async def test_bucket_rejects_after_burst_with_retry_after(limiter):
+    for _ in range(2):
+        await limiter.check("generate", ANON, "1.2.3.4")
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        await limiter.check("generate", ANON, "1.2.3.4")
+
+    assert excinfo.value.tier == "anonymous"
+    assert 0 < excinfo.value.retry_after <= 1.0  # one token per second
+
+
+@pytest.mark.asyncio
+async def test_fresh_anonymous_sessions_share_the_ip_bucket(limiter):
+    for i in range(3):
+        await limiter.check("generate", _anonymous(f"a{i}"), "1.2.3.4")
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        await limiter.check("generate", _anonymous("a-new"), "1.2.3.4")
+    assert excinfo.value.tier == "anonymous_ip"
+
+    # Another address, and signed-in users, are unaffected
+    await limiter.check("generate", _anonymous("a-new"), "5.6.7.8")
+    await limiter.check("generate", {"uid": "u1", "firebase": {"sign_in_provider": "password"}}, "1.2.3.4")
+
+
+@pytest.mark.asyncio
+async def test_rejected_requests_take_no_tokens_from_other_buckets(limiter):
+    await limiter.check("generate", ANON, "1.2.3.4")
+    await limiter.check("generate", ANON, "1.2.3.4")
+    for _ in range(3):
+        with pytest.raises(RateLimitExceeded):
+            await limiter.check("generate", ANON, "1.2.3.4")
+
+    # Only the two admitted requests were charged to the IP bucket
+    await limiter.check("generate", _anonymous("a2"), "1.2.3.4")
+
+
+@pytest.mark.asyncio
+async def test_provider_tier_and_refill():
+    limiter = RateLimiter(InMemoryRateLimitStore(), {**TIERS, "google.com": {"burst": 1, "per_hour": 36000}})
+    user = {"uid": "u1", "firebase": {"sign_in_provider": "google.com"}}
+    await limiter.check("generate", user, "1.2.3.4")
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        await limiter.check("generate", user, "1.2.3.4")
+    assert excinfo.value.tier == "google.com"
+
+    time.sleep(0.11)  # 10 tokens per second
+    await limiter.check("generate", user, "1.2.3.4")
+
+
+def test_tiers_are_validated():
+    with pytest.raises(ValueError, match="anonymous_ip"):
+        RateLimiter(InMemoryRateLimitStore(), {"anonymous": TIERS["anonymous"], "authenticated": TIERS["authenticated"]})
+    with pytest.raises(ValueError, match="per_hour"):
+        RateLimiter(InMemoryRateLimitStore(), {**TIERS, "authenticated": {"burst": 1, "per_hour": 0}})
@@ -0,0 +1,97 @@
+import random
+
+import numpy as np
+import pytest
+
+from benchmarks.fakes import InMemoryBlogRepository
+from src.jobs.rebuild_indexes import rebuild_indexes
+from src.models.blog_post import BlogPost
+from src.services.duplicate_index import DuplicateIndex
+from src.services.related_posts import RelatedPostsIndex
+
+_rng = random.Random(0)
+_TOPICS = {name: [f"{name}{i}" for i in range(30)] for name in ("python", "bread", "garden")}
+
+
+def _post(post_id, topic, status="published"):
+    words = _TOPICS[topic]
+    return BlogPost(id=post_id, title=f"{topic} notes", content=" ".join(_rng.choice(words) for _ in range(80)),
+                    slug=post_id, author_id="a", status=status)
+
+
+def _brute_force(index, post_id):
+    n = len(index._ids)
+    slot = index._slots[post_id]
+    similarities = index._vectors[:n] @ index._vectors[slot]
+    candidates = index._published[:n].copy()
+    candidates[slot] = False
+    order = np.argsort(-np.where(candidates, similarities, -np.inf), kind="stable")[:index.k]
+    return [index._ids[i] for i in order if candidates[i] and similarities[i] > 0]
+
+def test_related_posts_share_a_topic_and_skip_drafts():
+    index = RelatedPostsIndex(dimensions=256, k=3)
+    for i in range(4):
+        index.add(_post(f"py{i}", "python"))
+        index.add(_post(f"bread{i}", "bread"))
+    index.add(_post("py-draft", "python", status="draft"))
+
+    related = index.related("py0")
+
+    assert [r.post_id for r in related] and all(r.post_id.startswith("py") for r in related)
+    assert "py-draft" not in {r.post_id for r in related}
+    assert index.related("missing") is None
+
+def test_incremental_updates_match_a_full_recompute():
+    index = RelatedPostsIndex(dimensions=256, k=4)
+    ids = []
+    for step in range(200):
+        action = _rng.random()
+        if action < 0.6 or len(ids) < 4:
+            ids.append(f"p{step}")
+            index.add(_post(ids[-1], _rng.choice(list(_TOPICS)), status=_rng.choice(["published", "draft"])))
+        elif action < 0.85:
+            index.add(_post(_rng.choice(ids), _rng.choice(list(_TOPICS)), status=_rng.choice(["published", "draft"])))
+        else:
+            index.remove(ids.pop(_rng.randrange(len(ids))))
+
+    for post_id in ids:
+        assert [r.post_id for r in index.related(post_id)] == _brute_force(index, post_id)
+
+def test_save_and_load_round_trip(tmp_path):
+    index = RelatedPostsIndex(dimensions=256, k=3)
+    for i in range(5):
+        index.add(_post(f"py{i}", "python"))
+    index.remove("py4")
+    path = str(tmp_path / "related.npz")
+
+    index.save(path)
+    loaded = RelatedPostsIndex.load(path, dimensions=256, k=3)
+
+    assert loaded.related("py0") == index.related("py0")
+    loaded.add(_post("py5", "python"))
+    assert len(loaded) == 5
+
+@pytest.mark.asyncio
+async def test_rebuild_job_loads_every_post():
+    repo = InMemoryBlogRepository()
+    for i in range(3):
+        await repo.create(_post(f"py{i}", "python"), post_id=f"py{i}")
+    related = RelatedPostsIndex(dimensions=256, k=3)
+
+    count = await rebuild_indexes(repo, DuplicateIndex(), related)
+
+    assert count == 3
+    assert {r.post_id for r in related.related("py0")} == {"py1", "py2"}
+
+def test_staged_bulk_load_matches_rebuild():
+    posts = [_post(f"p{i}", _rng.choice(list(_TOPICS)), status=_rng.choice(["published", "draft"])) for i in range(40)]
+    rebuilt = RelatedPostsIndex(dimensions=256, k=4)
+    rebuilt.rebuild(posts)
+    staged = RelatedPostsIndex(dimensions=256, k=4)
+
+    for post in posts:
+        staged.stage(post)
+    staged.finish_staging()
+
+    for post in posts:
+        assert staged.related(post.id) == rebuilt.related(post.id)
@@ -0,0 +1,72 @@
+import pytest
+from benchmarks.fakes import InMemoryBlogRepository
+from src.jobs.render_posts import render_posts
+from src.models.blog_post import BlogPost
+from src.services.render_cache import RenderCache, RenderStore
+from src.utils.rendering import content_key, render_html
+
+class DictRenderStore(RenderStore):
+    def __init__(self):
+        self.entries = {}
+
+    async def get_many(self, keys):
+        return {key: self.entries[key] for key in keys if key in self.entries}
+
+    async def put_many(self, entries):
+        self.entries.update(entries)
+
+def test_rendered_html_is_sanitized():
+    html = render_html(
+        "# Title\n\n<script>alert(1)</script>\n\n"
+        "[bad](javascript:alert(1)) [good](https://example.com) ![img](data:text/html,x)\n\n"
+        "| a | b |\n|---|---|\n| 1 | ~~2~~ |\n"
+    )
+
+    assert "<h1>Title</h1>" in html
+    assert "<script>" not in html and "&lt;script&gt;" in html
+    assert "javascript:" not in html.split("<a ")[1] and 'href="https://example.com"' in html
+    assert 'rel="nofollow ugc noopener"' in html
+    assert "<img" not in html
+    assert "<table>" in html and "<s>2</s>" in html
+
+@pytest.mark.asyncio
+async def test_each_content_version_is_rendered_once_across_workers():
+    store = DictRenderStore()
+    calls = []
+
+    def counting_render(markdown):
+        calls.append(markdown)
+        return render_html(markdown)
+
+    first, second = RenderCache(store, render=counting_render), RenderCache(store, render=counting_render)
+
+    assert await first.html_many(["# A", "# B", "# A"]) == ["<h1>A</h1>\n", "<h1>B</h1>\n", "<h1>A</h1>\n"]
+    await first.html("# A")
+    assert await second.html("# B") == "<h1>B</h1>\n"  # served from the shared store
+    await second.html("# A, edited")
+
+    assert calls == ["# A", "# B", "# A, edited"]
+    assert (second.store_hits, second.renders) == (1, 1)
+
+@pytest.mark.asyncio
+async def test_local_cache_is_bounded_by_size():
+    cache = RenderCache(max_bytes=100)
+    for i in range(10):
+        await cache.html(f"paragraph {i} " * 3)
+
+    assert cache._size <= 100
+    assert await cache.html("paragraph 9 " * 3) and cache.hits == 1
+
+@pytest.mark.asyncio
+async def test_render_job_fills_only_missing_entries():
+    repo = InMemoryBlogRepository()
+    for i in range(5):
+        await repo.create(BlogPost(title=f"P{i}", content=f"# Post {i}", slug=f"p{i}", author_id="a"))
+    store = DictRenderStore()
+    store.entries[content_key("# Post 0")] = "<h1>Post 0</h1>\n"
+
+    result = await render_posts(repo, store, batch_size=2)
+
+    assert (result.posts, result.rendered, result.current) == (5, 4, 1)
+    assert store.entries[content_key("# Post 3")] == "<h1>Post 3</h1>\n"
+    assert (await render_posts(repo, store, force=True)).rendered == 5
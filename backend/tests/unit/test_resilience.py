@@ -0,0 +1,98 @@
+import asyncio
+import contextlib
+
+import pytest
+
+from src.services.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    Hedger,
+    LatencyTracker,
+)
+
+
+async def _fail():
+    raise RuntimeError("upstream error")
+
+
+async def _ok():
+    return "ok"
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_on_errors_fails_fast_and_recovers_through_a_probe():
+    breaker = CircuitBreaker(window=4, min_calls=4, failure_rate=0.5, open_seconds=0.05)
+    for call in (_ok, _fail, _ok, _fail):
+        with pytest.raises(RuntimeError) if call is _fail else contextlib.nullcontext():
+            await breaker.call(call)
+    assert breaker.state == OPEN
+
+    calls = []
+    with pytest.raises(CircuitOpenError) as excinfo:
+        await breaker.call(lambda: calls.append(1) or _ok())
+    assert calls == [] and excinfo.value.retry_after > 0
+
+    await asyncio.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert await breaker.call(_ok) == "ok"
+    assert breaker.state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_on_slow_calls_and_a_failed_probe_reopens_it():
+    breaker = CircuitBreaker(window=3, min_calls=3, slow_call_seconds=0.01, slow_call_rate=1.0, open_seconds=0.02)
+
+    async def slow():
+        await asyncio.sleep(0.015)
+        return "slow"
+
+    for _ in range(3):
+        await breaker.call(slow)
+    assert breaker.state == OPEN
+
+    await asyncio.sleep(0.03)
+    with pytest.raises(RuntimeError):
+        await breaker.call(_fail)
+    assert breaker.state == OPEN
+
+
+def test_latency_tracker_percentile_needs_samples():
+    tracker = LatencyTracker(window=100, min_samples=10)
+    assert tracker.percentile(95) is None
+    for i in range(1, 101):
+        tracker.add(i / 100)
+    assert tracker.percentile(95) == pytest.approx(0.95)
+
+
+@pytest.mark.asyncio
+async def test_hedge_races_a_second_attempt_after_the_delay():
+    delays = iter([1.0, 0.01])
+
+    async def call():
+        await asyncio.sleep(next(delays))
+        return "done"
+
+    hedger = Hedger(max_in_flight=1)
+    started = asyncio.get_running_loop().time()
+    assert await hedger.run(call, delay=0.02) == "done"
+
+    assert asyncio.get_running_loop().time() - started < 0.5
+    assert (hedger.hedged, hedger.won, hedger.in_flight) == (1, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_hedge_is_skipped_for_fast_calls_and_when_the_budget_is_spent():
+    hedger = Hedger(max_in_flight=0)
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        await asyncio.sleep(0.03)
+        return "done"
+
+    assert await hedger.run(call, delay=0.01) == "done"
+    assert await Hedger().run(call, delay=1.0) == "done"
+    assert len(attempts) == 2 and hedger.hedged == 0
@@ -0,0 +1,88 @@
+from datetime import datetime, timezone
+
+import pytest
+from src.models.blog_post import BlogPost
+from src.services.revisions import DELTA, SNAPSHOT, InMemoryRevisionStore, RevisionHistory
+from src.utils.delta import apply_delta, compress_text, line_delta
+
+def _article(paragraphs=400):
+    return "".join(f"## Part {i}\n\nParagraph {i} explains step {i} of the process in some detail.\n\n"
+                   for i in range(paragraphs))
+
+def test_line_delta_round_trips():
+    old = "a\nb\nc\nd\n"
+    for new in ("a\nB\nc\nd\n", "x\n" + old + "y", "", old, "d\nc\nb\na\n"):
+        assert apply_delta(old, line_delta(old, new)) == new
+
+@pytest.mark.asyncio
+async def test_small_edits_store_deltas_much_smaller_than_snapshots():
+    history = RevisionHistory(InMemoryRevisionStore())
+    post = BlogPost(id="p1", title="Guide", content=_article(), slug="guide", author_id="u1")
+    first = await history.record(post, None, "u1", "create")
+
+    previous = post.content
+    post.content = previous.replace("step 200 of", "step two hundred of")
+    second = await history.record(post, previous, "u1", "update")
+
+    assert first.kind == SNAPSHOT and second.kind == DELTA
+    assert second.stored_bytes * 20 < len(compress_text(post.content))
+    assert (await history.get("p1", 2)).content == post.content
+    assert (await history.get("p1", 1)).content == previous
+
+@pytest.mark.asyncio
+async def test_snapshots_bound_the_delta_chain():
+    store = InMemoryRevisionStore()
+    history = RevisionHistory(store, snapshot_every=3)
+    post = BlogPost(id="p1", title="Guide", content=_article(20), slug="guide", author_id="u1")
+    contents = [post.content]
+    await history.record(post, None, "u1", "create")
+    for i in range(6):
+        previous = post.content
+        post.content = previous.replace(f"step {i} of", f"step {i}! of")
+        contents.append(post.content)
+        await history.record(post, previous, "u1", "update")
+
+    kinds = [info.kind for info in reversed(await history.list("p1"))]
+    assert kinds == [SNAPSHOT, DELTA, DELTA, SNAPSHOT, DELTA, DELTA, SNAPSHOT]
+    for number, content in enumerate(contents, start=1):
+        assert (await history.get("p1", number)).content == content
+
+@pytest.mark.asyncio
+async def test_unchanged_saves_are_skipped_and_unknown_previous_content_snapshots():
+    history = RevisionHistory(InMemoryRevisionStore())
+    post = BlogPost(id="p1", title="Guide", content=_article(20), slug="guide", author_id="u1")
+    await history.record(post, None, "u1", "create")
+
+    assert await history.record(post, post.content, "u1", "update") is None
+    post.title = "Guide, revised"
+    assert (await history.record(post, post.content, "u1", "patch")).kind == DELTA
+    # Edited behind the history's back: there's no known base to diff against
+    post.content += "Appended elsewhere.\n"
+    assert (await history.record(post, "something else", "u1", "update")).kind == SNAPSHOT
+    assert (await history.get("p1", 3)).content == post.content
+    assert await history.get("p1", 4) is None
+
+
+class TzAwareRevisionStore(InMemoryRevisionStore):
+    """Hands datetimes back tz-aware, as Firestore does."""
+
+    async def head(self, post_id):
+        head = await super().head(post_id)
+        if head is not None:
+            head["fields"] = {name: value.replace(tzinfo=timezone.utc) if isinstance(value, datetime) else value
+                              for name, value in head["fields"].items()}
+        return head
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("store", [InMemoryRevisionStore(), TzAwareRevisionStore()])
+async def test_unchanged_published_post_is_not_stored_again(store):
+    history = RevisionHistory(store)
+    post = BlogPost(id="p1", title="Guide", content="Body", slug="guide", author_id="u1", status="published",
+                    published_at=datetime(2025, 1, 2, 3, 4, 5))
+
+    assert await history.record(post, None, "u1", "create") is not None
+    assert await history.record(post, post.content, "u1", "update") is None
+
+    detail = await history.get("p1", 1)
+    assert detail.fields["published_at"] == "2025-01-02T03:04:05"
@@ -0,0 +1,23 @@
+from src.core.server import SHUTDOWN_MARGIN, ServerOptions, _gunicorn_config, preload
+
+
+def test_gunicorn_config_carries_production_options():
+    options = ServerOptions(port=9000, workers=3, keep_alive=90, backlog=4096, graceful_timeout=60, max_requests=1000)
+
+    config = _gunicorn_config(options)
+
+    assert config["bind"] == "0.0.0.0:9000"
+    assert (config["workers"], config["keepalive"], config["backlog"]) == (3, 90, 4096)
+    assert config["graceful_timeout"] == 60 > SHUTDOWN_MARGIN
+    assert config["preload_app"] is True
+    assert (config["max_requests"], config["max_requests_jitter"]) == (1000, 100)
+    assert config["worker_class"] == "src.core.workers.ProductionWorker"
+
+
+def test_preload_imports_the_app_or_calls_its_factory():
+    from fastapi import FastAPI
+    from src.main import app
+
+    assert preload("src.main:app") is app
+    built = preload("benchmarks.app:create_app", factory=True)
+    assert isinstance(built, FastAPI) and built is not app
@@ -0,0 +1,42 @@
+from src.utils.summarizer import budgeted_excerpt, clamp_text, extractive_description, split_sentences
+
+ARTICLE = """# Caching FastAPI responses
+
+Caching is the cheapest way to make a FastAPI service fast. This guide adds ETags and Cache-Control headers to FastAPI responses.
+
+## Background
+
+The weather was nice today.
+
+```python
+# Not prose. Ignore me.
+x = 1
+```
+
+- Use [ETags](https://example.com) for **validation**.
+"""
+
+def test_split_sentences_strips_markup_headings_and_code():
+    title, sentences = split_sentences(ARTICLE)
+    assert title == "Caching FastAPI responses"
+    assert "Use ETags for validation." in sentences
+    assert not any("Ignore me" in s or s.startswith("#") for s in sentences)
+
+def test_extractive_description_prefers_on_topic_sentences_within_limit():
+    description = extractive_description(ARTICLE, max_chars=160)
+    assert len(description) <= 160
+    assert description.startswith("Caching is the cheapest way")
+    assert "weather" not in description
+
+def test_extractive_description_truncates_a_single_long_sentence():
+    article = "# T\n\n" + " ".join(["word"] * 100) + "."
+    description = extractive_description(article, max_chars=50)
+    assert len(description) <= 50
+    assert description.endswith("...")
+
+def test_clamp_text_respects_limit_without_spaces():
+    assert len(clamp_text("x" * 300, 160)) == 160
+
+def test_budgeted_excerpt_stays_within_token_budget():
+    excerpt = budgeted_excerpt(ARTICLE * 20, max_tokens=50)
+    assert 0 < len(excerpt) <= 50 * 4
@@ -0,0 +1,77 @@
+import pytest
+
+from benchmarks.fakes import InMemoryBlogRepository
+from src.jobs.retag_posts import retag_posts
+from src.models.blog_post import BlogPost
+from src.services.tag_index import TagIndex, extract_terms, merge_tags
+
+
+def _post(post_id, title, content, tags=None):
+    return BlogPost(id=post_id, title=title, content=content, slug=post_id, author_id="a", tags=tags or [])
+
+
+ASYNCIO_POST = _post(
+    "p1", "Python asyncio patterns",
+    "Asyncio event loops schedule coroutines. Python asyncio tasks run concurrently. "
+    "The event loop drives every asyncio task. Python developers use the event loop daily.",
+)
+
+def test_extract_terms_counts_unigrams_and_bigrams_and_skips_code():
+    counts = extract_terms("Event loop basics.\n\n```\nevent loop in code\n```\nThe event loop runs.")
+    assert counts["event loop"] == 2
+    assert counts["loop"] == 2
+    assert "the" not in counts
+
+def test_document_frequencies_update_incrementally():
+    index = TagIndex()
+    index.add(ASYNCIO_POST)
+    index.add(_post("p2", "Cooking", "Bake bread with flour."))
+    df_before = index.document_frequency("python")
+
+    index.add(_post("p1", "Baking", "Bread and flour only."))  # replaces the old version
+    index.remove("p2")
+
+    assert df_before == 1
+    assert index.document_frequency("python") == 0
+    assert index.document_frequency("bread") == 1
+    assert len(index) == 1
+
+def test_suggest_prefers_terms_that_are_rare_in_the_corpus():
+    index = TagIndex()
+    for i in range(20):
+        index.add(_post(f"py{i}", "Python tips", "Python code is readable. Python is popular."))
+
+    tags = index.suggest(ASYNCIO_POST.title, ASYNCIO_POST.content, k=3)
+
+    assert tags[0] == "python asyncio"
+    assert "event loop" in tags
+    assert "python" not in tags  # common across the archive and covered by "python asyncio"
+
+def test_save_and_load_round_trip(tmp_path):
+    index = TagIndex()
+    index.add(ASYNCIO_POST)
+    path = str(tmp_path / "tags.npz")
+
+    index.save(path)
+    loaded = TagIndex.load(path)
+
+    assert len(loaded) == 1
+    assert loaded.suggest(ASYNCIO_POST.title, ASYNCIO_POST.content) == index.suggest(ASYNCIO_POST.title, ASYNCIO_POST.content)
+    loaded.remove("p1")
+    assert loaded.document_frequency("asyncio") == 0
+
+def test_merge_tags_dedupes_case_insensitively():
+    assert merge_tags(["Python", "api"], ["python", "asyncio"], limit=3) == ["Python", "api", "asyncio"]
+
+@pytest.mark.asyncio
+async def test_retag_job_fills_missing_tags_only():
+    repo = InMemoryBlogRepository()
+    await repo.create(ASYNCIO_POST.model_copy(), post_id="p1")
+    await repo.create(_post("p2", "Kept", "Kept tags stay.", tags=["manual"]), post_id="p2")
+    index = TagIndex()
+
+    result = await retag_posts(repo, index, k=3)
+
+    assert (result.indexed, result.retagged) == (2, 1)
+    assert "event loop" in repo.posts["p1"].tags
+    assert repo.posts["p2"].tags == ["manual"]